@@ -1,29 +1,31 @@
-from copy import deepcopy
 from datetime import timedelta
+from hashlib import sha1
+import json
+from time import time
 
-from dmcontent.errors import ContentNotFoundError
 from flask import Flask, request, redirect, session
 from flask_login import LoginManager
+from flask_session.sessions import RedisSessionInterface
 from flask_wtf.csrf import CSRFProtect
-from werkzeug.local import Local, LocalProxy
+from werkzeug.local import LocalProxy
 
-import dmapiclient
 from dmcontent.content_loader import ContentLoader
 from dmutils import init_app, formats
-from dmutils.timing import logged_duration
 from dmutils.user import User
 from govuk_frontend_jinja.flask_ext import init_govuk_frontend
 
 from config import configs
+from .api_client import RequestCachingDataAPIClient
+from .manifest_preloader import preload_manifests
 
 
 csrf = CSRFProtect()
-data_api_client = dmapiclient.DataAPIClient()
+data_api_client = RequestCachingDataAPIClient()
 login_manager = LoginManager()
 
-# we use our own Local for objects we explicitly want to be able to retain between requests but shouldn't
-# share a common object between concurrent threads/contexts
-_local = Local()
+# requests to these don't need a session, so it's left as it is - and for the static files, possibly not even loaded
+_SESSIONLESS_BLUEPRINTS = frozenset(('status', 'metrics'))
+_SESSIONLESS_ENDPOINTS = frozenset(('static',))
 
 # These frameworks pre-date the introduction of the edit_service_as_admin and declaration manifests.
 OLD_FRAMEWORKS_WITH_MISSING_MANIFESTS = ['g-cloud-4', 'g-cloud-5', 'g-cloud-6']
@@ -40,22 +42,102 @@ def _log_missing_manifest(application, manifest_name, framework_slug):
     )
 
 
+class _SealedContentLoader:
+    """
+    Read-only facade around a fully populated ContentLoader, safe to share between all threads/greenlets.
+
+    `ContentLoader.get_manifest` builds a brand new `ContentManifest` (with its own section and question objects) from
+    the loader's stored manifest data on every call, and dmcontent's `filter`/`summary` operations - even with
+    `inplace_allowed=True` - only ever mutate those fresh objects or shallow copies of the question data. So the
+    stored data itself can be shared, as long as nothing carries on *loading* into it, which is the one operation that
+    isn't thread safe. This class simply doesn't expose any of the loading methods.
+    """
+
+    def __init__(self, content_loader):
+        self._content_loader = content_loader
+        self._manifest_versions = {}
+        self._filter_plans = {}
+
+    def get_manifest(self, framework_slug, manifest):
+        return self._content_loader.get_manifest(framework_slug, manifest)
+
+    def get_manifest_version(self, framework_slug, manifest):
+        """
+        Return a digest of a manifest's content, which changes whenever the content does - e.g. for keying caches of
+        things derived from the manifest that may be shared between processes running different content versions.
+        """
+        key = (framework_slug, manifest)
+        if key not in self._manifest_versions:
+            # the same check get_manifest does
+            self._content_loader.get_manifest(framework_slug, manifest)
+            # ContentLoader doesn't expose the stored manifest data other than through get_manifest, which wraps it
+            self._manifest_versions[key] = sha1(json.dumps(
+                self._content_loader._content[framework_slug][manifest],
+                sort_keys=True,
+                default=lambda value: getattr(value, "source", repr(value)),  # for TemplateFields
+            ).encode("utf-8")).hexdigest()
+        return self._manifest_versions[key]
+
+    def get_filter_plan(self, framework_slug, manifest):
+        """Return the `ManifestFilterPlan` compiled from a manifest, for filtering the manifests returned for it"""
+        key = (framework_slug, manifest)
+        if key not in self._filter_plans:
+            self._filter_plans[key] = ManifestFilterPlan(self._content_loader.get_manifest(framework_slug, manifest))
+        return self._filter_plans[key]
+
+    def get_filtered_manifest(self, framework_slug, manifest, context):
+        """
+        Return a manifest filtered by `context` - as `get_manifest(framework_slug, manifest).filter(context)` would, but
+        using the manifest's precompiled filter plan
+        """
+        return self.get_filter_plan(framework_slug, manifest).filter(
+            self._content_loader.get_manifest(framework_slug, manifest),
+            context,
+        )
+
+    def get_message(self, framework_slug, block, key=None):
+        return self._content_loader.get_message(framework_slug, block, key=key)
+
+    def get_metadata(self, framework_slug, block, key=None):
+        return self._content_loader.get_metadata(framework_slug, block, key=key)
+
+
+class _SlidingRedisSessionInterface(RedisSessionInterface):
+    """
+    flask-session's redis session interface saves the session and sets its cookie on every request, whether it's
+    changed or not. This one, like Flask's own session interface, only does so when `should_set_cookie` says it should
+    - when the session has been modified, or SESSION_REFRESH_EACH_REQUEST is set.
+    """
+
+    def save_session(self, app, session, response):
+        if session and not self.should_set_cookie(app, session):
+            return
+        super().save_session(app, session, response)
+
+
 def _make_content_loader_factory(application, frameworks, initial_instance=None):
     # for testing purposes we allow an initial_instance to be provided
     primary_cl = initial_instance if initial_instance is not None else ContentLoader('app/content')
-    for framework_data in frameworks:
-        try:
-            primary_cl.load_manifest(framework_data['slug'], 'services', 'edit_service_as_admin')
-        except ContentNotFoundError:
-            _log_missing_manifest(application, "edit_service_as_admin", framework_data['slug'])
-        try:
-            primary_cl.load_manifest(framework_data['slug'], 'declaration', 'declaration')
-        except ContentNotFoundError:
-            _log_missing_manifest(application, "declaration", framework_data['slug'])
+    loaded_manifests, missing_manifests = preload_manifests(
+        primary_cl,
+        [framework_data['slug'] for framework_data in frameworks],
+        application.logger,
+        cache_dir=application.config['DM_MANIFEST_CACHE_DIR'],
+        processes=application.config['DM_MANIFEST_PRELOAD_PROCESSES'],
+    )
+    for framework_slug, manifest in missing_manifests:
+        _log_missing_manifest(application, manifest, framework_slug)
 
-    # seal primary_cl in a closure by returning a function which will only ever return an independent copy of it.
-    # this is of course only guaranteed when the initial_instance argument wasn't used.
-    return lambda: deepcopy(primary_cl)
+    # seal primary_cl in a closure by returning a function which will only ever return a read-only view of it. all
+    # threads share this one view, so there's no per-thread copy of the manifests to build or to hold in memory.
+    sealed_cl = _SealedContentLoader(primary_cl)
+    # compile the manifests' filter plans now, rather than on the first requests to use them
+    framework_lots = {
+        framework_data['slug']: [lot['slug'] for lot in framework_data.get('lots', ())] for framework_data in frameworks
+    }
+    for framework_slug, manifest in loaded_manifests:
+        sealed_cl.get_filter_plan(framework_slug, manifest).prepare_lots(framework_lots[framework_slug])
+    return lambda: sealed_cl
 
 
 def _content_loader_factory():
@@ -65,14 +147,13 @@ def _content_loader_factory():
     raise LookupError("content loader not ready yet: must be initialized & populated by create_app")
 
 
-@logged_duration(message="Spent {duration_real}s in get_content_loader")
 def get_content_loader():
-    if not hasattr(_local, "content_loader"):
-        _local.content_loader = _content_loader_factory()
-    return _local.content_loader
+    return _content_loader_factory()
 
 
 content_loader = LocalProxy(get_content_loader)
+from app.main.helpers.logged_in_users import logged_in_user_cache
+from app.main.helpers.manifests import ManifestFilterPlan
 from app.main.helpers.service import parse_document_upload_time
 
 
@@ -81,6 +162,9 @@ def create_app(config_name):
     application = Flask(__name__,
                         static_folder='static/',
                         static_url_path=configs[config_name].STATIC_URL_PATH)
+    # enforces the limits set on document upload views with `max_upload_size`
+    from .main.helpers.uploads import UploadSizeLimitedRequest
+    application.request_class = UploadSizeLimitedRequest
 
     # allow using govuk-frontend Nunjucks templates
     init_govuk_frontend(application)
@@ -92,12 +176,44 @@ def create_app(config_name):
         login_manager=login_manager,
     )
 
-    # replace placeholder _content_loader_factory with properly initialized one
+    from .main.helpers.agreements import agreements_queue_cache
+    from .main.helpers.draft_services import draft_service_counts_cache
+    from .main.helpers.frameworks import framework_catalogue
+    from .main.helpers.jobs import job_runner
+    from .main.helpers.s3_buckets import s3_bucket_pool, signed_url_cache
+    from .main.helpers.s3_listings import s3_listing_cache
+    from .main.helpers.service_diffs import service_diff_cache
+    from .main.helpers.supplier_search import supplier_search_cache
+    agreements_queue_cache.init_app(application)
+    draft_service_counts_cache.init_app(application)
+    framework_catalogue.init_app(application)
+    job_runner.init_app(application)
+    logged_in_user_cache.init_app(application)
+    s3_bucket_pool.init_app(application)
+    signed_url_cache.init_app(application)
+    s3_listing_cache.init_app(application)
+    service_diff_cache.init_app(application)
+    supplier_search_cache.init_app(application)
+
+    # load the domain suffix blacklist now, rather than making the first request to validate a domain wait for it
+    from .main.forms import NotInDomainSuffixBlacklistValidator
+    NotInDomainSuffixBlacklistValidator.load_blacklist(application)
+
+    if type(application.session_interface) is RedisSessionInterface:
+        redis_session_interface = application.session_interface
+        application.session_interface = _SlidingRedisSessionInterface(
+            redis_session_interface.redis,
+            redis_session_interface.key_prefix,
+            use_signer=redis_session_interface.use_signer,
+            permanent=redis_session_interface.permanent,
+        )
+
+    # replace placeholder _content_loader_factory with properly initialized one. fetching the frameworks through the
+    # catalogue also means it's already populated for the first request
     global _content_loader_factory
-    _content_loader_factory = _make_content_loader_factory(
-        application,
-        data_api_client.find_frameworks().get('frameworks'),
-    )
+    with application.app_context():
+        frameworks = framework_catalogue.get_frameworks(data_api_client)
+    _content_loader_factory = _make_content_loader_factory(application, frameworks)
 
     from .metrics import metrics as metrics_blueprint, gds_metrics
     from .main import main as main_blueprint
@@ -129,8 +245,20 @@ def create_app(config_name):
 
     @application.before_request
     def refresh_session():
-        session.permanent = True
-        session.modified = True
+        if request.blueprint in _SESSIONLESS_BLUEPRINTS or request.endpoint in _SESSIONLESS_ENDPOINTS:
+            return
+
+        if not session.permanent:
+            session.permanent = True
+
+        # the session's expiry is pushed back (and its cookie re-issued) only once a certain fraction of its lifetime
+        # has passed since it last was, rather than on every request
+        refreshed_at = session.get('_refreshed_at')
+        refresh_interval = (
+            application.permanent_session_lifetime.total_seconds() * application.config['DM_SESSION_REFRESH_FRACTION']
+        )
+        if refreshed_at is None or time() - refreshed_at >= refresh_interval:
+            session['_refreshed_at'] = time()
 
     application.add_template_filter(parse_document_upload_time)
 
@@ -139,4 +267,6 @@ def create_app(config_name):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.load_user(data_api_client, user_id)
+    # sessions are kept server-side (so have a `sid`) other than when the session backend is switched off for testing
+    session_id = getattr(session, "sid", None) or session.get("_id")
+    return logged_in_user_cache.get_user(user_id, session_id, lambda: User.load_user(data_api_client, user_id))
@@ -0,0 +1,97 @@
+from copy import deepcopy
+import logging
+from threading import Lock
+
+import dmapiclient
+from flask import _request_ctx_stack, current_app, has_request_context
+
+
+_request_cache_lock = Lock()
+
+
+class _RequestReadCache:
+    def __init__(self):
+        self.lock = Lock()
+        self.responses = {}
+        # bumped by each write, so a read that was under way during a write isn't cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+
+def _get_request_read_cache():
+    # kept on the request rather than flask.g, as calls made through `gather` have a copy of the request context but
+    # an app context (and so a `g`) of their own
+    request = _request_ctx_stack.top.request
+    with _request_cache_lock:
+        if not hasattr(request, "data_api_read_cache"):
+            request.data_api_read_cache = _RequestReadCache()
+        return request.data_api_read_cache
+
+
+class RequestCachingDataAPIClient(dmapiclient.DataAPIClient):
+    """
+    DataAPIClient which remembers the responses to the GET requests it makes during a request to this app, so that a
+    view (and anything it calls) fetching the same thing more than once only costs one round trip to the API. Any other
+    request made to the API forgets everything remembered, as it could have changed any of it.
+
+    Each call is handed its own copy of a remembered response, so it can be changed freely. Outside of a request, or
+    when DM_DATA_API_REQUEST_CACHE isn't set, requests are always passed straight through.
+    """
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.after_request(self._log_request_cache_stats)
+
+    @staticmethod
+    def _log_request_cache_stats(response):
+        if not has_request_context():
+            return response
+        cache = getattr(_request_ctx_stack.top.request, "data_api_read_cache", None)
+        if cache is not None and (cache.hits or cache.misses):
+            current_app.logger.log(
+                logging.INFO if cache.hits else logging.DEBUG,
+                "Data API reads: {api_cache_hits} served from the request cache, {api_cache_misses} made",
+                extra={
+                    "api_cache_hits": cache.hits,
+                    "api_cache_misses": cache.misses,
+                    "api_cache_writes": cache.writes,
+                },
+            )
+        return response
+
+    def _request(self, method, url, data=None, params=None, *, client_wait_for_response: bool = True):
+        if not (has_request_context() and current_app.config.get("DM_DATA_API_REQUEST_CACHE")):
+            return super()._request(
+                method, url, data=data, params=params, client_wait_for_response=client_wait_for_response
+            )
+
+        cache = _get_request_read_cache()
+        if method != "GET":
+            try:
+                return super()._request(
+                    method, url, data=data, params=params, client_wait_for_response=client_wait_for_response
+                )
+            finally:
+                # even a write that failed (or whose response we didn't wait for) may have changed something
+                with cache.lock:
+                    cache.responses.clear()
+                    cache.generation += 1
+                    cache.writes += 1
+
+        key = self._build_url(url, params)
+        with cache.lock:
+            if key in cache.responses:
+                cache.hits += 1
+                return deepcopy(cache.responses[key])
+            generation = cache.generation
+
+        response = super()._request(
+            method, url, data=data, params=params, client_wait_for_response=client_wait_for_response
+        )
+        with cache.lock:
+            cache.misses += 1
+            if response is not None and cache.generation == generation:
+                cache.responses[key] = deepcopy(response)
+        return response
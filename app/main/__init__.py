@@ -7,7 +7,7 @@ public = Blueprint('public', __name__)  # Admin login not required
 
 from .views import (
     agreements, communications, outcomes, search, service_updates,
-    services, suppliers, stats, users, buyers, admin_manager
+    services, suppliers, stats, users, buyers, admin_manager, jobs
 )
 from app.main import errors
 
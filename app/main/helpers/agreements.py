@@ -0,0 +1,118 @@
+from bisect import bisect_right, insort
+from threading import Lock
+from time import monotonic
+
+
+class AgreementsQueue:
+    """
+    Index of the suppliers on a framework who have returned their agreement, in the order `find_framework_suppliers`
+    lists them, for stepping through them one after another.
+
+    Alongside the order it keeps the (sorted) positions of the suppliers with each agreement status, so that finding
+    the next supplier - with any status, or only one of a set of statuses - is a lookup and a bisection for each status
+    rather than a scan of the whole list.
+    """
+
+    def __init__(self, supplier_frameworks):
+        self._lock = Lock()
+        self._supplier_ids = []
+        self._positions = {}
+        self._statuses = []
+        self._status_positions = {}
+
+        for position, supplier_framework in enumerate(supplier_frameworks):
+            self._supplier_ids.append(supplier_framework["supplierId"])
+            self._positions[supplier_framework["supplierId"]] = position
+            self._statuses.append(supplier_framework.get("agreementStatus"))
+            self._status_positions.setdefault(supplier_framework.get("agreementStatus"), []).append(position)
+
+    def __contains__(self, supplier_id):
+        return supplier_id in self._positions
+
+    def __len__(self):
+        return len(self._supplier_ids)
+
+    def next_supplier_id(self, supplier_id, statuses=None):
+        """
+        Return the id of the supplier after `supplier_id` whose agreement has one of `statuses` (or any status if none
+        are given), or None if there isn't one. Raises KeyError if `supplier_id` isn't in the queue.
+        """
+        with self._lock:
+            position = self._positions[supplier_id]
+            if not statuses:
+                next_positions = [position + 1] if position + 1 < len(self._supplier_ids) else []
+            else:
+                next_positions = []
+                for status in statuses:
+                    status_positions = self._status_positions.get(status, ())
+                    index = bisect_right(status_positions, position)
+                    if index < len(status_positions):
+                        next_positions.append(status_positions[index])
+            return self._supplier_ids[min(next_positions)] if next_positions else None
+
+    def set_agreement_status(self, supplier_id, status):
+        with self._lock:
+            position = self._positions.get(supplier_id)
+            if position is None:
+                return
+            old_status_positions = self._status_positions[self._statuses[position]]
+            del old_status_positions[bisect_right(old_status_positions, position) - 1]
+            self._statuses[position] = status
+            insort(self._status_positions.setdefault(status, []), position)
+
+
+class AgreementsQueueCache:
+    """
+    Process-wide cache of the `AgreementsQueue` for each framework, so that each step through the countersigning queue
+    doesn't need the framework's whole list of suppliers fetching from the API.
+
+    Agreement status changes made through this app - including uploading or removing a countersigned agreement - should
+    be reported with `set_agreement_status`, which updates any cached queue in place. Queues are refetched `ttl`
+    seconds after they were fetched to pick up anything else - new agreements, or changes made by other processes - and
+    when asked about a supplier they don't know of. A `ttl` of 0 disables caching altogether.
+    """
+
+    def __init__(self, ttl=0, clock=monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = Lock()
+        self._queues = {}
+
+    def init_app(self, app):
+        self.ttl = app.config['DM_AGREEMENTS_QUEUE_TTL']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._queues.clear()
+
+    def _fetch_queue(self, framework_slug, fetch_supplier_frameworks):
+        fetched_at, queue = self._clock(), AgreementsQueue(fetch_supplier_frameworks())
+        if self.ttl:
+            with self._lock:
+                self._queues[framework_slug] = (fetched_at, queue)
+        return queue
+
+    def next_supplier_id(self, framework_slug, supplier_id, statuses, fetch_supplier_frameworks):
+        """
+        Return the id of the supplier after `supplier_id` in `framework_slug`'s queue whose agreement has one of
+        `statuses` (or any status if none are given), or None if there isn't one, calling `fetch_supplier_frameworks` -
+        which should return the framework's supplier frameworks with returned agreements, in order - to build the queue
+        if necessary. Raises KeyError if `supplier_id` isn't in the queue.
+        """
+        with self._lock:
+            fetched_at, queue = self._queues.get(framework_slug, (None, None))
+        if queue is None or not self.ttl or self._clock() - fetched_at >= self.ttl or supplier_id not in queue:
+            # a supplier we don't know of might have returned their agreement since we fetched the queue
+            queue = self._fetch_queue(framework_slug, fetch_supplier_frameworks)
+
+        return queue.next_supplier_id(supplier_id, statuses)
+
+    def set_agreement_status(self, framework_slug, supplier_id, status):
+        with self._lock:
+            _, queue = self._queues.get(framework_slug, (None, None))
+        if queue is not None:
+            queue.set_agreement_status(supplier_id, status)
+
+
+agreements_queue_cache = AgreementsQueueCache()
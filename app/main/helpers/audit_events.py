@@ -0,0 +1,109 @@
+from dmapiclient.audit import AuditTypes
+
+from .concurrency import prefetch
+
+
+# pages of audit events fetched ahead of the one being summarised
+PREFETCH_PAGES = 1
+
+
+def iter_audit_event_pages(client, **kwargs):
+    """
+    Yield successive pages (lists) of the audit events found by `client.find_audit_events(**kwargs)`, following the
+    response's `next` link by page number until there isn't one.
+    """
+    page = 1
+    while True:
+        response = client.find_audit_events(page=page, **kwargs)
+        yield response["auditEvents"]
+        if not response["links"].get("next"):
+            return
+        page += 1
+
+
+class ServiceUpdatesSummary:
+    """
+    Summary of a service's unacknowledged update audit events, built up one event at a time as pages of them arrive.
+
+    `latest_events` holds the events walked from the newest backwards. If the walk was cut short, `oldest_events` holds
+    those from the oldest page of events (newest first, so the oldest event of all is always `oldest_events[-1]`) and
+    `complete` is only True if the two could be joined up - in which case `all_events` is every one of them.
+    """
+
+    def __init__(self):
+        self.latest_events = []
+        self.oldest_events = []
+        self.editors = set()
+        self.complete = False
+        self._event_ids = set()
+
+    def _add(self, events, audit_event):
+        if audit_event["id"] in self._event_ids:
+            # a page shifted under us as a new edit was made, or the oldest page overlaps those we've walked
+            return False
+        self._event_ids.add(audit_event["id"])
+        self.editors.add(audit_event["user"])
+        events.append(audit_event)
+        return True
+
+    def add_latest(self, audit_event):
+        self._add(self.latest_events, audit_event)
+
+    def add_oldest_page(self, audit_events):
+        """Add a page of the oldest events, ordered oldest first as the API returns them when not `latest_first`"""
+        older_events = []
+        for audit_event in audit_events:
+            if not self._add(older_events, audit_event):
+                # this page reaches back into the events we've already walked, so we've now seen all of them
+                self.complete = True
+        self.oldest_events = older_events[::-1]
+
+    def finish(self):
+        self.complete = True
+
+    @property
+    def all_events(self):
+        """All of the events, newest first, or None if we haven't been able to see them all"""
+        if not self.complete:
+            return None
+        return tuple(self.latest_events + self.oldest_events)
+
+    @property
+    def oldest_archived_service_id(self):
+        """The id of the archived service the oldest of the events was an edit of"""
+        events = self.all_events or self.oldest_events
+        return events[-1]["data"]["oldArchivedServiceId"] if events else None
+
+
+def summarise_service_updates(client, service_id, max_events):
+    """
+    Walk a service's unacknowledged update audit events from the newest backwards, fetching the next page in the
+    background while the current one is summarised, returning a `ServiceUpdatesSummary`.
+
+    Walking stops after the page which takes the number of events to `max_events` or more, after which the oldest page
+    is fetched instead so the summary still knows which archived service the edits started from.
+    """
+    request_kwargs = {
+        "object_id": service_id,
+        "object_type": "services",
+        "audit_type": AuditTypes.update_service,
+        "acknowledged": "false",
+    }
+    summary = ServiceUpdatesSummary()
+
+    pages = prefetch(iter_audit_event_pages(client, latest_first="true", **request_kwargs), buffer_size=PREFETCH_PAGES)
+    try:
+        for page in pages:
+            for audit_event in page:
+                summary.add_latest(audit_event)
+            if len(summary.latest_events) >= max_events:
+                break
+        else:
+            summary.finish()
+    finally:
+        pages.close()
+
+    if not summary.complete:
+        summary.add_oldest_page(client.find_audit_events(latest_first="false", page=1, **request_kwargs)["auditEvents"])
+
+    return summary
@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full, Queue
+from threading import Event, Lock, Thread, current_thread
+
+from flask import _request_ctx_stack, current_app, has_request_context
+
+
+_GATHER_THREAD_NAME_PREFIX = "api-gather"
+_PREFETCH_THREAD_NAME = "api-prefetch"
+
+# how often (in seconds) a prefetching thread waiting on a full buffer checks whether it's been abandoned
+_PREFETCH_POLL_INTERVAL = 0.5
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config["DM_API_GATHER_MAX_WORKERS"],
+                thread_name_prefix=_GATHER_THREAD_NAME_PREFIX,
+            )
+        return _executor
+
+
+def _in_current_context(call):
+    if has_request_context():
+        top = _request_ctx_stack.top
+        context = top.copy()
+        # RequestContext.copy doesn't carry the session across, which would otherwise be loaded afresh (possibly from
+        # redis) for each call
+        context.session = top.session
+    else:
+        context = current_app.app_context()
+
+    def wrapper():
+        with context:
+            return call()
+
+    return wrapper
+
+
+def gather(*calls):
+    """
+    Make a number of independent (blocking) calls concurrently, returning a list of their results in the order the
+    calls were given. Intended for fanning out data API reads in a view, e.g.::
+
+        supplier, framework = gather(
+            partial(data_api_client.get_supplier, supplier_id),
+            partial(data_api_client.get_framework, framework_slug),
+        )
+
+    so that the view waits for the slowest of the calls rather than the sum of them.
+
+    Each call is run with a copy of the current request (or app) context, so API requests still carry the request's
+    tracing headers. If any of the calls raise, the exception raised by the *first* of them (in argument order) is
+    re-raised here - the same one that would have propagated had the calls been made one after the other.
+
+    Popping a copied request context closes the request's uploaded files, so this shouldn't be used while handling a
+    file upload.
+    """
+    if len(calls) < 2 or current_thread().name.startswith(_GATHER_THREAD_NAME_PREFIX):
+        # nothing to gain from the pool - and calling gather from inside a gathered call could deadlock it
+        return [call() for call in calls]
+
+    executor = _get_executor()
+    futures = [executor.submit(_in_current_context(call)) for call in calls]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        # if we're bailing out early, don't bother starting calls whose results will never be looked at
+        for future in futures:
+            future.cancel()
+
+
+def prefetch(iterable, buffer_size):
+    """
+    Iterate over `iterable` in a background thread, keeping up to `buffer_size` of its items ready to be yielded. Meant
+    for overlapping the fetching of the next page of a paginated `find_..._iter` call with the processing of the current
+    one, e.g. while streaming a CSV::
+
+        for user in prefetch(data_api_client.find_users_iter(role="buyer"), buffer_size=100):
+            ...
+
+    Exceptions raised while iterating are re-raised here, after the items yielded before them. Nothing is started
+    until the first item is asked for, at which point the iteration is run with a copy of the current request (or app)
+    context - so when streaming a response this should be used inside `stream_with_context`. The background thread
+    gives up if the items stop being consumed (e.g. the client went away) and this generator is closed.
+    """
+    queue = Queue(maxsize=buffer_size)
+    abandoned = Event()
+
+    def put(entry):
+        while not abandoned.is_set():
+            try:
+                queue.put(entry, timeout=_PREFETCH_POLL_INTERVAL)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except Exception as e:
+            put((False, e))
+        else:
+            put((False, None))
+
+    Thread(target=_in_current_context(produce), name=_PREFETCH_THREAD_NAME, daemon=True).start()
+    try:
+        while True:
+            is_item, value = queue.get()
+            if is_item:
+                yield value
+            elif value is None:
+                return
+            else:
+                raise value
+    finally:
+        abandoned.set()
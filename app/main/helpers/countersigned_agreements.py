@@ -0,0 +1,244 @@
+from functools import partial
+from io import BytesIO
+import os
+import posixpath
+import re
+from tempfile import TemporaryDirectory
+from threading import Lock
+from zipfile import BadZipFile, ZipFile
+
+from botocore.exceptions import BotoCoreError, ClientError
+from dmapiclient import APIError
+from dmapiclient.audit import AuditTypes
+from dmutils.documents import (
+    COUNTERPART_FILENAME,
+    extension_matches_possible_file_formats, get_extension,
+    generate_timestamped_document_upload_path, generate_download_filename,
+)
+from flask import current_app
+
+from .agreements import agreements_queue_cache
+from .jobs import Job, job_runner
+from .s3_buckets import get_bucket, signed_url_cache
+
+
+BULK_COUNTERSIGNED_AGREEMENT_UPLOAD_JOB_NAME = "bulk-countersigned-agreement-upload"
+
+NO_SUPPLIER_ID_ERROR = "File name doesn’t start with a supplier ID"
+DUPLICATE_SUPPLIER_ID_ERROR = "More than one file was uploaded for supplier {supplier_id}"
+NOT_PDF_ERROR = "File is not a PDF"
+NOT_ZIP_ERROR = "File is not a valid zip file"
+TOO_BIG_ERROR = "File is bigger than {max_size_mb}MB"
+TOO_MANY_FILES_IN_ZIP_ERROR = "Zip file has more than {max_files} files in it"
+ZIP_CONTENTS_TOO_BIG_ERROR = "Zip file's contents add up to more than {max_size_mb}MB"
+NOT_ON_FRAMEWORK_ERROR = "Supplier {supplier_id} is not on the framework or has not signed its agreement"
+
+# a file's name must start with the id of the supplier whose countersigned agreement it is, e.g. "123456.pdf" or
+# "123456-countersigned-agreement.pdf"
+_SUPPLIER_ID_FILENAME_PATTERN = re.compile(r"(\d+)(?!\d)")
+
+# uploaded files are copied to disk this much at a time
+_COPY_CHUNK_SIZE = 64 * 1024
+
+# limits on what will be copied out of an upload, so that a (possibly malicious) zip file can't fill the disk
+_MAX_FILE_SIZE = 20 * 1024 * 1024
+_MAX_ZIP_FILES = 1000
+_MAX_ZIP_CONTENTS_SIZE = 1024 * 1024 * 1024
+
+
+def upload_countersigned_agreement(
+    client, bucket, supplier_id, framework_slug, supplier_framework, the_file, user_email, user_id, retry=None,
+):
+    """
+    Save `the_file` as the countersigned agreement for `supplier_framework` (the supplier's interest in the framework),
+    approving the agreement for countersignature first if it hasn't been, and return the path it was saved to. The
+    data API calls are made through `retry` if it's given (such as a job's `retry_transient`).
+    """
+    call = retry or (lambda call: call())
+    agreement_id = supplier_framework['agreementId']
+
+    supplier_name = supplier_framework.get('declaration', {}).get('nameOfOrganisation')
+    if not supplier_name:
+        supplier_name = call(partial(client.get_supplier, supplier_id))['suppliers']['name']
+    if supplier_framework['agreementStatus'] not in ['approved', 'countersigned']:
+        call(partial(client.approve_agreement_for_countersignature, agreement_id, user_email, user_id))
+
+    path = generate_timestamped_document_upload_path(
+        framework_slug, supplier_id, 'agreements', COUNTERPART_FILENAME
+    )
+    download_filename = generate_download_filename(supplier_id, COUNTERPART_FILENAME, supplier_name)
+    bucket.save(
+        path, the_file, acl='bucket-owner-full-control', move_prefix=None, download_filename=download_filename
+    )
+    signed_url_cache.forget(current_app.config['DM_AGREEMENTS_BUCKET'], path)
+
+    call(partial(client.update_framework_agreement, agreement_id, {"countersignedAgreementPath": path}, user_email))
+    call(partial(
+        client.create_audit_event,
+        audit_type=AuditTypes.upload_countersigned_agreement,
+        user=user_email,
+        object_type='suppliers',
+        object_id=supplier_id,
+        data={'upload_countersigned_agreement': path},
+    ))
+    return path
+
+
+class BulkCountersignedAgreementUpload:
+    """
+    Upload countersigned agreements for many of a framework's suppliers at once, from a number of PDFs (and/or zip files
+    of them) each named after the id of the supplier it's for.
+
+    Files are added with `add_file` and `add_zip_file`, which copy them a chunk at a time to a temporary directory (so
+    that the upload can carry on after the request handing them over has finished, without holding the files in
+    memory or open), and reject any that can't be matched to a supplier, aren't PDFs or are too big. `start` then
+    uploads them as a background job, the suppliers' uploads being made concurrently on the job runner's own pool (see
+    `Job.gather`) rather than the `gather` pool that views share. One supplier's upload failing doesn't stop the others
+    - the error is recorded against the file in the job's `errors`, and the job's result reports how each file went.
+    """
+
+    def __init__(self, client, framework_slug, user_email, user_id):
+        self.framework_slug = framework_slug
+        self.rejected = {}
+
+        self._client = client
+        self._user_email = user_email
+        self._user_id = user_id
+        self._directory = TemporaryDirectory(prefix="countersigned-agreements-")
+        self._files = {}
+        self._lock = Lock()
+        self._uploaded = {}
+        self._failed = {}
+
+    @property
+    def supplier_ids(self):
+        return tuple(sorted(self._files))
+
+    def add_file(self, filename, file_):
+        """Add `file_` (named `filename`) to be uploaded, unless it's rejected"""
+        filename = posixpath.basename(filename.replace("\\", "/"))
+        match = _SUPPLIER_ID_FILENAME_PATTERN.match(filename)
+        if not match:
+            self.rejected[filename] = NO_SUPPLIER_ID_ERROR
+            return
+        supplier_id = int(match.group(1))
+        if supplier_id in self._files:
+            self.rejected[filename] = DUPLICATE_SUPPLIER_ID_ERROR.format(supplier_id=supplier_id)
+            return
+
+        if get_extension(filename) != ".pdf":
+            self.rejected[filename] = NOT_PDF_ERROR
+            return
+        # the file's type is checked from its first few bytes, before anything is copied
+        chunk = file_.read(_COPY_CHUNK_SIZE)
+        if not extension_matches_possible_file_formats(BytesIO(chunk), ".pdf"):
+            self.rejected[filename] = NOT_PDF_ERROR
+            return
+
+        path = os.path.join(self._directory.name, "{}.pdf".format(supplier_id))
+        size = 0
+        with open(path, "wb") as copy:
+            while chunk:
+                size += len(chunk)
+                if size > _MAX_FILE_SIZE:
+                    break
+                copy.write(chunk)
+                chunk = file_.read(_COPY_CHUNK_SIZE)
+        if size > _MAX_FILE_SIZE:
+            os.remove(path)
+            self.rejected[filename] = TOO_BIG_ERROR.format(max_size_mb=_MAX_FILE_SIZE // (1024 * 1024))
+            return
+
+        self._files[supplier_id] = (filename, path)
+
+    def add_zip_file(self, filename, file_):
+        """Add each of the files in the zip file `file_` (named `filename`) to be uploaded"""
+        try:
+            zip_file = ZipFile(file_)
+        except BadZipFile:
+            self.rejected[filename] = NOT_ZIP_ERROR
+            return
+
+        with zip_file:
+            # skip directories, and the metadata some archivers add alongside the files
+            members = [
+                member for member in zip_file.infolist()
+                if not member.is_dir()
+                and not member.filename.startswith("__MACOSX/")
+                and not posixpath.basename(member.filename).startswith(".")
+            ]
+            # the sizes a zip file gives for its contents can't be trusted to be small, but can be trusted not to be
+            # exceeded - they're what `ZipFile.open` stops decompressing at
+            if len(members) > _MAX_ZIP_FILES:
+                self.rejected[filename] = TOO_MANY_FILES_IN_ZIP_ERROR.format(max_files=_MAX_ZIP_FILES)
+                return
+            if sum(member.file_size for member in members) > _MAX_ZIP_CONTENTS_SIZE:
+                self.rejected[filename] = ZIP_CONTENTS_TOO_BIG_ERROR.format(
+                    max_size_mb=_MAX_ZIP_CONTENTS_SIZE // (1024 * 1024),
+                )
+                return
+
+            for member in members:
+                with zip_file.open(member) as member_file:
+                    self.add_file(posixpath.basename(member.filename), member_file)
+
+    def _upload(self, supplier_id, job):
+        filename, file_path = self._files[supplier_id]
+        error = None
+        try:
+            supplier_framework = job.retry_transient(partial(
+                self._client.get_supplier_framework_info, supplier_id, self.framework_slug,
+            ))['frameworkInterest']
+            if not supplier_framework['onFramework'] or supplier_framework['agreementStatus'] in (None, 'draft'):
+                error = NOT_ON_FRAMEWORK_ERROR.format(supplier_id=supplier_id)
+            else:
+                with open(file_path, "rb") as the_file:
+                    path = upload_countersigned_agreement(
+                        self._client,
+                        get_bucket(current_app.config['DM_AGREEMENTS_BUCKET']),
+                        supplier_id,
+                        self.framework_slug,
+                        supplier_framework,
+                        the_file,
+                        self._user_email,
+                        self._user_id,
+                        retry=job.retry_transient,
+                    )
+                agreements_queue_cache.set_agreement_status(self.framework_slug, supplier_id, "countersigned")
+        except APIError as e:
+            error = e.message
+        except (BotoCoreError, ClientError) as e:
+            error = str(e)
+        finally:
+            os.remove(file_path)
+
+        with self._lock:
+            if error is None:
+                self._uploaded[supplier_id] = {"filename": filename, "path": path}
+            else:
+                current_app.logger.warning(
+                    "Failed to upload countersigned agreement for supplier {supplier_id} on {framework_slug}: {error}",
+                    extra={"supplier_id": supplier_id, "framework_slug": self.framework_slug, "error": error},
+                )
+                self._failed[supplier_id] = {"filename": filename, "error": error}
+        job.advance(filename, error)
+
+    def run(self, job):
+        """Upload the files, reporting progress through `job` and returning a report of how each went"""
+        try:
+            job.gather(*(partial(self._upload, supplier_id, job) for supplier_id in self.supplier_ids))
+        finally:
+            self._directory.cleanup()
+        return {
+            "frameworkSlug": self.framework_slug,
+            "uploaded": {str(supplier_id): outcome for supplier_id, outcome in sorted(self._uploaded.items())},
+            "failed": {str(supplier_id): outcome for supplier_id, outcome in sorted(self._failed.items())},
+            "rejected": dict(sorted(self.rejected.items())),
+        }
+
+    def start(self):
+        """Run the upload as a background job, returning the `Job`"""
+        return job_runner.submit(
+            Job(BULK_COUNTERSIGNED_AGREEMENT_UPLOAD_JOB_NAME, roles=("admin-ccs-sourcing",), total=len(self._files)),
+            self.run,
+        )
@@ -1,5 +1,6 @@
 import difflib
 from itertools import chain
+import re
 
 from dmcontent.questions import Multiquestion
 from flask import Markup, render_template
@@ -31,15 +32,14 @@ def html_diff_tables_from_sections_iter(
         revision_2,
         table_preamble_template=None,
 ):
-    html_diff = difflib.HtmlDiff()
-
     for section in sections:
         for question in chain.from_iterable(_question_iter(question) for question in section['questions']):
             q1, q2 = (r.get(question['id'], []) for r in (revision_1, revision_2,))
             if q1 != q2:
                 q1, q2 = (_get_value_for_difflib(q) for q in (q1, q2,))
-                yield section.slug, question.id, Markup(_clean_difflib_html_table(
-                    html_diff.make_table(q1, q2),
+                yield section.slug, question.id, Markup(_render_diff_table(
+                    q1,
+                    q2,
                     table_preamble_template=table_preamble_template,
                     table_preamble_context={
                         "section": section,
@@ -57,83 +57,92 @@ def _get_value_for_difflib(thing):
         return thing
 
 
-def _strip_nbsp(content):
-    return content.replace(u"\u00a0", u" ")
-
-
-def _strip_element_nbsp(element):
-    element.text = element.text and _strip_nbsp(element.text)
-    element.tail = element.tail and _strip_nbsp(element.tail)
-    for child_element in element:
-        _strip_element_nbsp(child_element)
-
-
-def _clean_difflib_html_table(table_src, table_preamble_template=None, table_preamble_context={}):
-    # difflib doesn't produce html *quite* how we would like, so we do the admittedly slightly strange thing here of
-    # parsing it, modifying the result in-place and re-serializing it for rendering. this is, in my opinion, the least-
-    # worst thing to do, because it allows us to take advantage of the (well tested) logic of difflib.HtmlDiff while
-    # just adding relatively simple style-mangling code of our own.
-    #
-    # another (perhaps more obvious) alternative to this would have been to adapt our stytles to difflib's output,
-    # but... frankly our style scheme for this is more well thought out and, more importantly, already cross-browser
-    # tested.
-    table_element = html.fragment_fromstring(table_src)
-
-    # colgroups not wanted
-    for colgroup in table_element.xpath(".//colgroup"):
-        colgroup.getparent().remove(colgroup)
-
-    # column of links not wanted
-    for diff_next in table_element.xpath(".//td[@class='diff_next']"):
-        diff_next.getparent().remove(diff_next)
-
-    # this isn't even valid html5 anymore
-    for td_nowrap in table_element.xpath(".//td[@nowrap]"):
-        del td_nowrap.attrib["nowrap"]
-
-    for key in table_element.keys():
-        del table_element.attrib[key]
-
-    # we can't really safely use ids (who knows if we're going to use >1 of these in a page?)
-    for element in table_element.xpath(".//*[@id]"):
-        del element.attrib["id"]
-
-    # difflib very helpfully replaces all our spaces with nbsp, which is not something we want
-    _strip_element_nbsp(table_element.xpath("./tbody")[0])
-
-    for line_number_td in table_element.xpath(".//td[@class='diff_header']"):
-        line_number_td.attrib["class"] = "line-number"
-
-    for tr in table_element.xpath("./tbody/tr"):
-        tr[0].attrib["class"] = tr[2].attrib["class"] = "line-number"
-        tr[1].attrib["class"] = tr[3].attrib["class"] = "line-content"
-
-        if (tr[0].text or "").strip() or len(tr[0]):  # i.e. left side has what is presumably a line number
-            if len(tr[1]):  # i.e. left side is interesting because the content has (presumably span.diff_*) child elems
-                tr[0].attrib["class"] += " line-number-removal"
-                tr[1].attrib["class"] += " removal"
-                for span in tr[1].xpath("./span[@class='diff_sub' or @class='diff_chg']"):
-                    span.tag = "del"
-                    del span.attrib["class"]
-        else:
-            tr[0].attrib["class"] += " line-non-existent"
-            tr[1].attrib["class"] += " line-non-existent"
-
-        if (tr[2].text or "").strip() or len(tr[2]):  # i.e. right side has what is presumably a line number
-            if len(tr[3]):  # i.e. right side's interesting because the content has (presumably span.diff_*) child elems
-                tr[2].attrib["class"] += " line-number-addition"
-                tr[3].attrib["class"] += " addition"
-                for span in tr[3].xpath("./span[@class='diff_add' or @class='diff_chg']"):
-                    span.tag = "ins"
-                    del span.attrib["class"]
+# the tab size difflib.HtmlDiff uses by default
+_TAB_SIZE = 8
+
+# difflib's intraline change markers: "\0+", "\0-" or "\0^" opens a run of added, deleted or changed text and "\1"
+# closes it
+_CHANGE_MARKER_RE = re.compile("\0([-+^])(.*?)\1", re.DOTALL)
+
+# for each side of the table, the tag a marked-up run becomes. each side only gets its own kind of changes (and
+# "changed" text) marked, but should the other kind turn up it's left as difflib's span
+_CHANGE_TAGS = (
+    {"-": ("<del>", "</del>"), "^": ("<del>", "</del>"), "+": ('<span class="diff_add">', "</span>")},
+    {"+": ("<ins>", "</ins>"), "^": ("<ins>", "</ins>"), "-": ('<span class="diff_sub">', "</span>")},
+)
+_SIDE_CLASSES = (
+    (" line-number-removal", " removal"),
+    (" line-number-addition", " addition"),
+)
+
+_ROW_TEMPLATE = (
+    '<tr><td class="line-number{}">{}</td><td class="line-content{}">{}</td>'
+    '<td class="line-number{}">{}</td><td class="line-content{}">{}</td></tr>'
+)
+
+
+def _expand_tabs(line):
+    # as difflib.HtmlDiff does: tabs are expanded into runs of tab characters (so that changes between tabs and spaces
+    # still register as changes), which end up being displayed as spaces
+    return line.replace(" ", "\0").expandtabs(_TAB_SIZE).replace(" ", "\t").replace("\0", " ").rstrip("\n")
+
+
+def _line_html(side, text):
+    """
+    Return the markup for a line of diffed `text` from `side` (0 for the old revision, 1 for the new) and whether it
+    has any changes marked up in it
+    """
+    text = text.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+    # difflib right-strips the line after having made its spaces non-breaking, so only *other* trailing whitespace
+    # (including expanded tabs) goes, and we keep that behaviour. "\2" stands in for a space while we do so.
+    text = text.replace(" ", "\2").rstrip().replace("\2", " ").replace("\t", " ").replace("\u00a0", " ")
+
+    tags = _CHANGE_TAGS[side]
+    text, change_count = _CHANGE_MARKER_RE.subn(
+        lambda match: "{1}{0}{2}".format(match.group(2), *tags[match.group(1)]),
+        text,
+    )
+    return text, bool(change_count)
+
+
+def _row_html(from_line, to_line):
+    cells = []
+    for side, (line_number, text) in enumerate((from_line, to_line)):
+        content, has_changes = _line_html(side, text)
+        line_number = "{}".format(line_number)
+        if line_number.strip():
+            number_class, content_class = _SIDE_CLASSES[side] if has_changes else ("", "")
         else:
-            tr[2].attrib["class"] += " line-non-existent"
-            tr[3].attrib["class"] += " line-non-existent"
-
+            number_class = content_class = " line-non-existent"
+        cells.extend((number_class, line_number, content_class, content))
+    return _ROW_TEMPLATE.format(*cells)
+
+
+def _render_diff_table(lines_1, lines_2, table_preamble_template=None, table_preamble_context={}):
+    # builds the same markup we used to get by having difflib.HtmlDiff make a table and then parsing it and cleaning it
+    # up to suit our styles, but directly from the side-by-side line pairings difflib's HtmlDiff is itself built on
+    rows = [
+        _row_html(from_line, to_line)
+        for from_line, to_line, _ in difflib._mdiff(
+            [_expand_tabs(line) for line in lines_1],
+            [_expand_tabs(line) for line in lines_2],
+            charjunk=difflib.IS_CHARACTER_JUNK,
+        )
+    ] or [
+        # what HtmlDiff shows when there are no lines on either side
+        _ROW_TEMPLATE.format(*(" line-non-existent", "", " line-non-existent", " Empty File ") * 2)
+    ]
+
+    preamble = ""
     if table_preamble_template:
-        preamble_src = render_template(table_preamble_template, **table_preamble_context)
-        preamble_elements = html.fragments_fromstring(preamble_src)
-        for element in reversed(preamble_elements):
-            table_element.insert(0, element)
-
-    return html.tostring(table_element, encoding="unicode")
+        preamble = "".join(
+            html.tostring(element, encoding="unicode")
+            for element in html.fragments_fromstring(
+                render_template(table_preamble_template, **table_preamble_context)
+            )
+        )
+
+    return "<table>\n        {}<tbody>\n            {}\n        </tbody>\n    </table>".format(
+        preamble,
+        "\n            ".join(rows),
+    )
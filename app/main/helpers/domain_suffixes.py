@@ -0,0 +1,59 @@
+from pathlib import Path
+import typing
+
+
+def _reversed_labels(domain: str) -> typing.Tuple[str, ...]:
+    # all the domains and suffixes we deal with implicitly begin with a separator, so one given explicitly is ignored
+    domain = domain.strip().lower()
+    return tuple(reversed((domain[1:] if domain.startswith(".") else domain).split(".")))
+
+
+class DomainSuffixBlacklist:
+    """
+    An immutable index of a list of domain suffixes, for checking whether a domain is (or is a suffix of) one of them.
+
+    Each suffix is indexed by its labels in reverse order ("org.uk" as `("uk", "org")`), along with every sequence of
+    labels it starts with. So checking a domain is a single lookup of its reversed labels, whichever kind of match is
+    wanted, and labels can only ever match whole labels. Once built it's never changed, so can be shared freely between
+    threads.
+    """
+
+    def __init__(self, suffixes: typing.Iterable[str]):
+        # the suffixes, presented as they are in messages (".org.uk"), sorted in the order of their reversed forms - so
+        # the suffix reported for a domain matching several is always the same one
+        sorted_suffixes = sorted(
+            {suffix.strip().lower().lstrip(".") for suffix in suffixes if suffix.strip()},
+            key=lambda suffix: ("." + suffix)[::-1],
+        )
+
+        self._suffixes = frozenset(_reversed_labels(suffix) for suffix in sorted_suffixes)
+        self._first_suffix_starting_with = {}
+        for suffix in sorted_suffixes:
+            labels = _reversed_labels(suffix)
+            for i in range(1, len(labels) + 1):
+                self._first_suffix_starting_with.setdefault(labels[:i], "." + suffix)
+
+    @classmethod
+    def from_directory(cls, directory: Path) -> "DomainSuffixBlacklist":
+        """Build a blacklist of the suffixes in all the files in `directory`, one suffix per line"""
+        suffixes = []
+        for filepath in sorted(directory.iterdir()):
+            if filepath.is_file():
+                with filepath.open("r", encoding="utf-8") as f:
+                    suffixes.extend(f)
+        return cls(suffixes)
+
+    def __len__(self) -> int:
+        return len(self._suffixes)
+
+    def match(self, domain: str, exact: bool = False) -> typing.Optional[str]:
+        """
+        Return the blacklisted suffix `domain` matches, or None if it doesn't match any.
+
+        By default `domain` matches any suffix ending with it, so "uk" matches ".org.uk" as well as ".uk" - if `exact`
+        is set it only matches the suffix it is.
+        """
+        labels = _reversed_labels(domain)
+        if exact:
+            return "." + ".".join(reversed(labels)) if labels in self._suffixes else None
+        return self._first_suffix_starting_with.get(labels)
@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from threading import Lock
+
+from dmcontent.questions import List, Pricing, Question
+
+
+_EMPTY_VALUES = ('', [], None,)
+
+_MISSING = object()
+
+# the manifest used to lay out (and so count the unanswered questions of) draft services
+DRAFT_SERVICES_MANIFEST = "edit_service_as_admin"
+
+# compiled indexes, keyed on framework, manifest version and lot. there are few enough of these, and they change rarely
+# enough, that they aren't worth bounding
+_indexes = {}
+_indexes_lock = Lock()
+
+
+def _compile_answer_required(question):
+    # each of these mirrors the `answer_required` of the summary dmcontent would build for the question, for the types
+    # of question simple enough to make that worthwhile
+    question_id = question.id
+    if type(question) is Pricing:
+        price_fields = tuple(question.fields.get(key) for key in ("price", "minimum_price", "maximum_price"))
+        return lambda draft_service: not any(draft_service.get(field) for field in price_fields)
+
+    if type(question) in (Question, List):
+        if type(question) is List and question.get("before_summary_value"):
+            return lambda draft_service: False
+
+        if question.has_assurance():
+            def get_value(draft_service):
+                return draft_service.get(question_id, {}).get("value", "")
+        else:
+            def get_value(draft_service):
+                return draft_service.get(question_id, "")
+
+        if type(question) is Question and question.get("type") == "number" and question.get("unit"):
+            # any value but an empty string gets the unit added to it
+            return lambda draft_service: get_value(draft_service) == ""
+        return lambda draft_service: get_value(draft_service) in _EMPTY_VALUES
+
+    def answer_required(draft_service):
+        filtered_question = question.filter(draft_service)
+        return filtered_question is not None and filtered_question.summary(draft_service).answer_required
+
+    return answer_required
+
+
+class RequiredQuestionsIndex:
+    """
+    The questions in a manifest that draft services of a particular lot have to answer, precompiled for counting how
+    many of them a draft hasn't - the first number `dmcontent.utils.count_unanswered_questions` would give for the
+    draft's filtered summary - without building a filtered manifest and summary of every question for each draft.
+
+    Questions depending on the lot are resolved up front. The answers to simpler questions are checked directly in the
+    draft's data, while the rest (multiquestions, dates, checkbox trees...) are filtered and summarised by themselves,
+    just as they would have been as part of the whole manifest.
+    """
+
+    def __init__(self, manifest, lot=_MISSING):
+        self._questions = []
+        for section in manifest:
+            for question in section.questions:
+                if question.get("optional"):
+                    continue
+
+                depends = []
+                for question_depends in question.get("depends", ()):
+                    if question_depends["on"] != "lot":
+                        depends.append((question_depends["on"], tuple(question_depends["being"])))
+                    elif lot is _MISSING or lot not in question_depends["being"]:
+                        break
+                else:
+                    self._questions.append((tuple(depends), _compile_answer_required(question)))
+
+    def count_unanswered(self, draft_service):
+        return sum(
+            1 for depends, answer_required in self._questions
+            if all(key in draft_service and draft_service[key] in being for key, being in depends)
+            and answer_required(draft_service)
+        )
+
+
+def get_required_questions_index(content_loader, framework_slug, lot=_MISSING):
+    """Return the `RequiredQuestionsIndex` of `framework_slug`'s draft services manifest for draft services of `lot`"""
+    key = (framework_slug, content_loader.get_manifest_version(framework_slug, DRAFT_SERVICES_MANIFEST), lot)
+    with _indexes_lock:
+        index = _indexes.get(key)
+    if index is None:
+        index = RequiredQuestionsIndex(content_loader.get_manifest(framework_slug, DRAFT_SERVICES_MANIFEST), lot)
+        with _indexes_lock:
+            index = _indexes.setdefault(key, index)
+    return index
+
+
+def _count_unanswered(content_loader, framework_slug, draft_services):
+    return [
+        get_required_questions_index(
+            content_loader,
+            framework_slug,
+            draft_service.get("lot", _MISSING),
+        ).count_unanswered(draft_service)
+        for draft_service in draft_services
+    ]
+
+
+def _count_unanswered_in_worker(framework_slug, draft_services):
+    # run in a process pool worker, which has been forked from an app process and so has its own (populated) copy of the
+    # content loader
+    from ... import content_loader
+    return _count_unanswered(content_loader, framework_slug, draft_services)
+
+
+class DraftServiceCountsCache:
+    """
+    Process-wide cache of the number of required questions each draft service has left unanswered, which suppliers with
+    hundreds of drafts would otherwise have to have worked out for every one of them each time their drafts are listed.
+
+    Counts are keyed on the draft's id and `updatedAt` and the version of the manifest they were counted against, so
+    any change to either simply results in a miss. The `max_size` most recently used counts are kept - a `max_size` of
+    0 disables caching. If `process_pool_size` is set, when more than `process_pool_threshold` drafts need counting
+    they're split between a pool of that many processes.
+    """
+
+    def __init__(self, max_size=0, process_pool_size=0, process_pool_threshold=0):
+        self.max_size = max_size
+        self.process_pool_size = process_pool_size
+        self.process_pool_threshold = process_pool_threshold
+        self._lock = Lock()
+        self._counts = OrderedDict()
+        self._executor = None
+
+    def init_app(self, app):
+        self.max_size = app.config['DM_DRAFT_SERVICE_COUNTS_CACHE_SIZE']
+        self.process_pool_size = app.config['DM_DRAFT_SERVICE_COUNTS_PROCESSES']
+        self.process_pool_threshold = app.config['DM_DRAFT_SERVICE_COUNTS_PROCESS_THRESHOLD']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._counts.clear()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.process_pool_size)
+            return self._executor
+
+    def _count_unanswered(self, content_loader, framework_slug, draft_services):
+        if not self.process_pool_size or len(draft_services) <= self.process_pool_threshold:
+            return _count_unanswered(content_loader, framework_slug, draft_services)
+
+        chunk_size = ceil(len(draft_services) / self.process_pool_size)
+        return [
+            count
+            for chunk_counts in self._get_executor().map(
+                _count_unanswered_in_worker,
+                (framework_slug,) * self.process_pool_size,
+                (draft_services[i:i + chunk_size] for i in range(0, len(draft_services), chunk_size)),
+            )
+            for count in chunk_counts
+        ]
+
+    def get_unanswered_required_counts(self, content_loader, framework_slug, draft_services):
+        """
+        Return a list of the number of required questions each of `draft_services` (all drafts on `framework_slug`)
+        has left unanswered. Raises `ContentNotFoundError` if there's no manifest to count them against.
+        """
+        manifest_version = content_loader.get_manifest_version(framework_slug, DRAFT_SERVICES_MANIFEST)
+        keys = [
+            (framework_slug, manifest_version, draft_service["id"], draft_service.get("updatedAt"))
+            for draft_service in draft_services
+        ]
+
+        with self._lock:
+            counts = [self._counts.get(key) if self.max_size else None for key in keys]
+
+        missing = [i for i, count in enumerate(counts) if count is None]
+        if missing:
+            for i, count in zip(missing, self._count_unanswered(
+                content_loader,
+                framework_slug,
+                [draft_services[i] for i in missing],
+            )):
+                counts[i] = count
+
+        if self.max_size:
+            with self._lock:
+                for key, count in zip(keys, counts):
+                    self._counts[key] = count
+                    self._counts.move_to_end(key)
+                while len(self._counts) > self.max_size:
+                    self._counts.popitem(last=False)
+
+        return counts
+
+
+draft_service_counts_cache = DraftServiceCountsCache()
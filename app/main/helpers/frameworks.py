@@ -1,4 +1,11 @@
-from flask import abort
+from threading import Lock, Thread
+from time import monotonic
+
+from dmapiclient import APIError
+from flask import abort, current_app
+from redis import RedisError
+
+from ...metrics import FRAMEWORK_CATALOGUE_LOOKUPS_TOTAL, FRAMEWORK_CATALOGUE_REFRESHES_TOTAL
 
 
 def get_framework_or_404(client, framework_slug, allowed_statuses=None):
@@ -11,3 +18,132 @@ def get_framework_or_404(client, framework_slug, allowed_statuses=None):
         abort(404)
 
     return framework
+
+
+class FrameworkCatalogue:
+    """
+    Process-wide cache of the list of frameworks returned by `find_frameworks`, which changes a handful of times a year
+    but is needed by most pages.
+
+    For `ttl` seconds after being fetched the cached list is served as-is. After that it's still served, but a
+    background refresh is started so that later requests pick up any changes (stale-while-revalidate). A `ttl` of 0
+    disables caching altogether and every lookup goes to the API.
+
+    `purge` only clears this process's list, unless a redis client is given as `shared_store` - then it also bumps a
+    "generation" kept in redis, which every lookup checks, so that every process's list is cleared.
+
+    The framework dicts handed out are shared between requests and must be treated as read-only.
+    """
+
+    _SHARED_GENERATION_KEY = "framework-catalogue:generation"
+
+    def __init__(self, ttl=0, clock=monotonic, shared_store=None):
+        self.ttl = ttl
+        self.shared_store = shared_store
+        self._clock = clock
+        self._lock = Lock()
+        self._frameworks = None
+        self._fetched_at = None
+        self._generation = None
+        self._refreshing = False
+
+    def init_app(self, app):
+        self.ttl = app.config['DM_FRAMEWORK_CATALOGUE_TTL']
+        self.shared_store = app.config.get('SESSION_REDIS') if app.config['DM_FRAMEWORK_CATALOGUE_SHARED'] else None
+        self._clear()
+
+    def _clear(self):
+        with self._lock:
+            self._frameworks = self._fetched_at = self._generation = None
+
+    def purge(self):
+        """Clear the list of frameworks - in every process, if there's a `shared_store`"""
+        self._clear()
+        if self.shared_store is None:
+            return
+        try:
+            self.shared_store.incr(self._SHARED_GENERATION_KEY)
+        except RedisError as e:
+            current_app.logger.warning(
+                "Failed to purge framework catalogue in shared store: {error}", extra={"error": str(e)},
+            )
+
+    def _get_generation(self):
+        if self.shared_store is None:
+            return None
+        try:
+            return self.shared_store.get(self._SHARED_GENERATION_KEY)
+        except RedisError as e:
+            current_app.logger.warning(
+                "Failed to read framework catalogue generation from shared store: {error}", extra={"error": str(e)},
+            )
+            # carry on with whatever this process has
+            with self._lock:
+                return self._generation
+
+    def _fetch(self, client, generation):
+        frameworks = tuple(client.find_frameworks()['frameworks'])
+        with self._lock:
+            self._frameworks, self._fetched_at, self._generation = frameworks, self._clock(), generation
+        return frameworks
+
+    def _refresh(self, client, app, generation):
+        try:
+            self._fetch(client, generation)
+        except APIError as e:
+            FRAMEWORK_CATALOGUE_REFRESHES_TOTAL.labels(outcome='failure').inc()
+            app.logger.warning("Failed to refresh framework catalogue: {error}", extra={"error": str(e)})
+        else:
+            FRAMEWORK_CATALOGUE_REFRESHES_TOTAL.labels(outcome='success').inc()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get_frameworks(self, client):
+        """Return a list of all frameworks, as `client.find_frameworks()['frameworks']` would."""
+        generation = self._get_generation()
+        with self._lock:
+            frameworks, fetched_at = self._frameworks, self._fetched_at
+            if generation != self._generation:
+                # purged by another process since this list was fetched
+                frameworks = None
+            start_refresh = bool(
+                self.ttl and frameworks is not None and not self._refreshing
+                and self._clock() - fetched_at >= self.ttl
+            )
+            if start_refresh:
+                self._refreshing = True
+
+        if frameworks is None or not self.ttl:
+            FRAMEWORK_CATALOGUE_LOOKUPS_TOTAL.labels(result='miss').inc()
+            return list(self._fetch(client, generation))
+
+        if start_refresh:
+            FRAMEWORK_CATALOGUE_LOOKUPS_TOTAL.labels(result='stale').inc()
+            Thread(
+                target=self._refresh,
+                args=(client, current_app._get_current_object(), generation),
+                daemon=True,
+            ).start()
+        else:
+            FRAMEWORK_CATALOGUE_LOOKUPS_TOTAL.labels(result='hit').inc()
+
+        return list(frameworks)
+
+    def get_framework(self, client, framework_slug):
+        """Return the framework with slug `framework_slug`, or None if there isn't one"""
+        return next((fw for fw in self.get_frameworks(client) if fw['slug'] == framework_slug), None)
+
+    def get_frameworks_by_family(self, client, family):
+        return [fw for fw in self.get_frameworks(client) if fw['family'] == family]
+
+    def get_latest_live_framework(self, client, family):
+        """Return the most recently live framework of `family` which is still live, or None if there isn't one"""
+        return max(
+            (fw for fw in self.get_frameworks_by_family(client, family) if fw['status'] == 'live'),
+            key=lambda fw: fw['frameworkLiveAtUTC'],
+            default=None,
+        )
+
+
+framework_catalogue = FrameworkCatalogue()
@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import json
+from threading import Lock, current_thread
+from time import sleep, time
+from uuid import uuid4
+
+from dmapiclient import APIError
+from flask import current_app
+from redis import RedisError
+
+
+_JOB_THREAD_NAME_PREFIX = "job"
+_JOB_TASK_THREAD_NAME_PREFIX = "job-task"
+
+# API errors which are worth another try, being down to the API (or something in front of it) being briefly unavailable
+# rather than anything being wrong with the request. dmapiclient reports failing to connect at all as a 503
+_TRANSIENT_API_ERROR_STATUS_CODES = frozenset((502, 503, 504))
+
+
+class Job:
+    """
+    The progress of a piece of work being done in the background by the `JobRunner`, as shown at /admin/jobs/<id>.
+
+    The work is handed the job, which it should report its progress through - `advance` as it completes each of the
+    `total` things it has to do (recording an error against any that failed), making API calls through
+    `retry_transient` and doing things concurrently through `gather`. Whatever the work returns becomes the job's
+    `result`, so should be serializable as JSON, as should `data` - anything else about the job its progress page needs
+    to show. Only users with one of `roles` can view the job.
+    """
+
+    def __init__(self, name, roles, total=None, id=None, data=None):
+        self.id = id or uuid4().hex
+        self.name = name
+        self.roles = tuple(roles)
+        self.data = data
+        self.total = total
+        self.completed = 0
+        self.errors = {}
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.updated_at = time()
+
+        self._lock = Lock()
+        self._runner = None
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "name": self.name,
+                "roles": list(self.roles),
+                "data": self.data,
+                "status": self.status,
+                "total": self.total,
+                "completed": self.completed,
+                "errors": dict(self.errors),
+                "result": self.result,
+                "error": self.error,
+                "updatedAt": self.updated_at,
+            }
+
+    def _updated(self):
+        if self._runner is not None:
+            self._runner._job_updated(self)
+
+    def _update(self, **changes):
+        with self._lock:
+            for attr, value in changes.items():
+                setattr(self, attr, value)
+            self.updated_at = time()
+        self._updated()
+
+    def advance(self, key=None, error=None):
+        """Record that one more of the job's `total` things is done - unsuccessfully, if there's an `error`"""
+        with self._lock:
+            self.completed += 1
+            if error is not None:
+                self.errors[str(key)] = error
+            self.updated_at = time()
+        self._updated()
+
+    def retry_transient(self, call):
+        """Return the result of `call`, retrying it if it raises an `APIError` that looks transient"""
+        attempts, delay = (self._runner.api_attempts, self._runner.api_retry_delay) if self._runner else (1, 0)
+        for attempt in range(1, attempts + 1):
+            try:
+                return call()
+            except APIError as e:
+                if e.status_code not in _TRANSIENT_API_ERROR_STATUS_CODES or attempt == attempts:
+                    raise
+                current_app.logger.warning(
+                    "Retrying API call for job {job_id} after attempt {attempt} failed: {error}",
+                    extra={"job_id": self.id, "attempt": attempt, "error": str(e)},
+                )
+                sleep(delay * 2 ** (attempt - 1))
+
+    def gather(self, *calls):
+        """
+        Make a number of independent calls concurrently, returning a list of their results in the order the calls were
+        given - as `concurrency.gather` does, but on the job runner's own pool of threads, so that a big job (whose
+        calls may well be sleeping between retries) doesn't hold up the views sharing the `gather` pool
+        """
+        if self._runner is None:
+            return [call() for call in calls]
+        return self._runner._gather(calls)
+
+
+class JobRunner:
+    """
+    Runs jobs in the background, in a pool of `max_workers` threads, so that requests starting long-running work can
+    return straight away and leave the user to follow its progress. A `max_workers` of 0 runs each job in the request
+    starting it.
+
+    The state of the `max_tracked_jobs` most recently started jobs is kept in this process. If a redis client is given
+    as `shared_store` it's also written to redis (with an expiry of `shared_ttl` seconds), so a job's progress can be
+    followed from any process, not just the one running it. API calls made through a job's `retry_transient` are made
+    up to `api_attempts` times, backing off exponentially from `api_retry_delay` seconds between them. Calls made
+    through a job's `gather` are shared between a further pool of `max_task_workers` threads (0 making them one after
+    the other), however many jobs are running.
+    """
+
+    _SHARED_KEY_PREFIX = "jobs"
+
+    def __init__(
+        self,
+        max_workers=0,
+        max_tracked_jobs=0,
+        shared_store=None,
+        shared_ttl=None,
+        api_attempts=1,
+        api_retry_delay=0,
+        max_task_workers=0,
+    ):
+        self.max_workers = max_workers
+        self.max_task_workers = max_task_workers
+        self.max_tracked_jobs = max_tracked_jobs
+        self.shared_store = shared_store
+        self.shared_ttl = shared_ttl
+        self.api_attempts = api_attempts
+        self.api_retry_delay = api_retry_delay
+        self._lock = Lock()
+        self._jobs = OrderedDict()
+        self._executor = None
+        self._task_executor = None
+
+    def init_app(self, app):
+        self.max_workers = app.config['DM_JOBS_MAX_WORKERS']
+        self.max_tracked_jobs = app.config['DM_JOBS_MAX_TRACKED']
+        self.shared_store = app.config.get('SESSION_REDIS') if app.config['DM_JOBS_SHARED'] else None
+        self.shared_ttl = app.config['DM_JOBS_SHARED_TTL']
+        self.api_attempts = app.config['DM_JOBS_API_ATTEMPTS']
+        self.api_retry_delay = app.config['DM_JOBS_API_RETRY_DELAY']
+        self.max_task_workers = app.config['DM_JOBS_MAX_TASK_WORKERS']
+        with self._lock:
+            self._jobs.clear()
+            self._executor = None
+            self._task_executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=_JOB_THREAD_NAME_PREFIX,
+                )
+            return self._executor
+
+    def _get_task_executor(self):
+        with self._lock:
+            if self._task_executor is None:
+                self._task_executor = ThreadPoolExecutor(
+                    max_workers=self.max_task_workers,
+                    thread_name_prefix=_JOB_TASK_THREAD_NAME_PREFIX,
+                )
+            return self._task_executor
+
+    def _gather(self, calls):
+        in_task_thread = current_thread().name.startswith(_JOB_TASK_THREAD_NAME_PREFIX)
+        if not self.max_task_workers or len(calls) < 2 or in_task_thread:
+            # nothing to gain from the pool - and calling gather from inside a gathered call could deadlock it
+            return [call() for call in calls]
+
+        app = current_app._get_current_object()
+
+        def in_app_context(call):
+            def wrapper():
+                with app.app_context():
+                    return call()
+            return wrapper
+
+        futures = [self._get_task_executor().submit(in_app_context(call)) for call in calls]
+        try:
+            return [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _job_updated(self, job):
+        if self.shared_store is None:
+            return
+        try:
+            self.shared_store.set(
+                "{}:{}".format(self._SHARED_KEY_PREFIX, job.id),
+                json.dumps(job.to_dict()),
+                ex=self.shared_ttl,
+            )
+        except RedisError as e:
+            current_app.logger.warning(
+                "Failed to write state of job {job_id} to shared store: {error}",
+                extra={"job_id": job.id, "error": str(e)},
+            )
+
+    def _run(self, app, job, work):
+        with app.app_context():
+            job._update(status="running")
+            try:
+                result = work(job)
+            except Exception as e:
+                app.logger.error(
+                    "Job {job_id} ({job_name}) failed: {error}",
+                    extra={"job_id": job.id, "job_name": job.name, "error": str(e)},
+                )
+                job._update(status="failed", error=str(e))
+            else:
+                job._update(status="finished", result=result)
+
+    def submit(self, job, work):
+        """Start running `work(job)` in the background, returning `job`"""
+        job._runner = self
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_tracked_jobs:
+                self._jobs.popitem(last=False)
+        self._job_updated(job)
+
+        app = current_app._get_current_object()
+        if self.max_workers:
+            self._get_executor().submit(self._run, app, job, work)
+        else:
+            self._run(app, job, work)
+        return job
+
+    def get_job_state(self, job_id):
+        """Return the state of the job with id `job_id` (as `Job.to_dict` does), or None if it's unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+
+        if self.shared_store is not None:
+            try:
+                state = self.shared_store.get("{}:{}".format(self._SHARED_KEY_PREFIX, job_id))
+            except RedisError as e:
+                current_app.logger.warning(
+                    "Failed to read state of job {job_id} from shared store: {error}",
+                    extra={"job_id": job_id, "error": str(e)},
+                )
+                return None
+            return state and json.loads(state)
+
+        return None
+
+
+job_runner = JobRunner()
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LoggedInUserCache:
+    """
+    Process-wide cache of the `User`s loaded for logged in sessions, so that an admin going from page to page doesn't
+    need their user fetching from the API on every request.
+
+    Users are keyed on user id and session, and kept for `ttl` seconds after being loaded - so a change made to a user
+    by anything else (including other processes) is picked up within that time. Changes made to a user by this process
+    should be reported with `invalidate`, which drops them straight away. At most `max_size` users are kept, the least
+    recently used being dropped first. A `ttl` of 0 disables caching altogether.
+
+    The users handed out are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, ttl=0, max_size=100, clock=monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = Lock()
+        self._users = OrderedDict()
+        # bumped for a user id whenever it's invalidated, so a user loaded before the change isn't cached
+        self._generations = {}
+
+    def init_app(self, app):
+        self.ttl = app.config['DM_LOGGED_IN_USER_CACHE_TTL']
+        self.max_size = app.config['DM_LOGGED_IN_USER_CACHE_SIZE']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._users.clear()
+
+    def get_user(self, user_id, session_id, load_user):
+        """
+        Return the `User` for `user_id` in the session `session_id`, calling `load_user` - which should return it, or
+        None if there's no such active user, as `User.load_user` would - if it isn't already cached.
+        """
+        if not self.ttl:
+            return load_user()
+
+        user_id = int(user_id)
+        key = (user_id, session_id)
+        now = self._clock()
+        with self._lock:
+            loaded_at, user = self._users.get(key, (None, None))
+            if user is not None and now - loaded_at < self.ttl:
+                self._users.move_to_end(key)
+                return user
+            generation = self._generations.get(user_id, 0)
+
+        user = load_user()
+        if user is None:
+            # don't let someone who's been deactivated or deleted stay logged in
+            with self._lock:
+                self._users.pop(key, None)
+            return None
+
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._users.pop(key, None)
+                self._users[key] = (now, user)
+                while len(self._users) > self.max_size:
+                    self._users.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        """Drop the cached `User`s for `user_id`, in every session, e.g. after updating them"""
+        if not self.ttl:
+            return
+        user_id = int(user_id)
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in [key for key in self._users if key[0] == user_id]:
+                del self._users[key]
+
+
+logged_in_user_cache = LoggedInUserCache()
@@ -0,0 +1,113 @@
+from threading import Lock
+
+from dmcontent.questions import Question
+
+
+_MISSING = object()
+
+
+class ManifestFilterPlan:
+    """
+    A manifest's questions' `depends` rules, compiled for filtering copies of the manifest by some data (a service, or a
+    declaration) as `ContentManifest.filter` would.
+
+    Rules are indexed on the key they depend on, and questions sharing a rule share its check - so filtering looks up
+    each key in the data once and hides the questions whose rules it fails, rather than walking every question and
+    checking each of its rules in turn. Rules depending on the lot are resolved up front for each lot, leaving only the
+    questions that can be shown for a lot to be checked.
+
+    Questions are identified by their position in the manifest, so a plan can only be used on manifests built from the
+    same content as the one it was compiled from, e.g. the ones `ContentLoader.get_manifest` returns for it.
+    """
+
+    def __init__(self, manifest):
+        self._lock = Lock()
+        self._lot_rules = {}
+        self._lot_hidden_positions = {}
+
+        rules = {}
+        nested_positions = set()
+        for section_index, section in enumerate(manifest.sections):
+            for question_index, question in enumerate(section.questions):
+                position = (section_index, question_index)
+                if type(question).filter is not Question.filter:
+                    # multiquestions and dynamic lists have sub-questions of their own to filter
+                    nested_positions.add(position)
+                for depends in question.get("depends", ()):
+                    rules.setdefault(depends["on"], {}).setdefault(tuple(depends["being"]), set()).add(position)
+
+        self._rules = rules
+        self._nested_positions = frozenset(nested_positions)
+
+    def _for_lot(self, lot):
+        with self._lock:
+            if lot in self._lot_rules:
+                return self._lot_hidden_positions[lot], self._lot_rules[lot]
+
+        hidden_positions = frozenset(
+            position
+            for being, positions in self._rules.get("lot", {}).items() if lot is _MISSING or lot not in being
+            for position in positions
+        )
+        lot_rules = tuple(
+            (key, key_rules)
+            for key, key_rules in (
+                (key, tuple(
+                    (being, frozenset(positions - hidden_positions))
+                    for being, positions in key_rules.items() if positions - hidden_positions
+                ))
+                for key, key_rules in self._rules.items() if key != "lot"
+            ) if key_rules
+        )
+
+        with self._lock:
+            self._lot_hidden_positions[lot] = hidden_positions
+            self._lot_rules[lot] = lot_rules
+        return hidden_positions, lot_rules
+
+    def prepare_lots(self, lots):
+        """Resolve the rules depending on the lot for each of `lots` now, rather than when they're first filtered for"""
+        for lot in lots:
+            self._for_lot(lot)
+
+    def hidden_positions(self, context):
+        """Return the set of (section index, question index) positions of the questions `context` hides"""
+        hidden_positions, lot_rules = self._for_lot(context.get("lot", _MISSING))
+        hidden_positions = set(hidden_positions)
+        for key, key_rules in lot_rules:
+            value = context.get(key, _MISSING)
+            for being, positions in key_rules:
+                if value is _MISSING or value not in being:
+                    hidden_positions.update(positions)
+        return hidden_positions
+
+    def filter(self, manifest, context):
+        """
+        Filter `manifest` by `context` in place and return it, just as `manifest.filter(context, inplace_allowed=True)`
+        would
+        """
+        hidden_positions = self.hidden_positions(context)
+
+        filtered_sections = []
+        for section_index, section in enumerate(manifest.sections):
+            section._context = context
+            filtered_questions = []
+            for question_index, question in enumerate(section.questions):
+                position = (section_index, question_index)
+                if position in hidden_positions:
+                    continue
+                if position in self._nested_positions:
+                    question = question.filter(context, inplace_allowed=True)
+                    if question is None:
+                        continue
+                else:
+                    question._context = context
+                filtered_questions.append(question)
+
+            section.questions = filtered_questions
+            if filtered_questions:
+                filtered_sections.append(section)
+
+        manifest.sections[:] = filtered_sections
+        manifest._assign_question_numbers()
+        return manifest
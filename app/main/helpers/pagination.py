@@ -31,3 +31,24 @@ def get_nav_args_from_api_response_links(links, prev_next_label, request_args, p
             navigation_args[kwarg] = request_args.get(kwarg)
 
     return navigation_args
+
+
+def paginate_list(items, page, page_size):
+    """
+    Paginate a list we already hold in full the same way the API paginates its responses
+    :param items: the full list of items
+    :param page: the (1-based) page number wanted
+    :param page_size: the number of items on each page
+    :return: tuple of (items on the page, dict of 'prev'/'next' links in the same form as those in an API response)
+
+    The links can then be handed to `get_nav_args_from_api_response_links`, exactly as a view backed by a paginated
+    API endpoint would. A page past the end of the list is empty and has no 'next' link.
+    """
+    start = (page - 1) * page_size
+    links = {}
+    if page > 1:
+        links['prev'] = '?page={}'.format(page - 1)
+    if start + page_size < len(items):
+        links['next'] = '?page={}'.format(page + 1)
+
+    return items[start:start + page_size], links
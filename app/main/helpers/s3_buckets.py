@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from threading import Lock, local
+from time import monotonic
+from urllib.parse import urlparse
+
+from dmutils import s3  # this style of import so we only have to mock once
+from dmutils import documents
+from flask import current_app
+
+
+# a URL is only handed out if it'll still be valid for at least this many seconds - how long URLs were signed for before
+# they were cached
+SIGNED_URL_MIN_VALIDITY = 30
+
+# how many signed URLs to keep per process
+_MAX_SIGNED_URLS = 1000
+
+
+class S3BucketPool:
+    """
+    Pool of `S3` bucket objects, so that a request needing a bucket doesn't have to create a new boto3 session for it.
+    There's one for each bucket (and S3 endpoint) in each thread, as boto3 resources shouldn't be shared between
+    threads.
+    """
+
+    def __init__(self):
+        self._local = local()
+
+    def init_app(self, app):
+        self.purge()
+
+    def purge(self):
+        # other threads' buckets can't be cleared directly, so replace them all
+        self._local = local()
+
+    def get_bucket(self, bucket_name):
+        endpoint_url = current_app.config.get("DM_S3_ENDPOINT_URL")
+        buckets = self._local.__dict__.setdefault("buckets", {})
+        if (bucket_name, endpoint_url) not in buckets:
+            buckets[bucket_name, endpoint_url] = s3.S3(bucket_name, endpoint_url=endpoint_url)
+        return buckets[bucket_name, endpoint_url]
+
+
+class SignedUrlCache:
+    """
+    Process-wide cache of signed URLs for S3 objects, so someone repeatedly downloading the same document doesn't need
+    it looking up and signing each time.
+
+    URLs are signed to be valid for `SIGNED_URL_MIN_VALIDITY` seconds longer than the `ttl` they're cached for, so
+    every URL handed out is valid for at least as long as an uncached one would be. A `ttl` of 0 disables caching
+    altogether, and URLs are signed for `SIGNED_URL_MIN_VALIDITY` seconds each time.
+    """
+
+    def __init__(self, ttl=0, clock=monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = Lock()
+        self._urls = OrderedDict()
+
+    def init_app(self, app):
+        self.ttl = app.config['DM_SIGNED_URL_CACHE_TTL']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._urls.clear()
+
+    def forget(self, bucket_name, path):
+        """Drop any URLs for the object at `path` in bucket `bucket_name`, for when it's been replaced or deleted"""
+        with self._lock:
+            for key in [key for key in self._urls if key[0] == bucket_name and key[2] == path]:
+                del self._urls[key]
+
+    @staticmethod
+    def _sign(bucket, path, base_url, expires_in):
+        url = bucket.get_signed_url(path, expires_in=expires_in)
+        if url is not None and base_url is not None:
+            base_url = urlparse(base_url)
+            url = urlparse(url)._replace(netloc=base_url.netloc, scheme=base_url.scheme).geturl()
+        return url
+
+    def get_signed_url(self, bucket_name, path, base_url):
+        """
+        Return a signed URL for the object at `path` in bucket `bucket_name` with its host swapped for `base_url`'s, or
+        None if there's no such object - as `dmutils.documents.get_signed_url` would.
+        """
+        if not self.ttl:
+            return documents.get_signed_url(s3_bucket_pool.get_bucket(bucket_name), path, base_url)
+
+        key = (bucket_name, current_app.config.get("DM_S3_ENDPOINT_URL"), path, base_url)
+        now = self._clock()
+        with self._lock:
+            expires_at, url = self._urls.get(key, (None, None))
+        if url is not None and now < expires_at:
+            return url
+
+        url = self._sign(s3_bucket_pool.get_bucket(bucket_name), path, base_url, self.ttl + SIGNED_URL_MIN_VALIDITY)
+        if url is None:
+            # the object might well be uploaded soon, so don't remember that it's missing
+            return None
+
+        with self._lock:
+            self._urls.pop(key, None)
+            self._urls[key] = (now + self.ttl, url)
+            # entries all live for the same time, so the oldest - first - ones are the first to expire
+            while self._urls and (len(self._urls) > _MAX_SIGNED_URLS or next(iter(self._urls.values()))[0] <= now):
+                self._urls.popitem(last=False)
+        return url
+
+
+s3_bucket_pool = S3BucketPool()
+signed_url_cache = SignedUrlCache()
+
+
+def get_bucket(bucket_name):
+    """Return an `S3` for the bucket `bucket_name` from the pool"""
+    return s3_bucket_pool.get_bucket(bucket_name)
+
+
+def get_signed_url(bucket_name, path, base_url):
+    """Like `dmutils.documents.get_signed_url`, but for a bucket name, with the bucket from the pool and URLs cached"""
+    return signed_url_cache.get_signed_url(bucket_name, path, base_url)
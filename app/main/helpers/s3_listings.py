@@ -0,0 +1,82 @@
+from threading import Lock
+from time import monotonic
+
+
+def _listing_sort_key(bucket_item):
+    # the order `S3.list(..., load_timestamps=True)` returns them in
+    return bucket_item.get("last_modified") or "", bucket_item["path"]
+
+
+class S3ListingCache:
+    """
+    Process-wide cache of the (timestamped) listings of prefixes of S3 buckets, which are slow to fetch as loading each
+    object's timestamp takes a request of its own.
+
+    Listings are keyed on bucket name and prefix. Changes made to a bucket by this process should be reported through
+    `saved` and `deleted`, which update any cached listing in place. Changes made by anything else are picked up when
+    a listing expires, `ttl` seconds after it was fetched. A `ttl` of 0 disables caching altogether.
+
+    The listings handed out are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, ttl=0, clock=monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = Lock()
+        self._listings = {}
+        # bumped for a key whenever we change what's under it, so a listing fetched before the change isn't cached
+        self._generations = {}
+
+    def init_app(self, app):
+        self.ttl = app.config['DM_S3_LISTING_CACHE_TTL']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._listings.clear()
+
+    def get_listing(self, bucket_name, prefix, list_prefix):
+        """
+        Return a tuple of the objects under `prefix` in the bucket `bucket_name`, calling `list_prefix` - which should
+        return them as `S3.list(prefix, load_timestamps=True)` would - to fetch them if they aren't already cached.
+        """
+        if not self.ttl:
+            return tuple(list_prefix())
+
+        key = (bucket_name, prefix)
+        with self._lock:
+            fetched_at, listing = self._listings.get(key, (None, None))
+            generation = self._generations.get(key, 0)
+        if listing is not None and self._clock() - fetched_at < self.ttl:
+            return listing
+
+        fetched_at, listing = self._clock(), tuple(list_prefix())
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._listings[key] = (fetched_at, listing)
+        return listing
+
+    def _update(self, bucket_name, prefix, path, new_bucket_item=None):
+        key = (bucket_name, prefix)
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            fetched_at, listing = self._listings.get(key, (None, None))
+            if listing is None:
+                return
+            bucket_items = [bucket_item for bucket_item in listing if bucket_item["path"] != path]
+            if new_bucket_item is not None:
+                bucket_items.append(new_bucket_item)
+            self._listings[key] = (fetched_at, tuple(sorted(bucket_items, key=_listing_sort_key)))
+
+    def saved(self, bucket_name, prefix, bucket_item):
+        """Add (or replace) `bucket_item`, the key dict returned by `S3.save`, in the cached listing of `prefix`"""
+        if self.ttl:
+            self._update(bucket_name, prefix, bucket_item["path"], bucket_item)
+
+    def deleted(self, bucket_name, prefix, path):
+        """Remove the object at `path` from the cached listing of `prefix`"""
+        if self.ttl:
+            self._update(bucket_name, prefix, path)
+
+
+s3_listing_cache = S3ListingCache()
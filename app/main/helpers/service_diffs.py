@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from hashlib import sha1
+import json
+from threading import Lock, Thread
+
+from flask import Markup, current_app
+from redis import RedisError
+
+
+class ServiceDiffCache:
+    """
+    Cache of the diff tables shown when reviewing a service's unapproved edits, which are relatively expensive to build
+    and get rebuilt every time a category admin (re)loads a service's updates page.
+
+    Diffs are keyed on the archived service being compared against, a hash of the current service data and the version
+    of the manifest used to lay them out, so any change to any of those simply results in a miss. The `max_size` most
+    recently used entries are kept in this process - a `max_size` of 0 disables caching. If a redis client is given as
+    `shared_store` entries are also written to (and looked for in) redis, with an expiry of `shared_ttl` seconds, so
+    they can be shared between processes.
+    """
+
+    _SHARED_KEY_PREFIX = "service-diffs"
+
+    def __init__(self, max_size=0, shared_store=None, shared_ttl=None):
+        self.max_size = max_size
+        self.shared_store = shared_store
+        self.shared_ttl = shared_ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def init_app(self, app):
+        self.max_size = app.config['DM_SERVICE_DIFF_CACHE_SIZE']
+        self.shared_store = app.config.get('SESSION_REDIS') if app.config['DM_SERVICE_DIFF_CACHE_SHARED'] else None
+        self.shared_ttl = app.config['DM_SERVICE_DIFF_CACHE_SHARED_TTL']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def key(archived_service_id, service, manifest_version):
+        service_hash = sha1(json.dumps(service, sort_keys=True).encode("utf-8")).hexdigest()
+        return "{}:{}:{}".format(archived_service_id, service_hash, manifest_version)
+
+    def _get_shared(self, key):
+        try:
+            value = self.shared_store.get("{}:{}".format(self._SHARED_KEY_PREFIX, key))
+        except RedisError as e:
+            current_app.logger.warning(
+                "Failed to read service diffs from shared store: {error}",
+                extra={"error": str(e)},
+            )
+            return None
+        return value and tuple(map(tuple, json.loads(value)))
+
+    def _set_shared(self, key, diffs):
+        try:
+            self.shared_store.set(
+                "{}:{}".format(self._SHARED_KEY_PREFIX, key),
+                json.dumps(diffs),
+                ex=self.shared_ttl,
+            )
+        except RedisError as e:
+            current_app.logger.warning(
+                "Failed to write service diffs to shared store: {error}",
+                extra={"error": str(e)},
+            )
+
+    def get_diffs(self, archived_service_id, service, manifest_version, compute_diffs):
+        """
+        Return an OrderedDict of question id to diff table html for `service`, calling `compute_diffs` - which should
+        return an iterable of (question id, table html) pairs - to build them if they aren't already cached.
+        """
+        if not self.max_size:
+            return OrderedDict(compute_diffs())
+
+        key = self.key(archived_service_id, service, manifest_version)
+        with self._lock:
+            diffs = self._entries.get(key)
+            if diffs is not None:
+                self._entries.move_to_end(key)
+
+        if diffs is None and self.shared_store is not None:
+            diffs = self._get_shared(key)
+
+        if diffs is None:
+            # stored as plain strings so the same entries can be shared through redis
+            diffs = tuple((question_id, str(table_html)) for question_id, table_html in compute_diffs())
+            if self.shared_store is not None:
+                self._set_shared(key, diffs)
+
+        with self._lock:
+            self._entries[key] = diffs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return OrderedDict((question_id, Markup(table_html)) for question_id, table_html in diffs)
+
+    def _prewarm(self, app, warm_calls):
+        with app.app_context():
+            for warm_call in warm_calls:
+                try:
+                    warm_call()
+                except Exception as e:
+                    # this is only ever an optimization - the page will build whatever we failed to here
+                    app.logger.warning("Failed to pre-warm service diffs: {error}", extra={"error": str(e)})
+
+    def prewarm(self, warm_calls):
+        """
+        Call each of `warm_calls` - pairs of an archived service id and a call (presumably leading to a `get_diffs` call
+        against that archived service) - one after another in a background thread, so that the diffs are already cached
+        by the time anyone looks at them. Calls for archived services this process already has diffs cached against
+        are skipped, as is starting a thread at all if that leaves nothing to do. Does nothing if caching is disabled.
+        """
+        if not self.max_size:
+            return
+
+        with self._lock:
+            cached_archived_service_ids = {key.split(":", 1)[0] for key in self._entries}
+        warm_calls = tuple(
+            warm_call for archived_service_id, warm_call in warm_calls
+            if str(archived_service_id) not in cached_archived_service_ids
+        )[:self.max_size]
+        if not warm_calls:
+            return
+
+        Thread(
+            target=self._prewarm,
+            args=(current_app._get_current_object(), warm_calls),
+            daemon=True,
+        ).start()
+
+
+service_diff_cache = ServiceDiffCache()
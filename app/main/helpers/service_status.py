@@ -0,0 +1,118 @@
+from functools import partial
+from threading import Lock
+from uuid import uuid4
+
+from dmapiclient import APIError
+from flask import current_app
+
+from .concurrency import gather
+from .jobs import Job, job_runner
+
+
+BULK_SERVICE_STATUS_CHANGE_JOB_NAME = "bulk-service-status-change"
+
+
+class BulkServiceStatusChange:
+    """
+    Change the status of a number of services, making the `update_service_status` calls concurrently (bounded by the
+    size of the `gather` pool, or the job runner's own pool when run as a job) and keeping track of how each one went.
+
+    A failed update doesn't stop the others - the error is recorded against that service and the rest carry on. A
+    change run in the background with `start` reports its progress through its job instead, which is what its progress
+    page shows.
+    """
+
+    def __init__(self, client, supplier_id, framework_slug, services, new_status, updated_by):
+        self.id = uuid4().hex
+        self.supplier_id = supplier_id
+        self.supplier_name = services[0]['supplierName']
+        self.framework_slug = framework_slug
+        self.framework_name = services[0]['frameworkName']
+        self.new_status = new_status
+        self.service_ids = tuple(service['id'] for service in services)
+
+        self._client = client
+        self._updated_by = updated_by
+        self._lock = Lock()
+        self._errors = {}
+        self._completed_count = 0
+
+    @property
+    def total_count(self):
+        return len(self.service_ids)
+
+    @property
+    def completed_count(self):
+        with self._lock:
+            return self._completed_count
+
+    @property
+    def finished(self):
+        return self.completed_count == self.total_count
+
+    @property
+    def errors(self):
+        """A dict mapping the id of each service which couldn't be updated to the error message"""
+        with self._lock:
+            return dict(self._errors)
+
+    def _update_service_status(self, service_id, job=None):
+        update_service_status = partial(
+            self._client.update_service_status,
+            service_id,
+            self.new_status,
+            self._updated_by,
+            wait_for_index=False,
+        )
+        error = None
+        try:
+            if job is None:
+                update_service_status()
+            else:
+                job.retry_transient(update_service_status)
+        except APIError as e:
+            current_app.logger.warning(
+                "Failed to set status of service {service_id} to {new_status}: {error}",
+                extra={"service_id": service_id, "new_status": self.new_status, "error": str(e)},
+            )
+            error = e.message
+            with self._lock:
+                self._errors[service_id] = error
+        finally:
+            with self._lock:
+                self._completed_count += 1
+            if job is not None:
+                job.advance(service_id, error)
+
+    def run(self, job=None):
+        """Make the change, reporting its progress through `job` (and retrying transient API errors) if given one"""
+        calls = (partial(self._update_service_status, service_id, job) for service_id in self.service_ids)
+        if job is None:
+            gather(*calls)
+        else:
+            job.gather(*calls)
+        return self
+
+    def _run_as_job(self, job):
+        self.run(job)
+        return {"errors": self.errors}
+
+    def start(self):
+        """Run the change as a background job (with the same id), its `data` saying what the change is"""
+        job_runner.submit(
+            Job(
+                BULK_SERVICE_STATUS_CHANGE_JOB_NAME,
+                roles=("admin-ccs-category",),
+                total=self.total_count,
+                id=self.id,
+                data={
+                    "supplierId": self.supplier_id,
+                    "supplierName": self.supplier_name,
+                    "frameworkSlug": self.framework_slug,
+                    "frameworkName": self.framework_name,
+                    "newStatus": self.new_status,
+                },
+            ),
+            self._run_as_job,
+        )
+        return self
@@ -0,0 +1,24 @@
+from flask import Response, current_app, get_flashed_messages, stream_with_context
+from flask_wtf.csrf import generate_csrf
+
+
+# how many pieces of template output to gather up before sending them, so we're not sending a chunk for every tag
+STREAM_BUFFER_SIZE = 20
+
+
+def stream_template(template_name, **context):
+    """
+    Render a template bit by bit as the response is sent, rather than building the whole page in memory first - for
+    pages with long lists on them, so the top of the page can arrive (and start being laid out) before the rest of it
+    has been rendered.
+
+    The session is saved before any of the response is sent, so anything the template would normally put in it - the
+    flashed messages it pops, a CSRF token - has to be done up front.
+    """
+    get_flashed_messages()
+    generate_csrf()
+
+    current_app.update_template_context(context)
+    stream = current_app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return Response(stream_with_context(stream), mimetype="text/html")
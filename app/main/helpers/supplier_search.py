@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from time import monotonic
+
+from ...metrics import SUPPLIER_SEARCH_LOOKUPS_TOTAL
+
+
+class SupplierSearchCache:
+    """
+    Process-wide cache of the results of `find_suppliers` searches, for the supplier search page and typeahead - which
+    see the same few searches made over and over as admins type a supplier's name.
+
+    Results are keyed on the search's parameters and kept for `ttl` seconds, the `max_size` most recently used of them
+    at most. A search that's already being made by another thread isn't made again: the thread waits for the other
+    one's results instead, so any number of identical searches made at once cost one API call. Changes made to
+    suppliers through this app should be reported through `purge` - which only clears this process's results, so other
+    processes can serve results from before the change for up to `ttl` seconds. A `ttl` of 0 disables caching
+    altogether.
+
+    The results handed out are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, ttl=0, max_size=0, clock=monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = Lock()
+        self._results = OrderedDict()
+        self._in_flight = {}
+        # bumped by each purge, so results fetched before it aren't cached
+        self._generation = 0
+
+    def init_app(self, app):
+        self.ttl = app.config['DM_SUPPLIER_SEARCH_CACHE_TTL']
+        self.max_size = app.config['DM_SUPPLIER_SEARCH_CACHE_SIZE']
+        self.purge()
+
+    def purge(self):
+        with self._lock:
+            self._results.clear()
+            self._generation += 1
+
+    def find_suppliers(self, client, **params):
+        """Return the response to `client.find_suppliers(**params)`, from the cache if it's there"""
+        if not self.ttl:
+            return client.find_suppliers(**params)
+
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            fetched_at, response = self._results.get(key, (None, None))
+            if response is not None and self._clock() - fetched_at < self.ttl:
+                self._results.move_to_end(key)
+                SUPPLIER_SEARCH_LOOKUPS_TOTAL.labels(result='hit').inc()
+                return response
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = Future()
+                generation = self._generation
+                fetching = True
+            else:
+                fetching = False
+
+        if not fetching:
+            SUPPLIER_SEARCH_LOOKUPS_TOTAL.labels(result='shared').inc()
+            return in_flight.result()
+
+        SUPPLIER_SEARCH_LOOKUPS_TOTAL.labels(result='miss').inc()
+        try:
+            fetched_at, response = self._clock(), client.find_suppliers(**params)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if self._generation == generation:
+                self._results[key] = (fetched_at, response)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+        in_flight.set_result(response)
+        return response
+
+
+supplier_search_cache = SupplierSearchCache()
@@ -0,0 +1,110 @@
+import datetime
+import mimetypes
+
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from dmutils.formats import DATETIME_FORMAT
+from dmutils.s3 import S3ResponseError, get_file_size
+from dmutils.timing import logged_duration_for_external_request as log_external_request
+from flask import Request, current_app
+
+
+def max_upload_size(config_key):
+    """
+    Limit requests to a view to the number of bytes given by the `config_key` config setting, e.g.::
+
+        @main.route('/communications/<framework_slug>', methods=['POST'])
+        @role_required('admin-framework-manager')
+        @max_upload_size('DM_DOCUMENT_UPLOAD_MAX_REQUEST_SIZE')
+        def upload_communication(framework_slug):
+            ...
+
+    The limit is checked (by `UploadSizeLimitedRequest`) against the request's Content-Length before any of the body is
+    read, so an upload that's too big is turned away with a 413 straight away rather than being spooled to disk first.
+    """
+    def decorator(view):
+        view.max_upload_size_config_key = config_key
+        return view
+
+    return decorator
+
+
+class UploadSizeLimitedRequest(Request):
+    """Request class enforcing the limits set on views with `max_upload_size`, and MAX_CONTENT_LENGTH for the rest"""
+
+    @property
+    def max_content_length(self):
+        view = current_app.view_functions.get(self.endpoint) if self.endpoint else None
+        config_key = getattr(view, "max_upload_size_config_key", None)
+        if config_key is not None:
+            return current_app.config[config_key]
+        return super().max_content_length
+
+
+class StreamingS3Uploader:
+    """
+    Saves files to a dmutils `S3` bucket, as its `save` does - except that files of `multipart_threshold` bytes or more
+    are uploaded in parts of `multipart_chunk_size` bytes, up to `multipart_max_concurrency` of them at once. Each part
+    is read from the file as it's sent, so a big document is never held in memory whole, and a failed part can be
+    retried on its own rather than the whole upload starting again.
+
+    Can be used wherever dmutils wants an "uploader" (such as `upload_service_documents`).
+    """
+
+    def __init__(self, bucket, multipart_threshold, multipart_chunk_size, multipart_max_concurrency):
+        self.bucket = bucket
+        self.multipart_threshold = multipart_threshold
+        self._transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=multipart_max_concurrency,
+        )
+
+    def save(self, path, file_, **kwargs):
+        """Save `file_` to `path`, taking the same arguments as (and returning what) `S3.save` does"""
+        if get_file_size(file_) < self.multipart_threshold:
+            return self.bucket.save(path, file_, **kwargs)
+        return self._save_multipart(path, file_, **kwargs)
+
+    def _save_multipart(
+        self, path, file_, acl='public-read', timestamp=None, download_filename=None, disposition_type='attachment',
+    ):
+        path = path.lstrip('/')
+        timestamp = timestamp or datetime.datetime.utcnow()
+        extra_args = {
+            "ACL": acl,
+            # the same metadata, content type and disposition S3.save gives the files it saves
+            "Metadata": {"timestamp": timestamp.strftime(DATETIME_FORMAT)},
+        }
+        content_type, _ = mimetypes.guess_type(path)
+        if content_type:
+            extra_args["ContentType"] = content_type
+        if download_filename:
+            extra_args["ContentDisposition"] = '{}; filename="{}"'.format(
+                disposition_type,
+                str(download_filename).encode("ascii", errors="ignore").decode(),
+            )
+
+        log_description = 'multipart file upload [{filepath} of size {filesize} and acl {fileacl}]'
+        with log_external_request('S3', log_description) as log_context:
+            log_context.update({"filepath": path, "filesize": get_file_size(file_), "fileacl": acl})
+            try:
+                # S3 only makes single-request uploads itself, so this goes through the boto3 bucket it wraps
+                self.bucket._bucket.Object(path).upload_fileobj(
+                    file_, ExtraArgs=extra_args, Config=self._transfer_config,
+                )
+            except S3UploadFailedError as e:
+                # what callers of S3.save expect to have to handle
+                raise S3ResponseError({"Error": {"Code": "UploadFailed", "Message": str(e)}}, "UploadPart") from e
+
+        return self.bucket.get_key(path)
+
+
+def get_uploader(bucket):
+    """Return a `StreamingS3Uploader` for the dmutils `S3` bucket `bucket`, configured for the current app"""
+    return StreamingS3Uploader(
+        bucket,
+        multipart_threshold=current_app.config['DM_S3_MULTIPART_THRESHOLD'],
+        multipart_chunk_size=current_app.config['DM_S3_MULTIPART_CHUNK_SIZE'],
+        multipart_max_concurrency=current_app.config['DM_S3_MULTIPART_MAX_CONCURRENCY'],
+    )
@@ -1,14 +1,88 @@
+import json
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
+from tempfile import TemporaryFile
+
 from dmutils import csv_generator
 
+from .concurrency import prefetch
+
+
+HEADER_ROW = ("email address", "name")
+USER_ATTRIBUTES = ("emailAddress", "name")
+
+# the API returns users a page of 100 at a time, so buffering this many lets the next page be fetched in the background
+# while the current one is being written out
+PREFETCH_BUFFER_SIZE = 100
+
+_row_sort_key = itemgetter(USER_ATTRIBUTES.index("name"))
+
+
+def _spill(rows):
+    spill_file = TemporaryFile(mode="w+", encoding="utf-8")
+    for row in rows:
+        spill_file.write(json.dumps(row))
+        spill_file.write("\n")
+    spill_file.seek(0)
+    return spill_file
+
 
-def generate_user_csv(users):
-    header_row = ("email address", "name")
-    user_attributes = ("emailAddress", "name")
+def _read_spilled(spill_file):
+    for line in spill_file:
+        yield tuple(json.loads(line))
 
+
+def _sorted_rows(rows, max_rows_in_memory):
+    """
+    Yield `rows` sorted by name, holding at most `max_rows_in_memory` of them in memory at a time.
+
+    If there are more rows than that they're sorted in chunks, each of which is written out to a temporary file, and the
+    chunks merged back together as they're read.
+    """
+    rows = iter(rows)
+    spill_files = []
+    try:
+        while True:
+            chunk = sorted(islice(rows, max_rows_in_memory), key=_row_sort_key)
+            if not spill_files and len(chunk) < max_rows_in_memory:
+                # everything fits in memory
+                yield from chunk
+                return
+
+            if chunk:
+                spill_files.append(_spill(chunk))
+            if len(chunk) < max_rows_in_memory:
+                break
+
+        yield from merge(*(_read_spilled(spill_file) for spill_file in spill_files), key=_row_sort_key)
+    finally:
+        for spill_file in spill_files:
+            spill_file.close()
+
+
+def generate_user_csv(users, sort_by_name=True, max_rows_in_memory=None):
+    """
+    Generate CSV lines for `users`, sorted by name unless `sort_by_name` is False, in which case they're written in the
+    order they're given, starting as soon as the first user is available.
+
+    Users are read from `users` in the background, so a `find_users_iter` can be fetching its next page from the API
+    while the current one is written. If `max_rows_in_memory` is given, sorting spills to temporary files rather than
+    holding more than that many rows in memory.
+    """
     def rows_iter():
         """Iterator yielding header then rows."""
-        yield header_row
-        for user in sorted(users, key=lambda user: user["name"]):
-            yield (user.get(field_name, "") for field_name in user_attributes)
+        yield HEADER_ROW
+
+        rows = (
+            tuple(user.get(field_name, "") for field_name in USER_ATTRIBUTES)
+            for user in prefetch(users, buffer_size=PREFETCH_BUFFER_SIZE)
+        )
+        if not sort_by_name:
+            yield from rows
+        elif max_rows_in_memory:
+            yield from _sorted_rows(rows, max_rows_in_memory)
+        else:
+            yield from sorted(rows, key=_row_sort_key)
 
     return csv_generator.iter_csv(rows_iter())
@@ -1,46 +1,74 @@
 from distutils.util import strtobool
+from functools import partial
+from itertools import chain
 
 from dmutils.email.user_account_email import send_user_account_email
 from dmutils.forms.helpers import get_errors_from_wtform
 from dmutils.flask import timed_render_template as render_template
-from flask import request, redirect, url_for, flash
+from flask import abort, request, redirect, url_for, flash
 from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
 from ..forms import InviteAdminForm, EditAdminUserForm
+from ..helpers.concurrency import gather
+from ..helpers.logged_in_users import logged_in_user_cache
+from ..helpers.pagination import get_nav_args_from_api_response_links, paginate_list
 from ... import data_api_client
 
 
 INVITATION_SENT_MESSAGE = "An invitation has been sent to {email_address}."
 EMAIL_ADDRESS_UPDATED_MESSAGE = "{email_address} has been updated."
 
+ADMIN_ROLES = (
+    'admin',
+    'admin-ccs-category',
+    'admin-ccs-sourcing',
+    'admin-framework-manager',
+    'admin-ccs-data-controller',
+)
+ADMIN_USERS_PAGE_SIZE = 100
+ADMIN_USERS_MAX_PAGE_SIZE = 500
+
 
 @main.route('/admin-users', methods=['GET'])
 @role_required('admin-manager')
 def manage_admin_users():
-    # The API doesn't support filtering users by multiple roles at once, and it's not worth adding that feature
-    # just for this one view that (currently, and for the foreseeable future) will be very rarely used.
-    # In future, if we have many many admin users and/or this page is heavily used we should:
-    # (1) Fix the API to allow fetching all relevant user roles with a single call
-    # (2) Stop using the _iter method and properly paginate this page
+    try:
+        page = int(request.args.get('page', 1))
+        page_size = min(int(request.args.get('page_size', ADMIN_USERS_PAGE_SIZE)), ADMIN_USERS_MAX_PAGE_SIZE)
+    except ValueError:
+        abort(400, "Invalid page or page size")
+    if page < 1 or page_size < 1:
+        abort(400, "Invalid page or page size")
 
-    support_users = data_api_client.find_users_iter(role='admin')
-    category_users = data_api_client.find_users_iter(role='admin-ccs-category')
-    sourcing_users = data_api_client.find_users_iter(role='admin-ccs-sourcing')
-    framework_manager_users = data_api_client.find_users_iter(role='admin-framework-manager')
-    data_controller_users = data_api_client.find_users_iter(role='admin-ccs-data-controller')
+    # The API doesn't support filtering users by multiple roles at once, and it's not worth adding that feature
+    # just for this one view that (currently, and for the foreseeable future) will be very rarely used. Instead we fetch
+    # each role's users concurrently, so the page takes as long as the slowest role rather than the sum of them all.
+    # As the users of every role have to be sorted together, we need all of them before we can pick out a page.
+    users_by_role = gather(*(partial(_find_users_with_role, role) for role in ADMIN_ROLES))
 
     # We want to sort so all Active users are above all Suspended users, and alphabetical by name within these groups.
     # In Python False < True (False is zero, True is one) so sorting on "active is False" puts Active users first.
     admin_users = sorted(
-        list(support_users) + list(category_users) +
-        list(sourcing_users) + list(framework_manager_users) + list(data_controller_users),
+        chain.from_iterable(users_by_role),
         key=lambda k: (k['active'] is False, k['name'])
     )
 
-    return render_template("view_admin_users.html",
-                           admin_users=admin_users)
+    admin_users_page, links = paginate_list(admin_users, page, page_size)
+    if page > 1 and not admin_users_page:
+        abort(404)
+
+    return render_template(
+        "view_admin_users.html",
+        admin_users=admin_users_page,
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, ['page_size']),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, ['page_size']),
+    )
+
+
+def _find_users_with_role(role):
+    return list(data_api_client.find_users_iter(role=role))
 
 
 @main.route('/admin-users/invite', methods=['GET', 'POST'])
@@ -93,6 +121,7 @@ def edit_admin_user(admin_user_id):
             role=edited_admin_permissions,
             active=edited_admin_status
         )
+        logged_in_user_cache.invalidate(admin_user_id)
         flash(EMAIL_ADDRESS_UPDATED_MESSAGE.format(email_address=admin_user["emailAddress"]))
         return redirect(url_for('.manage_admin_users'))
     elif edit_admin_user_form.edit_admin_name.errors:
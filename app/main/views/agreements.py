@@ -1,16 +1,29 @@
 from collections import OrderedDict
 
-from dateutil.parser import parse as parse_date
-from dmutils.documents import degenerate_document_path_and_return_doc_name
+from dmutils.documents import degenerate_document_path_and_return_doc_name, get_extension
 from dmutils.flask import timed_render_template as render_template
-from dmutils.formats import datetimeformat
 from flask import redirect, url_for, abort, request
+from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
+from ..helpers.agreements import agreements_queue_cache
+from ..helpers.countersigned_agreements import (
+    BULK_COUNTERSIGNED_AGREEMENT_UPLOAD_JOB_NAME,
+    BulkCountersignedAgreementUpload,
+)
+from ..helpers.jobs import job_runner
+from ..helpers.pagination import get_nav_args_from_api_response_links, paginate_list
+from ..helpers.streaming import stream_template
 from ... import data_api_client
 
 
+AGREEMENTS_PAGE_SIZE = 100
+AGREEMENTS_MAX_PAGE_SIZE = 500
+
+NO_COUNTERSIGNED_AGREEMENTS_ERROR = "Select the countersigned agreements to upload"
+
+
 def get_status_labels():
     return OrderedDict((
         ("signed", "Waiting for countersigning"),
@@ -41,11 +54,20 @@ def list_agreements(framework_slug):
     if status and status not in status_labels:
         abort(400)
 
+    try:
+        page = int(request.args.get('page', 1))
+        page_size = min(int(request.args.get('page_size', AGREEMENTS_PAGE_SIZE)), AGREEMENTS_MAX_PAGE_SIZE)
+    except ValueError:
+        abort(400, "Invalid page or page size")
+    if page < 1 or page_size < 1:
+        abort(400, "Invalid page or page size")
+
+    # The API doesn't paginate a framework's suppliers, so we have to fetch all of them - but only the page of them
+    # we're showing need rendering (and their dates formatting, which the templates do as they go).
     supplier_frameworks = _get_supplier_frameworks(framework_slug, status=status)
-
-    for supplier_framework in supplier_frameworks:
-        supplier_framework['agreementReturnedAt'] = datetimeformat(
-            parse_date(supplier_framework['agreementReturnedAt']))
+    supplier_frameworks_page, links = paginate_list(supplier_frameworks, page, page_size)
+    if page > 1 and not supplier_frameworks_page:
+        abort(404)
 
     # Determine which template to use.
     # G-Cloud 7 and earlier frameworks do not have a frameworkAgreementVersion and use an old countersigning flow
@@ -58,14 +80,17 @@ def list_agreements(framework_slug):
     else:
         template = 'view_agreements.html'
 
-    return render_template(
+    return stream_template(
         template,
         framework=framework,
-        supplier_frameworks=supplier_frameworks,
+        supplier_frameworks=supplier_frameworks_page,
+        agreements_count=len(supplier_frameworks),
         degenerate_document_path_and_return_doc_name=lambda x: degenerate_document_path_and_return_doc_name(x),
         status=status,
         status_labels=status_labels,
-        is_e_signature_flow=is_e_signature_flow
+        is_e_signature_flow=is_e_signature_flow,
+        prev_link=get_nav_args_from_api_response_links(links, 'prev', request.args, ['status', 'page_size']),
+        next_link=get_nav_args_from_api_response_links(links, 'next', request.args, ['status', 'page_size']),
     )
 
 
@@ -79,25 +104,20 @@ def next_agreement(supplier_id, framework_slug):
 
     # note we are NOT requesting the status-filtered supplier_framework list - we can't be sure our requested supplier
     # will *be* in the filtered set (though it may have been at the time the url was generated) so for this view at
-    # least, any status "filtering" we do must be here in python.
-    supplier_frameworks = _get_supplier_frameworks(framework_slug)
-    supplier_frameworks_iter = iter(supplier_frameworks)
-
-    # first advance supplier_frameworks_iter to the requested supplier in the list, disregarding any status filter
+    # least, any status "filtering" is done by the queue, remembering that a status_labels key might be a
+    # comma-separated list of actual API statuses
     try:
-        next(sf for sf in supplier_frameworks_iter if sf.get("supplierId") == supplier_id)
-    except StopIteration:
-        # reached the end of supplier_frameworks_iter without finding an entry for supplier_id. supplier possibly
-        # doesn't exist or doesn't have a signed agreement yet
+        next_supplier_id = agreements_queue_cache.next_supplier_id(
+            framework_slug,
+            supplier_id,
+            status.split(",") if status else None,
+            lambda: _get_supplier_frameworks(framework_slug),
+        )
+    except KeyError:
+        # supplier possibly doesn't exist or doesn't have a signed agreement yet
         abort(404)
 
-    # now find whatever the "next" one (which satisfies any status requirement we have) is, remembering that a
-    # status_labels key might be a comma-separated list of actual API statuses
-    try:
-        next_supplier_framework = next(
-            sf for sf in supplier_frameworks_iter if (not status) or sf.get("agreementStatus") in status.split(",")
-        )
-    except StopIteration:
+    if next_supplier_id is None:
         # this was the last one.
         return redirect(url_for(
             '.list_agreements',
@@ -107,7 +127,67 @@ def next_agreement(supplier_id, framework_slug):
 
     return redirect(url_for(
         '.view_signed_agreement',
-        supplier_id=next_supplier_framework["supplierId"],
-        framework_slug=next_supplier_framework["frameworkSlug"],
+        supplier_id=next_supplier_id,
+        framework_slug=framework_slug,
         next_status=status,
     ))
+
+
+@main.route('/agreements/<framework_slug>/countersigned-agreements', methods=['GET', 'POST'])
+@role_required('admin-ccs-sourcing')
+def bulk_upload_countersigned_agreements(framework_slug):
+    framework = data_api_client.get_framework(framework_slug)['frameworks']
+
+    if request.method == 'POST':
+        uploaded_files = [
+            uploaded_file
+            for uploaded_file in request.files.getlist('countersigned_agreements')
+            if uploaded_file.filename
+        ]
+        if not uploaded_files:
+            return render_template(
+                "upload_countersigned_agreements.html",
+                framework=framework,
+                error=NO_COUNTERSIGNED_AGREEMENTS_ERROR,
+            ), 400
+
+        upload = BulkCountersignedAgreementUpload(
+            data_api_client, framework_slug, current_user.email_address, current_user.id
+        )
+        for uploaded_file in uploaded_files:
+            if get_extension(uploaded_file.filename) == ".zip":
+                upload.add_zip_file(uploaded_file.filename, uploaded_file.stream)
+            else:
+                upload.add_file(uploaded_file.filename, uploaded_file.stream)
+        job = upload.start()
+
+        return redirect(url_for(
+            '.view_countersigned_agreements_upload',
+            framework_slug=framework_slug,
+            job_id=job.id,
+        ))
+
+    return render_template("upload_countersigned_agreements.html", framework=framework, error=None)
+
+
+@main.route('/agreements/<framework_slug>/countersigned-agreements/<job_id>', methods=['GET'])
+@role_required('admin-ccs-sourcing')
+def view_countersigned_agreements_upload(framework_slug, job_id):
+    job = job_runner.get_job_state(job_id)
+    if job is None or job["name"] != BULK_COUNTERSIGNED_AGREEMENT_UPLOAD_JOB_NAME:
+        abort(404)
+    result = job["result"] or {}
+    if result and result["frameworkSlug"] != framework_slug:
+        abort(404)
+
+    framework = data_api_client.get_framework(framework_slug)['frameworks']
+
+    return render_template(
+        "view_countersigned_agreements_upload.html",
+        framework=framework,
+        job=job,
+        finished=job["status"] in ("finished", "failed"),
+        failed=sorted(job["errors"].items()),
+        rejected=list(result.get("rejected", {}).items()),
+        uploaded=list(result.get("uploaded", {}).items()),
+    )
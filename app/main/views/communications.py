@@ -1,3 +1,4 @@
+from functools import partial
 from pathlib import PurePath
 
 from dmutils import s3  # this style of import so we only have to mock once
@@ -8,7 +9,10 @@ from flask import redirect, url_for, current_app, request, flash, abort
 from .. import main
 from ..auth import role_required
 from ... import data_api_client
+from ..helpers.concurrency import gather
 from ..helpers.frameworks import get_framework_or_404
+from ..helpers.s3_listings import s3_listing_cache
+from ..helpers.uploads import get_uploader, max_upload_size
 
 
 def _get_comm_type_root(framework_slug, comm_type):
@@ -20,12 +24,25 @@ def _get_comm_type_root(framework_slug, comm_type):
 _comm_types = ("communication", "clarification",)
 
 
+def _get_communications_bucket():
+    return s3.S3(
+        current_app.config['DM_COMMUNICATIONS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
+    )
+
+
+def _list_comm_type(framework_slug, comm_type):
+    comm_type_root = str(_get_comm_type_root(framework_slug, comm_type))
+    return s3_listing_cache.get_listing(
+        current_app.config['DM_COMMUNICATIONS_BUCKET'],
+        comm_type_root,
+        # boto3 resources shouldn't be shared between threads, so each listing gets its own bucket
+        lambda: _get_communications_bucket().list(comm_type_root, load_timestamps=True),
+    )
+
+
 @main.route('/communications/<framework_slug>', methods=['GET'])
 @role_required('admin-framework-manager')
 def manage_communications(framework_slug):
-    communications_bucket = s3.S3(
-        current_app.config['DM_COMMUNICATIONS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
     framework = get_framework_or_404(data_api_client, framework_slug)
 
     # generate a dict of comm_type: seq of s3 object dicts
@@ -35,11 +52,11 @@ def manage_communications(framework_slug):
                 **bucket_item,
                 # annotate on to object dicts their paths relative to comm_type_root
                 "rel_path": PurePath(bucket_item["path"]).relative_to(_get_comm_type_root(framework_slug, comm_type)),
-            } for bucket_item in communications_bucket.list(
-                str(_get_comm_type_root(framework_slug, comm_type)),
-                load_timestamps=True,
-            )
-        ) for comm_type in _comm_types
+            } for bucket_item in bucket_items
+        ) for comm_type, bucket_items in zip(
+            _comm_types,
+            gather(*(partial(_list_comm_type, framework_slug, comm_type) for comm_type in _comm_types)),
+        )
     }
 
     return render_template(
@@ -58,9 +75,7 @@ def download_communication(framework_slug, comm_type, filepath):
     # ensure this is a real framework
     get_framework_or_404(data_api_client, framework_slug)
 
-    bucket = s3.S3(
-        current_app.config['DM_COMMUNICATIONS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
+    bucket = _get_communications_bucket()
     full_path = _get_comm_type_root(framework_slug, comm_type) / filepath
     url = get_signed_url(bucket, str(full_path), current_app.config["DM_ASSETS_URL"])
     if not url:
@@ -71,10 +86,9 @@ def download_communication(framework_slug, comm_type, filepath):
 
 @main.route('/communications/<framework_slug>', methods=['POST'])
 @role_required('admin-framework-manager')
+@max_upload_size('DM_DOCUMENT_UPLOAD_MAX_REQUEST_SIZE')
 def upload_communication(framework_slug):
-    communications_bucket = s3.S3(
-        current_app.config['DM_COMMUNICATIONS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
+    communications_uploader = get_uploader(_get_communications_bucket())
     errors = {}
 
     if request.files.get('communication'):
@@ -85,8 +99,12 @@ def upload_communication(framework_slug):
 
         if 'communication' not in errors.keys():
             path = "{}/communications/updates/communications/{}".format(framework_slug, the_file.filename)
-            communications_bucket.save(
-                path, the_file, acl='bucket-owner-full-control', download_filename=the_file.filename
+            s3_listing_cache.saved(
+                current_app.config['DM_COMMUNICATIONS_BUCKET'],
+                str(_get_comm_type_root(framework_slug, 'communication')),
+                communications_uploader.save(
+                    path, the_file, acl='bucket-owner-full-control', download_filename=the_file.filename
+                ),
             )
             flash('New communication was uploaded.')
 
@@ -98,8 +116,12 @@ def upload_communication(framework_slug):
 
         if 'clarification' not in errors.keys():
             path = "{}/communications/updates/clarifications/{}".format(framework_slug, the_file.filename)
-            communications_bucket.save(
-                path, the_file, acl='bucket-owner-full-control', download_filename=the_file.filename
+            s3_listing_cache.saved(
+                current_app.config['DM_COMMUNICATIONS_BUCKET'],
+                str(_get_comm_type_root(framework_slug, 'clarification')),
+                communications_uploader.save(
+                    path, the_file, acl='bucket-owner-full-control', download_filename=the_file.filename
+                ),
             )
             flash('New clarification was uploaded.')
 
@@ -121,9 +143,7 @@ def delete_communication(framework_slug, comm_type, filepath):
         if "confirm" not in request.form:
             abort(400, "Expected 'confirm' parameter in POST request")
 
-        communications_bucket = s3.S3(
-            current_app.config['DM_COMMUNICATIONS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-        )
+        communications_bucket = _get_communications_bucket()
         full_path = _get_comm_type_root(framework_slug, comm_type) / filepath
 
         # do this check ourselves - deleting an object in S3 silently has no effect, forwarding this behaviour to the
@@ -132,6 +152,11 @@ def delete_communication(framework_slug, comm_type, filepath):
             abort(404, f"{filepath} not present in S3 bucket")
 
         communications_bucket.delete_key(str(full_path))
+        s3_listing_cache.deleted(
+            current_app.config['DM_COMMUNICATIONS_BUCKET'],
+            str(_get_comm_type_root(framework_slug, comm_type)),
+            str(full_path),
+        )
 
         flash(f"{comm_type.capitalize()} ‘{filepath}’ was deleted for {framework['name']}.")
         return redirect(url_for('.manage_communications', framework_slug=framework_slug))
@@ -0,0 +1,15 @@
+from flask import abort, jsonify
+from flask_login import current_user
+
+from .. import main
+from ..helpers.jobs import job_runner
+
+
+@main.route('/jobs/<job_id>', methods=['GET'])
+def view_job(job_id):
+    job = job_runner.get_job_state(job_id)
+    # jobs the user can't view are treated as not being there at all
+    if job is None or not any(current_user.has_role(role) for role in job["roles"]):
+        abort(404)
+
+    return jsonify(job)
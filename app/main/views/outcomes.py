@@ -1,15 +1,72 @@
 from datetime import datetime
+from functools import partial
+from itertools import chain, islice
 
-from flask import Response, abort, current_app, redirect
+from flask import Response, abort, current_app, redirect, stream_with_context
 
-from dmutils import csv_generator, s3
-from dmutils.documents import get_signed_url
+from dmutils import csv_generator
 
 from .. import main
 from ..auth import role_required
+from ..helpers.concurrency import gather
+from ..helpers.frameworks import framework_catalogue
+from ..helpers.s3_buckets import get_signed_url
 from ... import data_api_client
 
 
+def _direct_award_outcome_rows(projects, batch_size):
+    """
+    Yield a CSV row for each awarded project, looking up the awarded (archived) services a batch at a time.
+
+    Each distinct archived service is only fetched once per export, and the lookups for a batch are made concurrently,
+    so rows start being sent as soon as the first batch is in rather than after every service has been fetched.
+    """
+    archived_services = {}
+    awarded_projects = (project for project in projects if project['outcome']['result'] == 'awarded')
+
+    while True:
+        batch = list(islice(awarded_projects, batch_size))
+        if not batch:
+            return
+
+        new_archived_service_ids = [
+            archived_service_id
+            for archived_service_id in dict.fromkeys(
+                project['outcome']['resultOfDirectAward']['archivedService']['id'] for project in batch
+            )
+            if archived_service_id not in archived_services
+        ]
+        for archived_service_id, response in zip(new_archived_service_ids, gather(*(
+            partial(data_api_client.get_archived_service, archived_service_id=archived_service_id)
+            for archived_service_id in new_archived_service_ids
+        ))):
+            archived_services[archived_service_id] = response['services']
+
+        for project in batch:
+            awardDetails = project['outcome']['award']
+            resultOfDirectAward = project['outcome']['resultOfDirectAward']
+            service = archived_services[resultOfDirectAward['archivedService']['id']]
+            user = project['users'][0]
+
+            yield [
+                project['id'],  # id
+                project['name'],  # name
+                project['outcome']['completedAt'],  # 'Submitted at',
+                project['outcome']['result'],  # 'result',
+                resultOfDirectAward['archivedService']['service']['id'],  # 'Award service',
+                service['serviceName'],  # 'Award service name',
+                service['supplierId'],  # 'Award supplier id',
+                service['supplierName'],  # 'Award supplier name',
+                awardDetails['awardValue'],   # 'awardValue',
+                awardDetails['awardingOrganisationName'],  # 'awardingOrganisationName',
+                awardDetails['startDate'],  # 'awardStartDate',
+                awardDetails['endDate'],  # 'awardEndDate',
+                user['id'],  # 'User id',
+                user['name'],  # 'User name',
+                user['emailAddress'],  # 'User email',
+            ]
+
+
 @main.route('/direct-award/outcomes', methods=['GET'])
 @role_required('admin-ccs-category', 'admin-framework-manager', 'admin-ccs-sourcing')
 def download_direct_award_outcomes():
@@ -33,41 +90,11 @@ def download_direct_award_outcomes():
         'User email',
     ]
 
-    formatted_rows = []
-    formatted_rows.append(headers)   # add header row
-    for project in projects:
-        if project['outcome']['result'] != 'awarded':
-            continue
-
-        awardDetails = project['outcome']['award']
-        resultOfDirectAward = project['outcome']['resultOfDirectAward']
-        service = data_api_client.get_archived_service(
-            archived_service_id=resultOfDirectAward['archivedService']['id']
-        )['services']
-
-        user = project['users'][0]
-
-        row = [
-            project['id'],  # id
-            project['name'],  # name
-            project['outcome']['completedAt'],  # 'Submitted at',
-            project['outcome']['result'],  # 'result',
-            resultOfDirectAward['archivedService']['service']['id'],  # 'Award service',
-            service['serviceName'],  # 'Award service name',
-            service['supplierId'],  # 'Award supplier id',
-            service['supplierName'],  # 'Award supplier name',
-            awardDetails['awardValue'],   # 'awardValue',
-            awardDetails['awardingOrganisationName'],  # 'awardingOrganisationName',
-            awardDetails['startDate'],  # 'awardStartDate',
-            awardDetails['endDate'],  # 'awardEndDate',
-            user['id'],  # 'User id',
-            user['name'],  # 'User name',
-            user['emailAddress'],  # 'User email',
-        ]
-        formatted_rows.append(row)
-
     return Response(
-        csv_generator.iter_csv(formatted_rows),
+        stream_with_context(csv_generator.iter_csv(chain(
+            (headers,),
+            _direct_award_outcome_rows(projects, batch_size=current_app.config["DM_API_GATHER_MAX_WORKERS"]),
+        ))),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment;filename={}".format(download_filename),
@@ -80,25 +107,13 @@ def download_direct_award_outcomes():
 @role_required("admin-ccs-category", "admin-framework-manager", "admin-ccs-sourcing")
 def download_dos_outcomes():
     # get the slug for the latest DOS framework iteration
-    framework_slug = (
-        sorted(
-            filter(
-                lambda fw: (
-                    fw["family"] == "digital-outcomes-and-specialists"
-                    and fw["status"] == "live"
-                ),
-                data_api_client.find_frameworks()["frameworks"]
-            ),
-            key=lambda fw: fw["frameworkLiveAtUTC"],
-            reverse=True,
-        )[0]["slug"]
-    )
+    framework = framework_catalogue.get_latest_live_framework(data_api_client, "digital-outcomes-and-specialists")
+    if framework is None:
+        abort(404)
+    framework_slug = framework["slug"]
 
-    reports_bucket = s3.S3(
-        current_app.config["DM_REPORTS_BUCKET"], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
     url = get_signed_url(
-        reports_bucket,
+        current_app.config["DM_REPORTS_BUCKET"],
         f"{framework_slug}/reports/opportunity-data.csv",
         current_app.config["DM_ASSETS_URL"]
     )
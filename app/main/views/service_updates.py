@@ -1,10 +1,14 @@
+from functools import partial
+
 from dmapiclient.audit import AuditTypes
 from dmutils.flask import timed_render_template as render_template
-from flask import abort, flash, redirect, url_for
+from flask import abort, current_app, flash, redirect, url_for
 from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
+from ..helpers.service_diffs import service_diff_cache
+from .services import get_service_diffs
 from ... import data_api_client
 
 
@@ -21,6 +25,12 @@ def service_update_audits():
         earliest_for_each_object='true',
     )
 
+    if current_app.config['DM_SERVICE_DIFF_CACHE_PREWARM']:
+        service_diff_cache.prewarm(
+            (audit_event["data"]["oldArchivedServiceId"], partial(_warm_service_diffs, audit_event))
+            for audit_event in audit_events_response['auditEvents']
+        )
+
     return render_template(
         "service_updates_unapproved.html",
         audit_events=audit_events_response['auditEvents'],
@@ -28,6 +38,11 @@ def service_update_audits():
     )
 
 
+def _warm_service_diffs(audit_event):
+    service = data_api_client.get_service(audit_event["data"]["serviceId"])["services"]
+    get_service_diffs(audit_event["data"]["oldArchivedServiceId"], service)
+
+
 @main.route('/services/<service_id>/updates/<int:audit_id>/approve', methods=['POST'])
 @role_required('admin-ccs-category')
 def submit_service_update_approval(service_id, audit_id):
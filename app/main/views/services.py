@@ -1,6 +1,3 @@
-from collections import OrderedDict
-from itertools import chain, dropwhile, islice
-
 from dmapiclient import HTTPError
 from dmapiclient.audit import AuditTypes
 from dmcontent.formats import format_service_price
@@ -13,8 +10,11 @@ from flask_login import current_user
 
 from .. import main
 from ..auth import role_required
+from ..helpers.audit_events import summarise_service_updates
 from ..helpers.diff_tools import html_diff_tables_from_sections_iter
-from ..helpers.frameworks import get_framework_or_404
+from ..helpers.frameworks import framework_catalogue, get_framework_or_404
+from ..helpers.service_diffs import service_diff_cache
+from ..helpers.uploads import get_uploader, max_upload_size
 from ... import content_loader
 from ... import data_api_client
 
@@ -25,6 +25,7 @@ UPDATE_SERVICE_STATUS_ERROR_MESSAGE = "Error trying to update status of service:
 BAD_SERVICE_STATUS_MESSAGE = "Not a valid status: {service_status}"
 SERVICE_STATUS_UPDATED_MESSAGE = "Service status has been updated to: {service_status}"
 SERVICE_PUBLISHED_MESSAGE = "You published ‘{service_name}’."
+FRAMEWORK_CATALOGUE_PURGED_MESSAGE = "The list of frameworks has been refreshed."
 
 ALL_ADMIN_ROLES = [
     'admin',
@@ -39,7 +40,7 @@ ALL_ADMIN_ROLES = [
 @main.route('', methods=['GET'])
 @role_required(*ALL_ADMIN_ROLES)
 def index():
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = framework_catalogue.get_frameworks(data_api_client)
     # TODO replace this temporary fix for DOS2 when a better solution has been created.
     frameworks = [
         fw for fw in frameworks if not (fw['status'] == 'coming' or (
@@ -50,6 +51,16 @@ def index():
     return render_template("index.html", frameworks=frameworks)
 
 
+@main.route('/frameworks/catalogue/purge', methods=['POST'])
+@role_required('admin-framework-manager')
+def purge_framework_catalogue():
+    # the framework catalogue refreshes itself eventually, but after a framework's status has been changed we don't
+    # want to wait for that. this clears every process's copy (with DM_FRAMEWORK_CATALOGUE_SHARED set, as it is live)
+    framework_catalogue.purge()
+    flash(FRAMEWORK_CATALOGUE_PURGED_MESSAGE)
+    return redirect(url_for('.index'))
+
+
 @main.route('/services', methods=['GET'])
 @role_required('admin', 'admin-ccs-category', 'admin-framework-manager')
 def find_service():
@@ -89,10 +100,11 @@ def view_service(service_id):
             removed_at = most_recent_audit_events['auditEvents'][0]['createdAt']
 
     service_data['priceString'] = format_service_price(service_data)
-    sections = content_loader.get_manifest(
+    sections = content_loader.get_filtered_manifest(
         service_data['frameworkSlug'],
         'edit_service_as_admin',
-    ).filter(service_data, inplace_allowed=True).summary(service_data, inplace_allowed=True)
+        service_data,
+    ).summary(service_data, inplace_allowed=True)
 
     return render_template(
         "view_service.html",
@@ -163,10 +175,11 @@ def edit_service(service_id, section_id, question_slug=None):
 
     get_framework_or_404(data_api_client, service_data['frameworkSlug'], allowed_statuses=['live', 'expired'])
 
-    content = content_loader.get_manifest(
+    content = content_loader.get_filtered_manifest(
         service_data['frameworkSlug'],
         'edit_service_as_admin',
-    ).filter(service_data, inplace_allowed=True)
+        service_data,
+    )
 
     section = content.get_section(section_id)
 
@@ -188,6 +201,7 @@ def edit_service(service_id, section_id, question_slug=None):
 @main.route('/services/<service_id>/edit/<section_id>', methods=['POST'])
 @main.route('/services/<service_id>/edit/<section_id>/<question_slug>', methods=['POST'])
 @role_required('admin-ccs-category')
+@max_upload_size('DM_DOCUMENT_UPLOAD_MAX_REQUEST_SIZE')
 def update_service(service_id, section_id, question_slug=None):
     service = data_api_client.get_service(service_id)
     if service is None:
@@ -198,10 +212,11 @@ def update_service(service_id, section_id, question_slug=None):
     # TODO remove `expired` from below. It's a temporary fix to allow access to DOS2 as it's expired.
     get_framework_or_404(data_api_client, service['frameworkSlug'], allowed_statuses=['live', 'expired'])
 
-    content = content_loader.get_manifest(
+    content = content_loader.get_filtered_manifest(
         service['frameworkSlug'],
         'edit_service_as_admin',
-    ).filter(service, inplace_allowed=True)
+        service,
+    )
     section = content.get_section(section_id)
     if question_slug is not None:
         # Overwrite section with single question section for 'question per page' editing.
@@ -213,7 +228,9 @@ def update_service(service_id, section_id, question_slug=None):
     posted_data = section.get_data(request.form)
 
     uploaded_documents, document_errors = upload_service_documents(
-        s3.S3(current_app.config['DM_S3_DOCUMENT_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")),
+        get_uploader(s3.S3(
+            current_app.config['DM_S3_DOCUMENT_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
+        )),
         'documents',
         current_app.config['DM_ASSETS_URL'],
         service, request.files, section)
@@ -246,6 +263,43 @@ def update_service(service_id, section_id, question_slug=None):
     return redirect(url_for(".view_service", service_id=service_id))
 
 
+def get_service_diffs(archived_service_id, service):
+    """
+    Return the archived service `service` has been edited from, the sections of its manifest and the (cached) diffs
+    between the two, keyed by question id.
+    """
+    archived_service_response = data_api_client.get_archived_service(archived_service_id)
+
+    if archived_service_response is None:
+        raise ValueError("referenced archived_service_id does not exist?")
+
+    archived_service = archived_service_response["services"]
+
+    # the edit_service_as_admin manifest should hopefully be a superset of all editable fields
+    sections = content_loader.get_filtered_manifest(
+        service['frameworkSlug'],
+        'edit_service_as_admin',
+        service,
+    ).sections
+
+    diffs = service_diff_cache.get_diffs(
+        archived_service_id,
+        service,
+        content_loader.get_manifest_version(service['frameworkSlug'], 'edit_service_as_admin'),
+        lambda: (
+            (question_id, table_html,)
+            for section_slug, question_id, table_html in html_diff_tables_from_sections_iter(
+                sections=sections,
+                revision_1=archived_service,
+                revision_2=service,
+                table_preamble_template="diff_table/_table_preamble.html",
+            )
+        ),
+    )
+
+    return archived_service, sections, diffs
+
+
 @main.route('/services/<service_id>/updates', methods=['GET'])
 @role_required('admin-ccs-category')
 def service_updates(service_id):
@@ -256,70 +310,24 @@ def service_updates(service_id):
 
     supplier = data_api_client.get_supplier(service["supplierId"])["suppliers"]
 
-    common_request_kwargs = {
-        "object_id": service_id,
-        "object_type": "services",
-        "audit_type": AuditTypes.update_service,
-        "acknowledged": "false",
-    }
-
-    all_update_events = latest_update_events = oldest_update_events = None
-    latest_update_events_response = data_api_client.find_audit_events(
-        latest_first="true",
-        **common_request_kwargs
+    update_events = summarise_service_updates(
+        data_api_client,
+        service_id,
+        max_events=current_app.config["DM_SERVICE_UPDATES_MAX_AUDIT_EVENTS"],
     )
-    latest_update_events = latest_update_events_response["auditEvents"]
+    latest_update_events = update_events.latest_events
+    all_update_events = update_events.all_events
 
-    if latest_update_events_response["links"].get("next"):
-        # we haven't got all update events for this object. fetch the oldest
-        oldest_update_events_response = data_api_client.find_audit_events(
-            latest_first="false",
-            **common_request_kwargs
-        )
-        oldest_update_events = oldest_update_events_response["auditEvents"][::-1]
-
-        # now we check to see if we're able to splice together the full list using these two responses. we'll know this
-        # if we are able to find the last of latest_update_events in oldest_update_events. if we're not able to, we'll
-        # have to leave all_update_events as None to signal that we don't have all the events
-        if latest_update_events[-1]["id"] in (audit_event["id"] for audit_event in oldest_update_events):
-            all_update_events = tuple(audit_event for audit_event in chain(
-                latest_update_events,
-                # being careful here to swallow the actual *matching* event using islice
-                islice(dropwhile(lambda ae: ae["id"] != latest_update_events[-1]["id"], oldest_update_events), 1, None),
-            ))
-    else:
-        all_update_events = oldest_update_events = latest_update_events
+    # all_update_events contains all the update events unless there were too many to walk through and the oldest of them
+    # couldn't be joined up with the latest, in which case it is None. in all cases latest_update_events[0] and
+    # oldest_update_events[-1] are the latest and oldest update events respectively
+    oldest_update_events = all_update_events or update_events.oldest_events
 
-    # so now we should be in the position where, in all cases:
-    # - all_update_events should contain all update events unless this is not possible using two requests, in which
-    #   case it is set to None
-    # - latest_update_events[0] and oldest_update_events[-1] should contain the latest and oldest update events
-    #   respectively
     extra_context = {}
     if latest_update_events:
-        archived_service_response = data_api_client.get_archived_service(
-            oldest_update_events[-1]["data"]["oldArchivedServiceId"]
-        )
-
-        if archived_service_response is None:
-            raise ValueError("referenced archived_service_id does not exist?")
-
-        extra_context["archived_service"] = archived_service = archived_service_response["services"]
-
-        # the edit_service_as_admin manifest should hopefully be a superset of all editable fields
-        extra_context["sections"] = sections = content_loader.get_manifest(
-            service['frameworkSlug'],
-            'edit_service_as_admin',
-        ).filter(service, inplace_allowed=True).sections
-
-        extra_context["diffs"] = OrderedDict(
-            (question_id, table_html,)
-            for section_slug, question_id, table_html in html_diff_tables_from_sections_iter(
-                sections=sections,
-                revision_1=archived_service,
-                revision_2=service,
-                table_preamble_template="diff_table/_table_preamble.html",
-            )
+        extra_context["archived_service"], extra_context["sections"], extra_context["diffs"] = get_service_diffs(
+            update_events.oldest_archived_service_id,
+            service,
         )
 
     return render_template(
@@ -329,11 +337,7 @@ def service_updates(service_id):
         all_update_events=all_update_events,
         latest_update_events=latest_update_events,
         oldest_update_events=oldest_update_events,
-        # below number of users who made edits might not be reliable if over 2 default length pages
-        # (100 edits per page at the time of writing) of unapproved edits per service were made
-        min_number_of_users_who_made_edits=len(frozenset(audit_event["user"] for audit_event in chain(
-            latest_update_events,
-            oldest_update_events,
-        ))),
+        # only a minimum if there were more than DM_SERVICE_UPDATES_MAX_AUDIT_EVENTS unapproved edits
+        min_number_of_users_who_made_edits=len(update_events.editors),
         **extra_context
     )
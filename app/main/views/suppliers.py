@@ -1,24 +1,22 @@
 from collections import OrderedDict
+from functools import partial
 from itertools import groupby, chain
 from operator import itemgetter
 
 from dateutil.parser import parse as parse_date
 from dmcontent.errors import ContentNotFoundError
-from dmcontent.utils import count_unanswered_questions
 from dmapiclient import HTTPError, APIError
 from dmapiclient.audit import AuditTypes
-from dmutils import s3
 from dmutils.config import convert_to_boolean
 from dmutils.documents import (
-    AGREEMENT_FILENAME, COUNTERPART_FILENAME,
-    file_is_pdf, get_document_path, get_extension, get_signed_url,
-    generate_timestamped_document_upload_path, degenerate_document_path_and_return_doc_name,
-    generate_download_filename)
+    AGREEMENT_FILENAME,
+    file_is_pdf, get_document_path, get_extension,
+    degenerate_document_path_and_return_doc_name)
 from dmutils.email import send_user_account_email
 from dmutils.flask import timed_render_template as render_template
 from dmutils.forms.helpers import get_errors_from_wtform
 from dmutils.formats import datetimeformat
-from flask import request, redirect, url_for, abort, current_app, flash
+from flask import request, redirect, url_for, abort, current_app, flash, jsonify
 from flask_login import current_user
 
 from .. import main
@@ -29,8 +27,18 @@ from ..forms import (
     EditSupplierRegisteredAddressForm,
     EditSupplierRegisteredNameForm
 )
+from ..helpers.agreements import agreements_queue_cache
+from ..helpers.concurrency import gather
+from ..helpers.countersigned_agreements import upload_countersigned_agreement
 from ..helpers.countries import COUNTRY_TUPLE
+from ..helpers.draft_services import draft_service_counts_cache
+from ..helpers.frameworks import framework_catalogue
+from ..helpers.logged_in_users import logged_in_user_cache
 from ..helpers.pagination import get_nav_args_from_api_response_links
+from ..helpers.s3_buckets import get_bucket, get_signed_url, signed_url_cache
+from ..helpers.jobs import job_runner
+from ..helpers.service_status import BULK_SERVICE_STATUS_CHANGE_JOB_NAME, BulkServiceStatusChange
+from ..helpers.supplier_search import supplier_search_cache
 from ..helpers.supplier_details import (
     get_supplier_frameworks_visible_for_role,
     get_company_details_from_supplier,
@@ -49,6 +57,9 @@ COUNTERSIGNED_AGREEMENT_NOT_PDF_MESSAGE = "Countersigned agreement file is not a
 SUPPLIER_SERVICES_REMOVED_MESSAGE = "You suspended all {framework_name} services for ‘{supplier_name}’."
 SUPPLIER_SERVICES_UNSUSPENDED_MESSAGE = "You unsuspended all {framework_name} services for ‘{supplier_name}’."
 SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE = "Search results may take a few minutes to be updated."
+SUPPLIER_SERVICES_NOT_ALL_TOGGLED_MESSAGE = "{failed_count} of {total_count} {framework_name} services for " \
+                                            "‘{supplier_name}’ could not be updated: {service_ids}. " \
+                                            "The other services were updated."
 SUPPLIER_USER_MESSAGES = {
     'user_invited': 'User invited',
     'user_moved': 'User moved to this supplier',
@@ -58,6 +69,8 @@ SUPPLIER_USER_MESSAGES = {
 SUPPLIER_DETAILS_UPDATED_MESSAGE = "The details for ‘{supplier_name}’ have been updated."
 OLDEST_INTERESTING_FRAMEWORK_SLUG = 'g-cloud-7'
 OLD_SIGNING_FLOW_SLUGS = ['g-cloud-7', 'digital-outcomes-and-specialists']
+SUPPLIER_TYPEAHEAD_MIN_QUERY_LENGTH = 2
+SUPPLIER_TYPEAHEAD_MAX_RESULTS = 10
 
 
 @main.route('/suppliers', methods=['GET'])
@@ -71,7 +84,8 @@ def find_suppliers():
     else:
         duns_number = request.args.get("supplier_duns_number").strip() \
             if request.args.get("supplier_duns_number") else None
-        suppliers_response = data_api_client.find_suppliers(
+        suppliers_response = supplier_search_cache.find_suppliers(
+            data_api_client,
             name=request.args.get("supplier_name"),
             duns_number=duns_number,
             company_registration_number=request.args.get("supplier_company_registration_number"),
@@ -80,7 +94,7 @@ def find_suppliers():
         suppliers = suppliers_response['suppliers']
         links = suppliers_response["links"]
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = framework_catalogue.get_frameworks(data_api_client)
     try:
         oldest_interesting_framework_id = [
             fw for fw in frameworks if fw['slug'] == OLDEST_INTERESTING_FRAMEWORK_SLUG
@@ -107,14 +121,35 @@ def find_suppliers():
     )
 
 
+@main.route('/suppliers/typeahead', methods=['GET'])
+@role_required(
+    'admin', 'admin-ccs-category', 'admin-ccs-sourcing', 'admin-framework-manager', 'admin-ccs-data-controller'
+)
+def supplier_typeahead():
+    query = request.args.get("q", "").strip()
+    if len(query) < SUPPLIER_TYPEAHEAD_MIN_QUERY_LENGTH:
+        suppliers = []
+    else:
+        suppliers = supplier_search_cache.find_suppliers(data_api_client, name=query)["suppliers"]
+
+    return jsonify(suppliers=[
+        {"id": supplier["id"], "name": supplier["name"]}
+        for supplier in suppliers[:SUPPLIER_TYPEAHEAD_MAX_RESULTS]
+    ])
+
+
 @main.route("/suppliers/<int:supplier_id>", methods=["GET"])
 @role_required(
     "admin", "admin-ccs-category", "admin-ccs-data-controller", "admin-framework-manager", "admin-ccs-sourcing"
 )
 def supplier_details(supplier_id):
-    frameworks = data_api_client.find_frameworks()["frameworks"]
-    supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
-    supplier_frameworks = data_api_client.get_supplier_frameworks(supplier_id)["frameworkInterest"]
+    frameworks, supplier_response, supplier_frameworks_response = gather(
+        partial(framework_catalogue.get_frameworks, data_api_client),
+        partial(data_api_client.get_supplier, supplier_id),
+        partial(data_api_client.get_supplier_frameworks, supplier_id),
+    )
+    supplier = supplier_response["suppliers"]
+    supplier_frameworks = supplier_frameworks_response["frameworkInterest"]
 
     # Get SupplierFrameworks for frameworks the role is interested in, sorted by oldest frameworkLiveAtUTC first
     visible_supplier_frameworks = get_supplier_frameworks_visible_for_role(
@@ -154,6 +189,7 @@ def update_supplier_name(supplier_id):
     data_api_client.update_supplier(
         supplier['suppliers']['id'], {'name': new_supplier_name}, current_user.email_address
     )
+    supplier_search_cache.purge()
     flash(SUPPLIER_DETAILS_UPDATED_MESSAGE.format(supplier_name=new_supplier_name))
     return redirect(url_for('.supplier_details', supplier_id=supplier_id))
 
@@ -175,6 +211,7 @@ def edit_supplier_registered_name(supplier_id):
             {'registeredName': form.registered_company_name.data},
             current_user.email_address
         )
+        supplier_search_cache.purge()
         flash(SUPPLIER_DETAILS_UPDATED_MESSAGE.format(supplier_name=supplier['name']))
 
         return redirect(url_for('.supplier_details', supplier_id=supplier_id))
@@ -193,7 +230,7 @@ def edit_supplier_registered_name(supplier_id):
 @role_required('admin-ccs-data-controller')
 def edit_supplier_registered_company_number(supplier_id):
     supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = framework_catalogue.get_frameworks(data_api_client)
 
     # Take the registered company numbers from the supplier, as we need to know which type it is (CH or other)
     prefill_data = {
@@ -233,6 +270,7 @@ def edit_supplier_registered_company_number(supplier_id):
             supplier=update_supplier_payload,
             user=current_user.email_address
         )
+        supplier_search_cache.purge()
 
         if most_recent_supplier_framework.get('declaration'):
             data_api_client.update_supplier_declaration(
@@ -290,6 +328,7 @@ def edit_supplier_registered_address(supplier_id):
             },
             current_user.email_address
         )
+        supplier_search_cache.purge()
 
         flash(SUPPLIER_DETAILS_UPDATED_MESSAGE.format(supplier_name=supplier['name']))
         return redirect(url_for('.supplier_details', supplier_id=supplier_id))
@@ -333,10 +372,7 @@ def view_supplier_declaration(supplier_id, framework_slug):
             raise
         sf = {}
 
-    content = content_loader.get_manifest(
-        framework_slug,
-        'declaration',
-    ).filter(sf.get("declaration", {}), inplace_allowed=True)
+    content = content_loader.get_filtered_manifest(framework_slug, 'declaration', sf.get("declaration", {}))
     declaration_sections = content.sections
     question_content = OrderedDict(
         (question.id, question)
@@ -368,11 +404,16 @@ def view_signed_agreement(supplier_id, framework_slug):
     # not properly validating this - all we do is pass it through
     next_status = request.args.get("next_status")
 
-    supplier = data_api_client.get_supplier(supplier_id)['suppliers']
-    framework = data_api_client.get_framework(framework_slug)['frameworks']
+    supplier_response, framework_response, supplier_framework_response = gather(
+        partial(data_api_client.get_supplier, supplier_id),
+        partial(data_api_client.get_framework, framework_slug),
+        partial(data_api_client.get_supplier_framework_info, supplier_id, framework_slug),
+    )
+    supplier = supplier_response['suppliers']
+    framework = framework_response['frameworks']
     if not framework.get('frameworkAgreementVersion'):
         abort(404)
-    supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
+    supplier_framework = supplier_framework_response['frameworkInterest']
     if not supplier_framework.get('agreementReturned'):
         abort(404)
 
@@ -390,10 +431,6 @@ def view_signed_agreement(supplier_id, framework_slug):
             if service["status"] == "submitted" and service['lotName'] not in lot_names:
                 lot_names.append(service['lotName'])
 
-    agreements_bucket = s3.S3(
-        current_app.config['DM_AGREEMENTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
-
     is_e_signature_flow = framework['isESignatureSupported']
     if not is_e_signature_flow:
         # Fetch path to supplier's signature page
@@ -404,7 +441,9 @@ def view_signed_agreement(supplier_id, framework_slug):
         path = supplier_framework.get('countersignedPath')
         template = "suppliers/view_esignature_agreement.html"
 
-    url = get_signed_url(agreements_bucket, path, current_app.config['DM_ASSETS_URL']) if path else ""
+    url = get_signed_url(
+        current_app.config['DM_AGREEMENTS_BUCKET'], path, current_app.config['DM_ASSETS_URL']
+    ) if path else ""
     agreement_ext = get_extension(path) if path else ""
 
     if not url:
@@ -430,6 +469,7 @@ def put_signed_agreement_on_hold(agreement_id):
     next_status = request.args.get("next_status")
 
     agreement = data_api_client.put_signed_agreement_on_hold(agreement_id, current_user.email_address)["agreement"]
+    agreements_queue_cache.set_agreement_status(agreement["frameworkSlug"], agreement["supplierId"], "on-hold")
 
     flash(AGREEMENT_ON_HOLD_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -452,6 +492,7 @@ def approve_agreement_for_countersignature(agreement_id):
         current_user.email_address,
         current_user.id,
     )["agreement"]
+    agreements_queue_cache.set_agreement_status(agreement["frameworkSlug"], agreement["supplierId"], "approved")
 
     flash(AGREEMENT_APPROVED_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -474,6 +515,7 @@ def unapprove_agreement_for_countersignature(agreement_id):
         current_user.email_address,
         current_user.id,
     )["agreement"]
+    agreements_queue_cache.set_agreement_status(agreement["frameworkSlug"], agreement["supplierId"], "signed")
 
     flash(AGREEMENT_APPROVAL_CANCELLED_MESSAGE.format(organisation_name=request.form['nameOfOrganisation']))
 
@@ -503,11 +545,8 @@ def download_agreement_file(supplier_id, framework_slug, document_name):
     if supplier_framework is None or not supplier_framework.get("declaration"):
         abort(404)
 
-    agreements_bucket = s3.S3(
-        current_app.config['DM_AGREEMENTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
     path = get_document_path(framework_slug, supplier_id, 'agreements', document_name)
-    url = get_signed_url(agreements_bucket, path, current_app.config['DM_ASSETS_URL'])
+    url = get_signed_url(current_app.config['DM_AGREEMENTS_BUCKET'], path, current_app.config['DM_ASSETS_URL'])
     if not url:
         abort(404)
 
@@ -522,9 +561,7 @@ def list_countersigned_agreement_file(supplier_id, framework_slug):
     supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
     if not supplier_framework['onFramework'] or supplier_framework['agreementStatus'] in (None, 'draft'):
         abort(404)
-    agreements_bucket = s3.S3(
-        current_app.config['DM_AGREEMENTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
+    agreements_bucket = get_bucket(current_app.config['DM_AGREEMENTS_BUCKET'])
     countersigned_agreement_document = agreements_bucket.get_key(supplier_framework.get('countersignedPath'))
 
     remove_countersigned_agreement_confirm = convert_to_boolean(request.args.get('remove_countersigned_agreement'))
@@ -550,10 +587,7 @@ def upload_countersigned_agreement_file(supplier_id, framework_slug):
     supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
     if not supplier_framework['onFramework'] or supplier_framework['agreementStatus'] in (None, 'draft'):
         abort(404)
-    agreement_id = supplier_framework['agreementId']
-    agreements_bucket = s3.S3(
-        current_app.config['DM_AGREEMENTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
+    agreements_bucket = get_bucket(current_app.config['DM_AGREEMENTS_BUCKET'])
     errors = {}
 
     if request.files.get('countersigned_agreement'):
@@ -563,36 +597,17 @@ def upload_countersigned_agreement_file(supplier_id, framework_slug):
             flash(COUNTERSIGNED_AGREEMENT_NOT_PDF_MESSAGE)
 
         if 'countersigned_agreement' not in errors.keys():
-            supplier_name = supplier_framework.get('declaration', {}).get('nameOfOrganisation')
-            if not supplier_name:
-                supplier_name = data_api_client.get_supplier(supplier_id)['suppliers']['name']
-            if supplier_framework['agreementStatus'] not in ['approved', 'countersigned']:
-                data_api_client.approve_agreement_for_countersignature(
-                    agreement_id,
-                    current_user.email_address,
-                    current_user.id
-                )
-
-            path = generate_timestamped_document_upload_path(
-                framework_slug, supplier_id, 'agreements', COUNTERPART_FILENAME
-            )
-            download_filename = generate_download_filename(supplier_id, COUNTERPART_FILENAME, supplier_name)
-            agreements_bucket.save(
-                path, the_file, acl='bucket-owner-full-control', move_prefix=None, download_filename=download_filename
-            )
-
-            data_api_client.update_framework_agreement(
-                agreement_id,
-                {"countersignedAgreementPath": path},
-                current_user.email_address
+            upload_countersigned_agreement(
+                data_api_client,
+                agreements_bucket,
+                supplier_id,
+                framework_slug,
+                supplier_framework,
+                the_file,
+                current_user.email_address,
+                current_user.id,
             )
-
-            data_api_client.create_audit_event(
-                audit_type=AuditTypes.upload_countersigned_agreement,
-                user=current_user.email_address,
-                object_type='suppliers',
-                object_id=supplier_id,
-                data={'upload_countersigned_agreement': path})
+            agreements_queue_cache.set_agreement_status(framework_slug, supplier_id, "countersigned")
 
             flash(UPLOAD_COUNTERSIGNED_AGREEMENT_MESSAGE)
 
@@ -609,9 +624,7 @@ def upload_countersigned_agreement_file(supplier_id, framework_slug):
 def remove_countersigned_agreement_file(supplier_id, framework_slug):
     supplier_framework = data_api_client.get_supplier_framework_info(supplier_id, framework_slug)['frameworkInterest']
     document = supplier_framework.get('countersignedPath')
-    agreements_bucket = s3.S3(
-        current_app.config['DM_AGREEMENTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
+    agreements_bucket = get_bucket(current_app.config['DM_AGREEMENTS_BUCKET'])
 
     if request.method == 'GET':
         return redirect(url_for(
@@ -629,6 +642,9 @@ def remove_countersigned_agreement_file(supplier_id, framework_slug):
             current_user.email_address
         )
         agreements_bucket.delete_key(document)
+        signed_url_cache.forget(current_app.config['DM_AGREEMENTS_BUCKET'], document)
+        # the agreement was approved before it could be countersigned, and it's still approved
+        agreements_queue_cache.set_agreement_status(framework_slug, supplier_id, "approved")
 
         data_api_client.create_audit_event(
             audit_type=AuditTypes.delete_countersigned_agreement,
@@ -660,7 +676,7 @@ def edit_supplier_declaration_section(supplier_id, framework_slug, section_id):
             raise
         declaration = {}
 
-    content = content_loader.get_manifest(framework_slug, 'declaration').filter(declaration, inplace_allowed=True)
+    content = content_loader.get_filtered_manifest(framework_slug, 'declaration', declaration)
     section = content.get_section(section_id)
     if section is None:
         abort(404)
@@ -691,7 +707,7 @@ def update_supplier_declaration_section(supplier_id, framework_slug, section_id)
             raise
         declaration = {}
 
-    content = content_loader.get_manifest(framework_slug, 'declaration').filter(declaration, inplace_allowed=True)
+    content = content_loader.get_filtered_manifest(framework_slug, 'declaration', declaration)
     section = content.get_section(section_id)
     if section is None:
         abort(404)
@@ -731,6 +747,7 @@ def find_supplier_users():
 @role_required('admin', 'admin-ccs-category')
 def unlock_user(user_id):
     user = data_api_client.update_user(user_id, locked=False, updater=current_user.email_address)
+    logged_in_user_cache.invalidate(user_id)
     if "source" in request.form:
         return redirect(request.form["source"])
     return redirect(url_for('.find_supplier_users', supplier_id=user['users']['supplier']['supplierId']))
@@ -740,6 +757,7 @@ def unlock_user(user_id):
 @role_required('admin', 'admin-ccs-category')
 def activate_user(user_id):
     user = data_api_client.update_user(user_id, active=True, updater=current_user.email_address)
+    logged_in_user_cache.invalidate(user_id)
     if "source" in request.form:
         return redirect(request.form["source"])
     return redirect(url_for('.find_supplier_users', supplier_id=user['users']['supplier']['supplierId']))
@@ -749,6 +767,7 @@ def activate_user(user_id):
 @role_required('admin', 'admin-ccs-category')
 def deactivate_user(user_id):
     user = data_api_client.update_user(user_id, active=False, updater=current_user.email_address)
+    logged_in_user_cache.invalidate(user_id)
     if "source" in request.form:
         return redirect(request.form["source"])
     return redirect(url_for('.find_supplier_users', supplier_id=user['users']['supplier']['supplierId']))
@@ -784,6 +803,7 @@ def move_user_to_new_supplier(supplier_id):
                 active=True,
                 updater=current_user.email_address
             )
+            logged_in_user_cache.invalidate(user['users']['id'])
             flash(SUPPLIER_USER_MESSAGES["user_moved"])
         else:
             flash(SUPPLIER_USER_MESSAGES["user_not_moved"], "error")
@@ -804,7 +824,7 @@ def find_supplier_services(supplier_id):
     remove_services_for_framework_slug = request.args.get('remove')
     publish_services_for_framework_slug = request.args.get('publish')
 
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = framework_catalogue.get_frameworks(data_api_client)
     supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
 
     frameworks_services = {
@@ -876,39 +896,84 @@ def toggle_supplier_services(supplier_id):
     if not services:
         abort(400, 'No {} services on framework'.format(toggle_action['old_status']))
 
-    for service in services:
-        data_api_client.update_service_status(
-            service['id'],
-            toggle_action['new_status'],
-            current_user.email_address,
-            wait_for_index=False,
-        )
+    status_change = BulkServiceStatusChange(
+        data_api_client,
+        supplier_id,
+        toggle_action['framework_slug'],
+        services,
+        toggle_action['new_status'],
+        current_user.email_address,
+    )
 
-    flash(
-        " ".join((
-            toggle_action['flash_message'].format(
-                supplier_name=services[0]['supplierName'],
-                framework_name=services[0]['frameworkName']
-            ),
-            SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE,
+    background_threshold = current_app.config['DM_BULK_SERVICE_STATUS_BACKGROUND_THRESHOLD']
+    if background_threshold and len(services) > background_threshold:
+        status_change.start()
+        return redirect(url_for(
+            '.view_supplier_services_status_change',
+            supplier_id=supplier_id,
+            status_change_id=status_change.id,
         ))
-    )
+
+    status_change.run()
+
+    errors = status_change.errors
+    if errors:
+        flash(
+            SUPPLIER_SERVICES_NOT_ALL_TOGGLED_MESSAGE.format(
+                failed_count=len(errors),
+                total_count=status_change.total_count,
+                framework_name=status_change.framework_name,
+                supplier_name=status_change.supplier_name,
+                service_ids=", ".join(sorted(errors)),
+            ),
+            'error'
+        )
+    else:
+        flash(
+            " ".join((
+                toggle_action['flash_message'].format(
+                    supplier_name=status_change.supplier_name,
+                    framework_name=status_change.framework_name,
+                ),
+                SUPPLIER_SERVICES_DELAYED_INDEX_MESSAGE,
+            ))
+        )
     return redirect(url_for('.find_supplier_services', supplier_id=supplier_id))
 
 
+@main.route('/suppliers/<int:supplier_id>/services/status-changes/<status_change_id>', methods=['GET'])
+@role_required('admin-ccs-category')
+def view_supplier_services_status_change(supplier_id, status_change_id):
+    # read from the job runner, which (with DM_JOBS_SHARED) can see jobs being run by any process
+    job = job_runner.get_job_state(status_change_id)
+    if job is None or job["name"] != BULK_SERVICE_STATUS_CHANGE_JOB_NAME or job["data"]["supplierId"] != supplier_id:
+        abort(404)
+
+    return render_template(
+        "view_supplier_services_status_change.html",
+        job=job,
+        status_change=job["data"],
+        failed_services=job["errors"],
+        finished=job["status"] in ("finished", "failed"),
+    )
+
+
 def _draft_services_annotated_unanswered_counts(framework_slug, draft_services):
+    draft_services = tuple(draft_services)
     try:
-        manifest = content_loader.get_manifest(framework_slug, "edit_service_as_admin")
+        unanswered_required_counts = draft_service_counts_cache.get_unanswered_required_counts(
+            content_loader,
+            framework_slug,
+            draft_services,
+        )
     except ContentNotFoundError:
         return None
 
     return tuple(
         {
             **draft_service,
-            "unansweredRequiredCount": count_unanswered_questions(
-                manifest.filter(draft_service).summary(draft_service)
-            )[0],
-        } for draft_service in draft_services
+            "unansweredRequiredCount": unanswered_required_count,
+        } for draft_service, unanswered_required_count in zip(draft_services, unanswered_required_counts)
     )
 
 
@@ -916,7 +981,7 @@ def _draft_services_annotated_unanswered_counts(framework_slug, draft_services):
 @role_required('admin-framework-manager', 'admin-ccs-sourcing')
 def find_supplier_draft_services(supplier_id):
     supplier = data_api_client.get_supplier(supplier_id)["suppliers"]
-    frameworks = data_api_client.find_frameworks()['frameworks']
+    frameworks = framework_catalogue.get_frameworks(data_api_client)
 
     if current_user.has_role('admin-ccs-sourcing'):
         visible_framework_statuses = ["pending", "standstill", "live", "expired"]
@@ -1,10 +1,10 @@
 from datetime import datetime
 
-from dmutils import s3
-from dmutils.documents import get_signed_url
 from dmutils.flask import timed_render_template as render_template
-from flask import abort, current_app, flash, redirect, request, Response, url_for
+from flask import abort, current_app, flash, redirect, request, Response, stream_with_context, url_for
 
+from ..helpers.frameworks import framework_catalogue
+from ..helpers.s3_buckets import get_signed_url
 from ..helpers.user_downloads import generate_user_csv
 from .. import main
 from ..auth import role_required
@@ -62,10 +62,6 @@ def user_list_page_for_framework(framework_slug):
 @main.route('/frameworks/<framework_slug>/users/<report_type>/download', methods=['GET'])
 @role_required('admin-framework-manager', 'admin-ccs-category', 'admin-ccs-data-controller')
 def download_supplier_user_list_report(framework_slug, report_type):
-    reports_bucket = s3.S3(
-        current_app.config['DM_REPORTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
-
     if report_type == 'official':
         path = f"{framework_slug}/reports/official-details-for-suppliers-{framework_slug}.csv"
     elif report_type == 'accounts':
@@ -73,7 +69,7 @@ def download_supplier_user_list_report(framework_slug, report_type):
     else:
         abort(404)
 
-    url = get_signed_url(reports_bucket, path, current_app.config['DM_ASSETS_URL'])
+    url = get_signed_url(current_app.config['DM_REPORTS_BUCKET'], path, current_app.config['DM_ASSETS_URL'])
     if not url:
         abort(404)
 
@@ -83,7 +79,7 @@ def download_supplier_user_list_report(framework_slug, report_type):
 @main.route('/users/download/suppliers', methods=['GET'])
 @role_required('admin-framework-manager')
 def supplier_user_research_participants_by_framework():
-    frameworks = data_api_client.find_frameworks().get("frameworks")
+    frameworks = framework_catalogue.get_frameworks(data_api_client)
     frameworks = sorted(
         (fw for fw in frameworks if not (fw['status'] == 'coming' or (
             fw['status'] == 'expired' and fw['family'] != 'digital-outcomes-and-specialists'
@@ -108,13 +104,11 @@ def supplier_user_research_participants_by_framework():
 @main.route('/frameworks/<framework_slug>/user-research/download', methods=['GET'])
 @role_required('admin-framework-manager')
 def download_supplier_user_research_report(framework_slug):
-
-    reports_bucket = s3.S3(
-        current_app.config['DM_REPORTS_BUCKET'], endpoint_url=current_app.config.get("DM_S3_ENDPOINT_URL")
-    )
     path = "{framework_slug}/reports/user-research-suppliers-on-{framework_slug}.csv"
     url = get_signed_url(
-        reports_bucket, path.format(framework_slug=framework_slug), current_app.config['DM_ASSETS_URL']
+        current_app.config['DM_REPORTS_BUCKET'],
+        path.format(framework_slug=framework_slug),
+        current_app.config['DM_ASSETS_URL'],
     )
     if not url:
         abort(404)
@@ -122,6 +116,15 @@ def download_supplier_user_research_report(framework_slug):
     return redirect(url)
 
 
+def _generate_buyer_csv(users):
+    # `?order=api` skips sorting the buyers by name, so rows start arriving straight away
+    return stream_with_context(generate_user_csv(
+        users,
+        sort_by_name=request.args.get("order") != "api",
+        max_rows_in_memory=current_app.config["DM_USER_CSV_MAX_ROWS_IN_MEMORY"],
+    ))
+
+
 @main.route('/users/download/buyers', methods=['GET'])
 @role_required('admin-framework-manager')
 def download_buyers():
@@ -130,7 +133,7 @@ def download_buyers():
     users = data_api_client.find_users_iter(role="buyer")
 
     return Response(
-        generate_user_csv(users),
+        _generate_buyer_csv(users),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment;filename={}".format(download_filename),
@@ -150,7 +153,7 @@ def download_buyers_for_user_research():
     download_filename = "user-research-buyers-on-{}.csv".format(datetime.utcnow().strftime('%Y-%m-%d-at-%H-%M-%S'))
 
     return Response(
-        generate_user_csv(users),
+        _generate_buyer_csv(users),
         mimetype='text/csv',
         headers={
             "Content-Disposition": "attachment;filename={}".format(download_filename),
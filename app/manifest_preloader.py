@@ -0,0 +1,224 @@
+from concurrent.futures import ProcessPoolExecutor
+import copyreg
+from glob import glob
+from hashlib import sha1
+from io import BytesIO
+import os
+import pickle
+import sys
+from tempfile import NamedTemporaryFile
+from time import monotonic
+
+import dmcontent
+from dmcontent.content_loader import ContentLoader
+from dmcontent.errors import ContentNotFoundError
+from dmcontent.utils import TemplateField
+
+
+# the (question set, manifest) pairs loaded for every framework
+MANIFESTS = (
+    ("services", "edit_service_as_admin"),
+    ("declaration", "declaration"),
+)
+
+# bump this whenever the way manifests are pickled changes
+_CACHE_FORMAT_VERSION = 1
+
+
+def _reduce_template_field(template_field):
+    # a TemplateField's compiled template can't be pickled, so it's compiled again from its source when unpickled
+    return TemplateField, (template_field.source, template_field.markdown)
+
+
+class _ManifestPickler(pickle.Pickler):
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[TemplateField] = _reduce_template_field
+
+
+def _pickle_manifest(manifest_data):
+    buffer = BytesIO()
+    _ManifestPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(manifest_data)
+    return buffer.getvalue()
+
+
+def manifest_fingerprint(content_path, framework_slug, question_set, manifest):
+    """
+    Return a digest of the content files a manifest is generated from, and of everything else that affects how it's
+    generated and pickled. Files are compared by their contents rather than their modification times, which deploys
+    don't preserve.
+    """
+    framework_path = os.path.join(content_path, "frameworks", framework_slug)
+    digest = sha1(repr((
+        _CACHE_FORMAT_VERSION,
+        dmcontent.__version__,
+        sys.version_info[:2],
+        framework_slug,
+        question_set,
+        manifest,
+    )).encode("utf-8"))
+
+    paths = [os.path.join(framework_path, "manifests", f"{manifest}.yml")]
+    for directory, subdirectories, filenames in os.walk(os.path.join(framework_path, "questions", question_set)):
+        subdirectories.sort()
+        paths.extend(os.path.join(directory, filename) for filename in sorted(filenames))
+
+    for path in paths:
+        digest.update(os.path.relpath(path, framework_path).encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, framework_slug, manifest, fingerprint):
+    return os.path.join(cache_dir, f"{framework_slug}.{manifest}.{fingerprint}.pickle")
+
+
+def _write_to_cache(cache_path, pickled_manifest):
+    try:
+        with NamedTemporaryFile(dir=os.path.dirname(cache_path), delete=False) as f:
+            f.write(pickled_manifest)
+        os.replace(f.name, cache_path)
+    except OSError:
+        # the cache only saves the next process some time - it's not worth failing to start over
+        return
+
+    # drop the entries for earlier versions of the manifest's content
+    for stale_path in glob(cache_path.rsplit(".", 2)[0] + ".*.pickle"):
+        if stale_path != cache_path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+
+def _read_from_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _generate_manifest(content_path, framework_slug, question_set, manifest, cache_path=None):
+    """
+    Return a manifest's pickled data, generated from the content (and written to `cache_path`, if given). Run in a
+    process pool worker, so the manifest is handed back pickled.
+    """
+    pickled_manifest = _pickle_manifest(
+        ContentLoader(content_path).generate_manifest(framework_slug, question_set, manifest)
+    )
+    if cache_path:
+        _write_to_cache(cache_path, pickled_manifest)
+    return pickled_manifest
+
+
+def _usable_cache_dir(cache_dir, logger):
+    # unpickling runs whatever the pickle says to, so only use a cache no other user could have written to
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        cache_dir_stat = os.stat(cache_dir)
+    except OSError as e:
+        logger.warning(f"Not caching manifests: could not create {cache_dir}: {e}")
+        return None
+
+    if cache_dir_stat.st_uid != os.getuid() or cache_dir_stat.st_mode & 0o022:
+        logger.warning(f"Not caching manifests: {cache_dir} is writable by other users")
+        return None
+    return cache_dir
+
+
+def preload_manifests(content_loader, framework_slugs, logger, cache_dir=None, processes=0):
+    """
+    Load each of the `MANIFESTS` of each of `framework_slugs` into `content_loader`, just as `load_manifest` would,
+    returning the `(framework_slug, manifest)`s that were loaded and those there was no content for.
+
+    Manifests are generated from the content in a pool of `processes` processes (if set), and kept in `cache_dir` (if
+    set) - keyed on a fingerprint of the content they're generated from - so processes starting up with the same
+    content can simply read them from there. Manifests already loaded into `content_loader` are left as they are.
+    """
+    started_at = monotonic()
+    if cache_dir:
+        cache_dir = _usable_cache_dir(cache_dir, logger)
+
+    to_load = []
+    loaded = []
+    for framework_slug in framework_slugs:
+        for question_set, manifest in MANIFESTS:
+            # ContentLoader has no other way of telling whether a manifest has been loaded, short of building it
+            if manifest in content_loader._content[framework_slug]:
+                loaded.append((framework_slug, manifest))
+                continue
+            cache_path = cache_dir and _cache_path(
+                cache_dir,
+                framework_slug,
+                manifest,
+                manifest_fingerprint(content_loader.content_path, framework_slug, question_set, manifest),
+            )
+            to_load.append((framework_slug, question_set, manifest, cache_path))
+
+    # cached manifests are read here, so that a pool (which takes longer to start than reading them does) is only
+    # started for those that need generating
+    results = {}
+    to_generate = []
+    for manifest_to_load in to_load:
+        pickled_manifest = _read_from_cache(manifest_to_load[3]) if manifest_to_load[3] else None
+        if pickled_manifest is None:
+            to_generate.append(manifest_to_load)
+        else:
+            results[manifest_to_load] = (pickled_manifest, True)
+
+    if processes and len(to_generate) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(to_generate))) as executor:
+            futures = {
+                manifest_to_load: executor.submit(_generate_manifest, content_loader.content_path, *manifest_to_load)
+                for manifest_to_load in to_generate
+            }
+            for manifest_to_load, future in futures.items():
+                results[manifest_to_load] = future.exception() or (future.result(), False)
+    else:
+        for manifest_to_load in to_generate:
+            try:
+                results[manifest_to_load] = (_generate_manifest(content_loader.content_path, *manifest_to_load), False)
+            except ContentNotFoundError as e:
+                results[manifest_to_load] = e
+
+    missing = []
+    from_cache_count = 0
+    for manifest_to_load in to_load:
+        framework_slug, question_set, manifest, cache_path = manifest_to_load
+        result = results[manifest_to_load]
+        if isinstance(result, ContentNotFoundError):
+            missing.append((framework_slug, manifest))
+            continue
+        if isinstance(result, BaseException):
+            raise result
+
+        pickled_manifest, from_cache = result
+        try:
+            manifest_data = pickle.loads(pickled_manifest)
+        except Exception:
+            if not from_cache:
+                raise
+            logger.warning(f"Discarding unreadable cached {manifest} manifest for {framework_slug}")
+            try:
+                os.remove(cache_path)
+            except OSError:
+                # it's about to be replaced anyway, if it can be
+                pass
+            manifest_data = pickle.loads(
+                _generate_manifest(content_loader.content_path, framework_slug, question_set, manifest, cache_path)
+            )
+        else:
+            from_cache_count += from_cache
+
+        content_loader._content[framework_slug][manifest] = manifest_data
+        loaded.append((framework_slug, manifest))
+
+    logger.info(
+        f"Preloaded {len(to_load) - len(missing)} manifests ({from_cache_count} from cache) "
+        f"in {monotonic() - started_at:.2f}s"
+    )
+    return loaded, missing
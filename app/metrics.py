@@ -1,5 +1,6 @@
 from flask import Blueprint
 from dmutils.metrics import DMGDSMetrics
+from gds_metrics.metrics import Counter
 
 
 metrics = Blueprint('metrics', __name__)
@@ -7,3 +8,23 @@ metrics = Blueprint('metrics', __name__)
 gds_metrics = DMGDSMetrics()
 
 metrics.add_url_rule(gds_metrics.metrics_path, 'metrics', gds_metrics.metrics_endpoint)
+
+
+FRAMEWORK_CATALOGUE_LOOKUPS_TOTAL = Counter(
+    'framework_catalogue_lookups_total',
+    'Framework catalogue lookups, by whether they were served from the cache',
+    ['result'],
+)
+
+FRAMEWORK_CATALOGUE_REFRESHES_TOTAL = Counter(
+    'framework_catalogue_refreshes_total',
+    'Background refreshes of a stale framework catalogue',
+    ['outcome'],
+)
+
+SUPPLIER_SEARCH_LOOKUPS_TOTAL = Counter(
+    'supplier_search_lookups_total',
+    'Supplier searches, by whether they were served from the cache, shared with an identical search already being '
+    'made, or made to the API',
+    ['result'],
+)
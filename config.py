@@ -1,4 +1,5 @@
 import os
+import tempfile
 import jinja2
 from dmutils.status import get_version_label
 from dmutils.asset_fingerprint import AssetFingerprinter
@@ -20,6 +21,13 @@ class Config(object):
     SESSION_COOKIE_SAMESITE = "Lax"
 
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
+    # the session cookie is only re-issued (with a new expiry) when the session has changed - see refresh_session -
+    # rather than on every request
+    SESSION_REFRESH_EACH_REQUEST = False
+    # fraction of PERMANENT_SESSION_LIFETIME after which a request re-issues the session cookie, so the session expires
+    # between PERMANENT_SESSION_LIFETIME * (1 - this) and PERMANENT_SESSION_LIFETIME after the last request. 0 re-issues
+    # it on every request
+    DM_SESSION_REFRESH_FRACTION = 0.1
 
     DM_COOKIE_PROBE_EXPECT_PRESENT = True
 
@@ -34,6 +42,99 @@ class Config(object):
     DM_ASSETS_URL = None
     DM_REDIS_SERVICE_NAME = None
 
+    # seconds for which the list of frameworks from the API is served from a process-wide cache before being refreshed
+    # in the background. 0 disables the cache. purging it only clears the purging process's copy unless
+    # DM_FRAMEWORK_CATALOGUE_SHARED is set, which has every process check redis for purges on each lookup
+    DM_FRAMEWORK_CATALOGUE_TTL = 300
+    DM_FRAMEWORK_CATALOGUE_SHARED = False
+
+    # size of the (per-process) thread pool used to make independent data API calls from a view concurrently
+    DM_API_GATHER_MAX_WORKERS = 8
+
+    # suspending or unsuspending more than this many of a supplier's services at once is done in the background, with a
+    # page showing its progress. 0 means always do it within the request
+    DM_BULK_SERVICE_STATUS_BACKGROUND_THRESHOLD = 50
+
+    # size of the (per-process) thread pool running long jobs (such as bulk service status changes) in the background.
+    # 0 runs them within the request starting them. the state of the DM_JOBS_MAX_TRACKED most recent jobs is kept for
+    # their progress to be viewed - setting DM_JOBS_SHARED also keeps it in redis, to view it from any process. API
+    # calls failing with a transient error are made up to DM_JOBS_API_ATTEMPTS times, backing off exponentially from
+    # DM_JOBS_API_RETRY_DELAY seconds. the calls jobs make concurrently share a further pool of DM_JOBS_MAX_TASK_WORKERS
+    # threads, separate from the DM_API_GATHER_MAX_WORKERS one serving views
+    DM_JOBS_MAX_WORKERS = 4
+    DM_JOBS_MAX_TASK_WORKERS = 8
+    DM_JOBS_MAX_TRACKED = 100
+    DM_JOBS_SHARED = False
+    DM_JOBS_SHARED_TTL = 24 * 60 * 60
+    DM_JOBS_API_ATTEMPTS = 3
+    DM_JOBS_API_RETRY_DELAY = 0.5
+
+    # the most (in bytes) that can be posted to the views uploading documents (communications and service documents).
+    # bigger requests are turned away from their Content-Length, before any of them is read
+    DM_DOCUMENT_UPLOAD_MAX_REQUEST_SIZE = 50 * 1024 * 1024
+    # documents of this many bytes or more are uploaded to S3 in parts of DM_S3_MULTIPART_CHUNK_SIZE bytes, up to
+    # DM_S3_MULTIPART_MAX_CONCURRENCY of them at once, rather than in one request
+    DM_S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+    DM_S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+    DM_S3_MULTIPART_MAX_CONCURRENCY = 4
+
+    # sorting a user CSV export with more users than this spills to temporary files rather than holding them in memory
+    DM_USER_CSV_MAX_ROWS_IN_MEMORY = 20000
+
+    # number of services' revision diffs kept (per process) for the service updates pages. 0 disables the cache.
+    # setting DM_SERVICE_DIFF_CACHE_SHARED also keeps them in redis, to share them between processes
+    DM_SERVICE_DIFF_CACHE_SIZE = 200
+    DM_SERVICE_DIFF_CACHE_SHARED = False
+    DM_SERVICE_DIFF_CACHE_SHARED_TTL = 24 * 60 * 60
+    # build the diffs for the services listed on the unapproved edits page in the background when it's viewed
+    DM_SERVICE_DIFF_CACHE_PREWARM = False
+
+    # the service updates page walks back through at most (about) this many of a service's unapproved edits, after
+    # which it only looks at the oldest of them
+    DM_SERVICE_UPDATES_MAX_AUDIT_EVENTS = 1000
+
+    # seconds for which listings of S3 bucket contents (e.g. framework communications) are cached by each process.
+    # changes made through this app are reflected in them straight away. 0 disables the cache
+    DM_S3_LISTING_CACHE_TTL = 300
+
+    # seconds for which a signed URL for an S3 object (e.g. a supplier's agreement or a report) is reused by each
+    # process. 0 disables the cache
+    DM_SIGNED_URL_CACHE_TTL = 240
+
+    # seconds for which each process keeps its index of a framework's returned agreements for stepping through the
+    # countersigning queue. changes made through this app are reflected in it straight away. 0 disables the cache
+    DM_AGREEMENTS_QUEUE_TTL = 300
+
+    # number of draft services' counts of unanswered questions kept (per process) for listing a supplier's drafts. 0
+    # disables the cache. when more than DM_DRAFT_SERVICE_COUNTS_PROCESS_THRESHOLD drafts need counting at once they're
+    # split between DM_DRAFT_SERVICE_COUNTS_PROCESSES processes, if that's set
+    DM_DRAFT_SERVICE_COUNTS_CACHE_SIZE = 20000
+    DM_DRAFT_SERVICE_COUNTS_PROCESSES = 0
+    DM_DRAFT_SERVICE_COUNTS_PROCESS_THRESHOLD = 500
+
+    # remember the data API's responses to reads for the rest of the request they're made in, forgetting them all on any
+    # write
+    DM_DATA_API_REQUEST_CACHE = True
+
+    # seconds for which each process keeps the user loaded for a logged in session, and how many of them it keeps.
+    # changes made to users through this app are reflected straight away. 0 disables the cache
+    DM_LOGGED_IN_USER_CACHE_TTL = 60
+    DM_LOGGED_IN_USER_CACHE_SIZE = 100
+
+    # frameworks' manifests are loaded at startup by a pool of this many processes. 0 loads them within the app's own
+    # process
+    DM_MANIFEST_PRELOAD_PROCESSES = 4
+    # directory in which loaded manifests are kept, keyed on a fingerprint of their content, for processes started later
+    # to reuse. None disables the cache
+    DM_MANIFEST_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'digitalmarketplace-admin-frontend-manifests')
+
+    # seconds for which each process keeps the results of supplier searches (e.g. as typed into the supplier
+    # typeahead), and how many of them it keeps. changes made to suppliers through this app clear the cache of the
+    # process making them, but other processes can show results from before a change for up to this long. 0 disables
+    # the cache
+    DM_SUPPLIER_SEARCH_CACHE_TTL = 30
+    DM_SUPPLIER_SEARCH_CACHE_SIZE = 500
+
     STATIC_URL_PATH = '/admin/static'
     ASSET_PATH = STATIC_URL_PATH + '/'
     BASE_TEMPLATE_DATA = {
@@ -98,6 +199,22 @@ class Test(Config):
     INVITE_EMAIL_TOKEN_NS = 'SALT'
     DM_NOTIFY_API_KEY = "not_a_real_key-00000000-fake-uuid-0000-000000000000"
 
+    # most view tests expect find_frameworks to be called on each request
+    DM_FRAMEWORK_CATALOGUE_TTL = 0
+    DM_BULK_SERVICE_STATUS_BACKGROUND_THRESHOLD = 0
+    DM_JOBS_MAX_WORKERS = 0
+    DM_JOBS_API_RETRY_DELAY = 0
+    DM_SERVICE_DIFF_CACHE_SIZE = 0
+    DM_S3_LISTING_CACHE_TTL = 0
+    DM_SIGNED_URL_CACHE_TTL = 0
+    DM_AGREEMENTS_QUEUE_TTL = 0
+    DM_LOGGED_IN_USER_CACHE_TTL = 0
+    DM_DRAFT_SERVICE_COUNTS_CACHE_SIZE = 0
+    DM_SESSION_REFRESH_FRACTION = 0
+    DM_MANIFEST_PRELOAD_PROCESSES = 0
+    DM_MANIFEST_CACHE_DIR = None
+    DM_SUPPLIER_SEARCH_CACHE_TTL = 0
+
 
 class Development(Config):
     DEBUG = True
@@ -132,6 +249,11 @@ class Live(Config):
     AUTHENTICATION = True
     DM_HTTP_PROTO = 'https'
 
+    # deployed apps run several processes, any of which may serve a background job's progress page (or have a stale
+    # list of frameworks after one has been changed)
+    DM_JOBS_SHARED = True
+    DM_FRAMEWORK_CATALOGUE_SHARED = True
+
     # use of invalid email addresses with live api keys annoys Notify
     DM_NOTIFY_REDIRECT_DOMAINS_TO_ADDRESS = {
         "example.com": "success@simulator.amazonses.com",
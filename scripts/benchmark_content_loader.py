@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of getting a content loader for a request, with the edit_service_as_admin and declaration manifests of
+every framework in the content repo (app/content) loaded into it.
+
+Compares deep-copying the loaded `ContentLoader`, which is what each thread used to do on its first request (so a
+process paid it once per thread, and held a copy of the manifests per thread), against sharing a single
+`_SealedContentLoader` around it. Both are timed including a `get_manifest` call for each manifest, as requests
+using the loader make. The memory each deep copy takes up is shown too.
+
+    python scripts/benchmark_content_loader.py [threads] [repeats]
+"""
+from copy import deepcopy
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dmcontent.content_loader import ContentLoader  # noqa: E402
+from dmcontent.errors import ContentNotFoundError  # noqa: E402
+
+from app import _SealedContentLoader  # noqa: E402
+
+
+CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "content")
+
+MANIFESTS = (
+    ("services", "edit_service_as_admin"),
+    ("declaration", "declaration"),
+)
+
+
+def _best(call, repeats):
+    return min(timeit.repeat(call, number=1, repeat=repeats))
+
+
+def _copy_size(content_loader):
+    tracemalloc.start()
+    try:
+        copy = deepcopy(content_loader)
+        size, _ = tracemalloc.get_traced_memory()
+        del copy
+    finally:
+        tracemalloc.stop()
+    return size
+
+
+def main(threads=16, repeats=10):
+    content_loader = ContentLoader(CONTENT_PATH)
+    loaded = []
+    for framework_slug in sorted(os.listdir(os.path.join(CONTENT_PATH, "frameworks"))):
+        for question_set, manifest_name in MANIFESTS:
+            try:
+                content_loader.load_manifest(framework_slug, question_set, manifest_name)
+            except ContentNotFoundError:
+                continue
+            loaded.append((framework_slug, manifest_name))
+
+    sealed_content_loader = _SealedContentLoader(content_loader)
+
+    def get_manifests(loader):
+        for framework_slug, manifest_name in loaded:
+            loader.get_manifest(framework_slug, manifest_name)
+
+    def deepcopy_loader():
+        get_manifests(deepcopy(content_loader))
+
+    def shared_loader():
+        get_manifests(sealed_content_loader)
+
+    deepcopy_time = _best(deepcopy_loader, repeats)
+    shared_time = _best(shared_loader, repeats)
+    copy_size = _copy_size(content_loader)
+
+    print(f"{len(loaded)} manifests loaded, {threads} threads per process")
+    print("{:<12} {:>16} {:>20} {:>20}".format("loader", "first request", "all threads' first", "extra memory"))
+    print("{:<12} {:>14.2f}ms {:>18.2f}ms {:>18.2f}MB".format(
+        "deepcopy", deepcopy_time * 1000, deepcopy_time * 1000 * threads, copy_size * threads / (1024 * 1024),
+    ))
+    print("{:<12} {:>14.2f}ms {:>18.2f}ms {:>18.2f}MB".format(
+        "shared", shared_time * 1000, shared_time * 1000 * threads, 0,
+    ))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of building a diff table for a single question with a large multi-paragraph answer, as shown on the
+service updates page.
+
+Compares `diff_tools._render_diff_table` against difflib.HtmlDiff's table plus an lxml parse/serialise round trip,
+which is (a lower bound on) what building each table used to cost.
+
+    python scripts/benchmark_diff_tables.py [paragraphs] [repeats]
+"""
+import difflib
+import os
+import random
+import sys
+import timeit
+
+from lxml import html
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.main.helpers.diff_tools import _render_diff_table  # noqa: E402
+
+
+WORDS = (
+    "service cloud support hosting data secure user access backup recovery network monitoring software platform "
+    "integration migration training compliance audit availability performance"
+).split()
+
+
+def _paragraphs(count, rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) for _ in range(count)]
+
+
+def _edited(paragraphs, rng):
+    edited = list(paragraphs)
+    for _ in range(max(1, len(edited) // 10)):
+        i = rng.randrange(len(edited))
+        words = edited[i].split()
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+        edited[i] = " ".join(words)
+    del edited[rng.randrange(len(edited))]
+    edited.insert(rng.randrange(len(edited)), " ".join(rng.choice(WORDS) for _ in range(60)))
+    return edited
+
+
+def _html_diff_round_trip(lines_1, lines_2):
+    return html.tostring(
+        html.fragment_fromstring(difflib.HtmlDiff().make_table(lines_1, lines_2)),
+        encoding="unicode",
+    )
+
+
+def main(paragraph_count=50, repeats=20):
+    rng = random.Random(1234)
+    lines_1 = _paragraphs(paragraph_count, rng)
+    lines_2 = _edited(lines_1, rng)
+
+    for name, build_table in (
+        ("HtmlDiff + lxml round trip", _html_diff_round_trip),
+        ("_render_diff_table", _render_diff_table),
+    ):
+        best = min(timeit.repeat(lambda: build_table(lines_1, lines_2), number=1, repeat=repeats))
+        print("{:<28} {:8.2f}ms per question ({} paragraphs)".format(name, best * 1000, paragraph_count))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
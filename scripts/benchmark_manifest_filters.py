@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark of filtering the edit_service_as_admin and declaration manifests of every framework in the content
+repo (app/content), for each of their lots, as the service and declaration pages do.
+
+Compares dmcontent's `ContentManifest.filter` against filtering with the manifest's precompiled `ManifestFilterPlan`.
+Both are timed including the `get_manifest` call that builds the manifest being filtered, which is timed on its own
+for reference.
+
+    python scripts/benchmark_manifest_filters.py [repeats]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dmcontent.content_loader import ContentLoader  # noqa: E402
+from dmcontent.errors import ContentNotFoundError  # noqa: E402
+
+from app.main.helpers.manifests import ManifestFilterPlan  # noqa: E402
+
+
+CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "content")
+
+MANIFESTS = (
+    ("services", "edit_service_as_admin"),
+    ("declaration", "declaration"),
+)
+
+
+def _contexts(manifest):
+    # a context for each lot the manifest depends on (or none), with every other depended-on key set to the first
+    # value it's depended on being - so as many questions as possible are checked
+    depends = [
+        depends
+        for section in manifest.sections
+        for question in section.questions
+        for depends in question.get("depends", ())
+    ]
+    other_values = {d["on"]: d["being"][0] for d in depends if d["on"] != "lot"}
+    lots = sorted({lot for d in depends if d["on"] == "lot" for lot in d["being"]}) or [None]
+    return [{**other_values, **({"lot": lot} if lot else {})} for lot in lots]
+
+
+def _best(call, repeats):
+    return min(timeit.repeat(call, number=1, repeat=repeats))
+
+
+def main(repeats=50):
+    content_loader = ContentLoader(CONTENT_PATH)
+    framework_slugs = sorted(os.listdir(os.path.join(CONTENT_PATH, "frameworks")))
+
+    print("{:<40} {:<22} {:>6} {:>12} {:>12} {:>12}".format(
+        "framework", "manifest", "lots", "get_manifest", "filter", "filter plan",
+    ))
+    for framework_slug in framework_slugs:
+        for question_set, manifest_name in MANIFESTS:
+            try:
+                content_loader.load_manifest(framework_slug, question_set, manifest_name)
+                manifest = content_loader.get_manifest(framework_slug, manifest_name)
+            except ContentNotFoundError:
+                continue
+
+            plan = ManifestFilterPlan(manifest)
+            contexts = _contexts(manifest)
+
+            def get_manifests():
+                for context in contexts:
+                    content_loader.get_manifest(framework_slug, manifest_name)
+
+            def dmcontent_filter():
+                for context in contexts:
+                    content_loader.get_manifest(framework_slug, manifest_name).filter(context, inplace_allowed=True)
+
+            def plan_filter():
+                for context in contexts:
+                    plan.filter(content_loader.get_manifest(framework_slug, manifest_name), context)
+
+            print("{:<40} {:<22} {:>6} {:>10.2f}ms {:>10.2f}ms {:>10.2f}ms".format(
+                framework_slug,
+                manifest_name,
+                len(contexts),
+                *(
+                    _best(call, repeats) * 1000 / len(contexts)
+                    for call in (get_manifests, dmcontent_filter, plan_filter)
+                )
+            ))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,91 @@
+import mock
+import pytest
+
+from app.main.helpers.agreements import AgreementsQueue, AgreementsQueueCache
+
+
+_supplier_frameworks = (
+    {"supplierId": 4321, "agreementStatus": "signed"},
+    {"supplierId": 1234, "agreementStatus": "on-hold"},
+    {"supplierId": 31415, "agreementStatus": "signed"},
+    {"supplierId": 141, "agreementStatus": "countersigned"},
+    {"supplierId": 151, "agreementStatus": "on-hold"},
+    {"supplierId": 99, "agreementStatus": "approved"},
+)
+
+
+class TestAgreementsQueue:
+    @pytest.mark.parametrize("supplier_id,statuses,expected_next_supplier_id", (
+        (4321, None, 1234),
+        (99, None, None),
+        (4321, ["on-hold"], 1234),
+        (1234, ["on-hold"], 151),
+        (151, ["on-hold"], None),
+        (4321, ["approved", "countersigned"], 141),
+        (141, ["approved", "countersigned"], 99),
+        (1234, ["not-a-status"], None),
+    ))
+    def test_next_supplier_id(self, supplier_id, statuses, expected_next_supplier_id):
+        queue = AgreementsQueue(_supplier_frameworks)
+        assert queue.next_supplier_id(supplier_id, statuses) == expected_next_supplier_id
+
+    def test_unknown_supplier(self):
+        queue = AgreementsQueue(_supplier_frameworks)
+        assert 999 not in queue
+        with pytest.raises(KeyError):
+            queue.next_supplier_id(999)
+
+    def test_set_agreement_status(self):
+        queue = AgreementsQueue(_supplier_frameworks)
+        queue.set_agreement_status(31415, "on-hold")
+        queue.set_agreement_status(151, "approved")
+
+        assert queue.next_supplier_id(1234, ["on-hold"]) == 31415
+        assert queue.next_supplier_id(31415, ["on-hold"]) is None
+        assert queue.next_supplier_id(4321, ["signed"]) is None
+        assert queue.next_supplier_id(4321, ["approved"]) == 151
+        # the order itself doesn't change
+        assert queue.next_supplier_id(1234) == 31415
+
+
+class TestAgreementsQueueCache:
+    def setup_method(self, method):
+        self.now = 0
+        self.cache = AgreementsQueueCache(ttl=60, clock=lambda: self.now)
+        self.fetch_supplier_frameworks = mock.Mock(return_value=_supplier_frameworks)
+
+    def _next_supplier_id(self, supplier_id, statuses=None):
+        return self.cache.next_supplier_id("g-cloud-8", supplier_id, statuses, self.fetch_supplier_frameworks)
+
+    def test_queue_is_cached_until_it_expires(self):
+        assert self._next_supplier_id(4321) == 1234
+        self.now = 59
+        assert self._next_supplier_id(1234) == 31415
+        assert self.fetch_supplier_frameworks.call_count == 1
+
+        self.now = 60
+        self._next_supplier_id(31415)
+        assert self.fetch_supplier_frameworks.call_count == 2
+
+    def test_unknown_supplier_refetches_queue(self):
+        self._next_supplier_id(4321)
+        self.fetch_supplier_frameworks.return_value = _supplier_frameworks + ({"supplierId": 27},)
+
+        assert self._next_supplier_id(27) is None
+        assert self.fetch_supplier_frameworks.call_count == 2
+
+        with pytest.raises(KeyError):
+            self._next_supplier_id(999)
+
+    def test_agreement_status_changes_update_cached_queue(self):
+        self._next_supplier_id(4321)
+        self.cache.set_agreement_status("g-cloud-8", 31415, "on-hold")
+
+        assert self._next_supplier_id(1234, ["on-hold"]) == 31415
+        assert self.fetch_supplier_frameworks.call_count == 1
+
+    def test_ttl_of_zero_disables_cache(self):
+        self.cache.ttl = 0
+        self._next_supplier_id(4321)
+        self._next_supplier_id(1234)
+        assert self.fetch_supplier_frameworks.call_count == 2
@@ -0,0 +1,130 @@
+from functools import partial
+from threading import Lock
+import time
+
+import pytest
+from dmapiclient import HTTPError
+from flask import request
+
+from app.main.helpers.concurrency import gather, prefetch
+from ...helpers import BaseApplicationTest, Response
+
+
+class FakeAPIClient:
+    """Stand-in for the data API client whose calls take `latency` seconds, keeping track of how many overlap"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = self.max_in_flight = 0
+        self._lock = Lock()
+
+    def _call(self, result):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def get_supplier(self, supplier_id):
+        return self._call({"suppliers": {"id": supplier_id}})
+
+    def get_framework(self, framework_slug):
+        return self._call({"frameworks": {"slug": framework_slug}})
+
+    def get_supplier_framework_info(self, supplier_id, framework_slug):
+        return self._call({"frameworkInterest": {"supplierId": supplier_id, "frameworkSlug": framework_slug}})
+
+    def raise_error(self, status_code):
+        return self._call(HTTPError(Response(status_code)))
+
+
+class TestGather(BaseApplicationTest):
+    def test_calls_are_made_concurrently(self):
+        client = FakeAPIClient(latency=0.2)
+
+        with self.app.test_request_context("/admin/suppliers/1234/agreements/g-cloud-12"):
+            start = time.perf_counter()
+            supplier, framework, supplier_framework = gather(
+                partial(client.get_supplier, 1234),
+                partial(client.get_framework, "g-cloud-12"),
+                partial(client.get_supplier_framework_info, 1234, "g-cloud-12"),
+            )
+            duration = time.perf_counter() - start
+
+        assert supplier == {"suppliers": {"id": 1234}}
+        assert framework == {"frameworks": {"slug": "g-cloud-12"}}
+        assert supplier_framework == {"frameworkInterest": {"supplierId": 1234, "frameworkSlug": "g-cloud-12"}}
+        assert client.max_in_flight == 3
+        # bounded by the slowest call, not the sum of them
+        assert duration < 0.4
+
+    def test_first_error_in_argument_order_is_raised(self):
+        slow_client, fast_client = FakeAPIClient(latency=0.2), FakeAPIClient(latency=0)
+
+        with self.app.test_request_context("/"):
+            with pytest.raises(HTTPError) as exc_info:
+                gather(
+                    partial(fast_client.get_supplier, 1234),
+                    partial(slow_client.raise_error, 404),
+                    partial(fast_client.raise_error, 503),
+                )
+
+        assert exc_info.value.status_code == 404
+
+    def test_calls_have_request_context(self):
+        with self.app.test_request_context("/admin/some/path"):
+            assert gather(lambda: request.path, lambda: request.path) == ["/admin/some/path", "/admin/some/path"]
+
+    def test_nested_gather(self):
+        with self.app.test_request_context("/"):
+            assert gather(
+                lambda: gather(lambda: 1, lambda: 2),
+                lambda: gather(lambda: 3, lambda: 4),
+            ) == [[1, 2], [3, 4]]
+
+
+class TestPrefetch(BaseApplicationTest):
+    def test_yields_items_in_order(self):
+        with self.app.test_request_context("/"):
+            assert list(prefetch(iter(range(10)), buffer_size=3)) == list(range(10))
+
+    def test_fetches_ahead_while_items_are_processed(self):
+        def slow_pages():
+            for page in range(3):
+                time.sleep(0.2)
+                yield from (page * 2, page * 2 + 1)
+
+        with self.app.test_request_context("/"):
+            start = time.perf_counter()
+            for _ in prefetch(slow_pages(), buffer_size=2):
+                time.sleep(0.1)
+            duration = time.perf_counter() - start
+
+        # fetching 0.6s and processing 0.6s overlap rather than adding up
+        assert duration < 1.0
+
+    def test_errors_are_raised_after_preceding_items(self):
+        def failing():
+            yield 1
+            yield 2
+            raise HTTPError(Response(503))
+
+        items = []
+        with self.app.test_request_context("/"):
+            with pytest.raises(HTTPError):
+                for item in prefetch(failing(), buffer_size=5):
+                    items.append(item)
+
+        assert items == [1, 2]
+
+    def test_iterates_with_request_context(self):
+        with self.app.test_request_context("/admin/some/path"):
+            assert list(prefetch((request.path for _ in range(2)), buffer_size=1)) == [
+                "/admin/some/path", "/admin/some/path",
+            ]
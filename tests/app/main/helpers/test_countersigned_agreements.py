@@ -0,0 +1,218 @@
+from io import BytesIO
+import os
+from zipfile import ZipFile
+
+import mock
+from dmapiclient import HTTPError
+from dmapiclient.audit import AuditTypes
+from dmtestutils.fixtures import valid_pdf_bytes
+from freezegun import freeze_time
+
+from app.main.helpers.countersigned_agreements import BulkCountersignedAgreementUpload
+from ...helpers import BaseApplicationTest, Response
+
+
+def _zip_file(files):
+    zip_bytes = BytesIO()
+    with ZipFile(zip_bytes, "w") as zip_file:
+        for name, contents in files.items():
+            zip_file.writestr(name, contents)
+    zip_bytes.seek(0)
+    return zip_bytes
+
+
+@freeze_time('2016-12-25 06:30:01')
+class TestBulkCountersignedAgreementUpload(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.client = mock.Mock()
+        self.client.get_supplier_framework_info.side_effect = lambda supplier_id, framework_slug: {
+            "frameworkInterest": {
+                "onFramework": supplier_id != 3,
+                "agreementStatus": "signed",
+                "agreementId": supplier_id * 10,
+                "declaration": {"nameOfOrganisation": "Supplier {}".format(supplier_id)},
+            }
+        }
+        self.upload = BulkCountersignedAgreementUpload(self.client, "g-cloud-12", "test@example.com", 123)
+
+        self.agreements_queue_cache_patch = mock.patch(
+            "app.main.helpers.countersigned_agreements.agreements_queue_cache", autospec=True,
+        )
+        self.agreements_queue_cache = self.agreements_queue_cache_patch.start()
+
+    def teardown_method(self, method):
+        self.agreements_queue_cache_patch.stop()
+        self.app_context.pop()
+        super().teardown_method(method)
+
+    def test_files_are_uploaded_for_the_suppliers_they_are_named_after(self):
+        self.upload.add_file("1.pdf", BytesIO(valid_pdf_bytes))
+        self.upload.add_file("2-countersigned agreement.PDF", BytesIO(valid_pdf_bytes))
+
+        job = self.upload.start()
+
+        assert job.status == "finished"
+        assert job.completed == 2
+        assert job.errors == {}
+        assert job.result == {
+            "frameworkSlug": "g-cloud-12",
+            "uploaded": {
+                "1": {
+                    "filename": "1.pdf",
+                    "path": "g-cloud-12/agreements/1/1-agreement-countersignature-2016-12-25-063001.pdf",
+                },
+                "2": {
+                    "filename": "2-countersigned agreement.PDF",
+                    "path": "g-cloud-12/agreements/2/2-agreement-countersignature-2016-12-25-063001.pdf",
+                },
+            },
+            "failed": {},
+            "rejected": {},
+        }
+
+        assert sorted(self.client.approve_agreement_for_countersignature.call_args_list) == [
+            mock.call(10, "test@example.com", 123),
+            mock.call(20, "test@example.com", 123),
+        ]
+        assert sorted(self.s3.return_value.save.call_args_list) == [
+            mock.call(
+                "g-cloud-12/agreements/{0}/{0}-agreement-countersignature-2016-12-25-063001.pdf".format(supplier_id),
+                mock.ANY,
+                acl="bucket-owner-full-control",
+                move_prefix=None,
+                download_filename="Supplier_{0}-{0}-agreement-countersignature.pdf".format(supplier_id),
+            ) for supplier_id in (1, 2)
+        ]
+        assert mock.call(
+            audit_type=AuditTypes.upload_countersigned_agreement,
+            user="test@example.com",
+            object_type="suppliers",
+            object_id=1,
+            data={"upload_countersigned_agreement": job.result["uploaded"]["1"]["path"]},
+        ) in self.client.create_audit_event.call_args_list
+        assert sorted(self.agreements_queue_cache.set_agreement_status.call_args_list) == [
+            mock.call("g-cloud-12", 1, "countersigned"),
+            mock.call("g-cloud-12", 2, "countersigned"),
+        ]
+
+    def test_files_that_cant_be_uploaded_are_rejected(self):
+        self.upload.add_file("agreement.pdf", BytesIO(valid_pdf_bytes))
+        self.upload.add_file("1.pdf", BytesIO(valid_pdf_bytes))
+        self.upload.add_file("1-again.pdf", BytesIO(valid_pdf_bytes))
+        self.upload.add_file("2.pdf", BytesIO(b"not a pdf"))
+        self.upload.add_file("4.odt", BytesIO(valid_pdf_bytes))
+        self.upload.add_zip_file("5.zip", BytesIO(b"not a zip"))
+
+        job = self.upload.start()
+
+        assert self.upload.supplier_ids == (1,)
+        assert job.total == 1
+        assert job.result["rejected"] == {
+            "1-again.pdf": "More than one file was uploaded for supplier 1",
+            "2.pdf": "File is not a PDF",
+            "4.odt": "File is not a PDF",
+            "5.zip": "File is not a valid zip file",
+            "agreement.pdf": "File name doesn’t start with a supplier ID",
+        }
+        assert self.client.get_supplier_framework_info.call_args_list == [mock.call(1, "g-cloud-12")]
+
+    def test_files_in_zip_files_are_uploaded(self):
+        self.upload.add_zip_file("agreements.zip", _zip_file({
+            "agreements/1.pdf": valid_pdf_bytes,
+            "agreements/more/2.pdf": valid_pdf_bytes,
+            "__MACOSX/agreements/._1.pdf": b"",
+            "agreements/.DS_Store": b"",
+        }))
+
+        job = self.upload.start()
+
+        assert sorted(job.result["uploaded"]) == ["1", "2"]
+        assert job.result["rejected"] == {}
+
+    @mock.patch("app.main.helpers.countersigned_agreements._MAX_FILE_SIZE", 1024 * 1024)
+    def test_files_that_are_too_big_are_rejected(self):
+        self.upload.add_file("1.pdf", BytesIO(valid_pdf_bytes))
+        self.upload.add_file("2.pdf", BytesIO(valid_pdf_bytes + bytes(1024 * 1024)))
+        self.upload.add_zip_file("agreements.zip", _zip_file({"3.pdf": valid_pdf_bytes + bytes(1024 * 1024)}))
+
+        job = self.upload.start()
+
+        assert sorted(job.result["uploaded"]) == ["1"]
+        assert job.result["rejected"] == {
+            "2.pdf": "File is bigger than 1MB",
+            "3.pdf": "File is bigger than 1MB",
+        }
+
+    @mock.patch("app.main.helpers.countersigned_agreements._MAX_ZIP_FILES", 2)
+    def test_zip_files_with_too_many_files_in_them_are_rejected(self):
+        self.upload.add_zip_file("few.zip", _zip_file({"1.pdf": valid_pdf_bytes, "2.pdf": valid_pdf_bytes}))
+        self.upload.add_zip_file("many.zip", _zip_file({
+            "3.pdf": valid_pdf_bytes, "4.pdf": valid_pdf_bytes, "5.pdf": valid_pdf_bytes,
+        }))
+
+        job = self.upload.start()
+
+        assert sorted(job.result["uploaded"]) == ["1", "2"]
+        assert job.result["rejected"] == {"many.zip": "Zip file has more than 2 files in it"}
+
+    @mock.patch("app.main.helpers.countersigned_agreements._MAX_ZIP_CONTENTS_SIZE", 1024 * 1024)
+    def test_zip_files_with_too_much_in_them_are_rejected(self):
+        self.upload.add_zip_file("agreements.zip", _zip_file({"1.pdf": valid_pdf_bytes, "2.pdf": bytes(1024 * 1024)}))
+
+        job = self.upload.start()
+
+        assert job.total == 0
+        assert job.result["rejected"] == {"agreements.zip": "Zip file's contents add up to more than 1MB"}
+        assert self.client.get_supplier_framework_info.called is False
+
+    def test_copied_files_are_removed_once_uploaded(self):
+        self.upload.add_file("1.pdf", BytesIO(valid_pdf_bytes))
+        directory = self.upload._directory.name
+        assert os.listdir(directory) == ["1.pdf"]
+
+        self.upload.start()
+
+        assert not os.path.exists(directory)
+
+    def test_a_failed_upload_doesnt_stop_the_others(self):
+        self.client.update_framework_agreement.side_effect = lambda agreement_id, *args: (
+            self._raise(HTTPError(Response(400), "Bad agreement")) if agreement_id == 20 else None
+        )
+        for supplier_id in (1, 2, 3):
+            self.upload.add_file("{}.pdf".format(supplier_id), BytesIO(valid_pdf_bytes))
+
+        job = self.upload.start()
+
+        assert job.status == "finished"
+        assert job.completed == 3
+        assert job.errors == {
+            "2.pdf": "Bad agreement",
+            "3.pdf": "Supplier 3 is not on the framework or has not signed its agreement",
+        }
+        assert sorted(job.result["uploaded"]) == ["1"]
+        assert job.result["failed"] == {
+            "2": {"filename": "2.pdf", "error": "Bad agreement"},
+            "3": {"filename": "3.pdf", "error": "Supplier 3 is not on the framework or has not signed its agreement"},
+        }
+        assert len(self.s3.return_value.save.call_args_list) == 2
+        assert self.agreements_queue_cache.set_agreement_status.call_args_list == [
+            mock.call("g-cloud-12", 1, "countersigned"),
+        ]
+
+    def test_transient_api_errors_are_retried(self):
+        self.client.create_audit_event.side_effect = [HTTPError(Response(503)), None]
+        self.upload.add_file("1.pdf", BytesIO(valid_pdf_bytes))
+
+        with mock.patch("app.main.helpers.jobs.sleep"):
+            job = self.upload.start()
+
+        assert sorted(job.result["uploaded"]) == ["1"]
+        assert self.client.create_audit_event.call_count == 2
+
+    @staticmethod
+    def _raise(e):
+        raise e
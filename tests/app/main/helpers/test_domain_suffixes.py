@@ -0,0 +1,67 @@
+from bisect import bisect_left
+from pathlib import Path
+
+import pytest
+
+from app.main.helpers.domain_suffixes import DomainSuffixBlacklist
+
+
+_blacklist_path = Path(__file__).parents[4] / "app" / "data" / "public_domain_suffix_blacklist"
+
+
+def _bisect_match(sorted_normalized_suffixes, domain):
+    # the sorted list search the validator used to do
+    normalized = (("" if domain.startswith(".") else ".") + domain.strip().lower())[::-1]
+    index = bisect_left(sorted_normalized_suffixes, normalized)
+    if index < len(sorted_normalized_suffixes) and sorted_normalized_suffixes[index].startswith(normalized):
+        return sorted_normalized_suffixes[index][::-1]
+    return None
+
+
+class TestDomainSuffixBlacklist:
+    def setup_method(self, method):
+        self.blacklist = DomainSuffixBlacklist([".org.uk\n", ".uk\n", "co.uk\n", ".br.com\n", "\n", ".COM\n"])
+
+    @pytest.mark.parametrize("domain, matched_suffix", (
+        ("org.uk", ".org.uk"),
+        (".ORG.UK ", ".org.uk"),
+        ("uk", ".uk"),
+        ("com", ".com"),
+        ("br.com", ".br.com"),
+        ("kev.uk", None),
+        ("rg.uk", None),
+        ("om", None),
+        ("police.org.uk", None),
+        ("", None),
+    ))
+    def test_match(self, domain, matched_suffix):
+        assert self.blacklist.match(domain) == matched_suffix
+
+    @pytest.mark.parametrize("domain, matched_suffix", (
+        ("org.uk", ".org.uk"),
+        ("UK", ".uk"),
+        ("com", ".com"),
+        ("co.uk", ".co.uk"),
+        ("gov.uk", None),
+        ("org", None),
+    ))
+    def test_exact_match(self, domain, matched_suffix):
+        assert self.blacklist.match(domain, exact=True) == matched_suffix
+
+    def test_blank_lines_are_ignored(self):
+        assert len(self.blacklist) == 5
+
+    def test_matches_the_same_as_searching_the_sorted_list(self):
+        blacklist = DomainSuffixBlacklist.from_directory(_blacklist_path)
+        sorted_normalized_suffixes = sorted(
+            (("" if line.startswith(".") else ".") + line.strip().lower())[::-1]
+            for filepath in _blacklist_path.iterdir()
+            for line in filepath.open(encoding="utf-8")
+            if line.strip()
+        )
+
+        domains = [suffix[::-1] for suffix in sorted_normalized_suffixes]
+        domains += [domain.lstrip(".").split(".", 1)[-1] for domain in domains]
+        domains += [f"example{domain}" for domain in domains] + ["gov.uk", "police.uk", "nhs.net", "a", "zz"]
+        for domain in domains:
+            assert blacklist.match(domain) == _bisect_match(sorted_normalized_suffixes, domain), domain
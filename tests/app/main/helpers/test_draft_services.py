@@ -0,0 +1,150 @@
+import mock
+import pytest
+from dmcontent.content_loader import ContentManifest
+from dmcontent.utils import count_unanswered_questions
+
+from app.main.helpers.draft_services import DraftServiceCountsCache, RequiredQuestionsIndex
+
+
+_manifest_sections = (
+    {
+        "name": "About your service",
+        "slug": "about",
+        "questions": (
+            {"id": "serviceName", "type": "text", "question": "Service name"},
+            {"id": "serviceSummary", "type": "textbox_large", "question": "Summary", "optional": True},
+            {
+                "id": "hostingLocations",
+                "type": "checkboxes",
+                "question": "Hosting locations",
+                "options": ({"label": "UK", "value": "uk"}, {"label": "EU", "value": "eu"}),
+                "depends": ({"on": "lot", "being": ("cloud-hosting",)},),
+            },
+            {"id": "freeVersion", "type": "boolean", "question": "Is there a free version?"},
+            {
+                "id": "freeVersionLink",
+                "type": "text",
+                "question": "Free version link",
+                "depends": ({"on": "freeVersion", "being": (True,)},),
+            },
+            {
+                "id": "minimumUsers",
+                "type": "number",
+                "question": "Minimum users",
+                "unit": "users",
+                "unit_position": "after",
+            },
+            {"id": "dataEncryption", "type": "radios", "question": "Encryption", "assuranceApproach": "2answers-type1"},
+        ),
+    },
+    {
+        "name": "Pricing",
+        "slug": "pricing",
+        "questions": (
+            {
+                "id": "price",
+                "type": "pricing",
+                "question": "Price",
+                "fields": {"minimum_price": "priceMin", "maximum_price": "priceMax", "price_unit": "priceUnit"},
+            },
+            {
+                "id": "support",
+                "type": "multiquestion",
+                "question": "Support",
+                "questions": (
+                    {"id": "supportAvailable", "type": "boolean", "question": "Is support available?"},
+                    {"id": "supportHours", "type": "text", "question": "Support hours"},
+                ),
+            },
+            {"id": "startDate", "type": "date", "question": "Start date"},
+        ),
+    },
+)
+
+
+_draft_services = (
+    {"id": 1, "lot": "cloud-hosting"},
+    {"id": 2, "lot": "cloud-software"},
+    {"id": 3},
+    {
+        "id": 4,
+        "lot": "cloud-hosting",
+        "serviceName": "My service",
+        "hostingLocations": ["uk"],
+        "freeVersion": True,
+        "minimumUsers": None,
+        "dataEncryption": {"value": "yes", "assurance": "Service provider assertion"},
+        "priceMin": "1.00",
+        "supportAvailable": True,
+        "supportHours": "9-5",
+        "startDate": "2020-01-01",
+    },
+    {
+        "id": 5,
+        "lot": "cloud-software",
+        "serviceName": "",
+        "hostingLocations": [],
+        "freeVersion": False,
+        "minimumUsers": 10,
+        "dataEncryption": {"value": ""},
+        "priceMax": "2.00",
+        "supportAvailable": False,
+    },
+)
+
+
+class TestRequiredQuestionsIndex:
+    @pytest.mark.parametrize("draft_service", _draft_services)
+    def test_counts_the_same_as_a_filtered_summary(self, draft_service):
+        manifest = ContentManifest(_manifest_sections)
+        index = RequiredQuestionsIndex(manifest, draft_service.get("lot")) if "lot" in draft_service else \
+            RequiredQuestionsIndex(manifest)
+
+        assert index.count_unanswered(draft_service) == count_unanswered_questions(
+            ContentManifest(_manifest_sections).filter(draft_service).summary(draft_service)
+        )[0]
+
+
+class TestDraftServiceCountsCache:
+    def setup_method(self, method):
+        self.content_loader = mock.Mock()
+        self.content_loader.get_manifest.side_effect = lambda *args: ContentManifest(_manifest_sections)
+        self.content_loader.get_manifest_version.return_value = "manifest-version-1"
+
+    def test_counts_are_reused_for_unchanged_drafts(self):
+        cache = DraftServiceCountsCache(max_size=10)
+        draft_services = [
+            {"id": 1, "lot": "cloud-hosting", "updatedAt": "2020-01-01T00:00:00.000000Z"},
+            {"id": 2, "lot": "cloud-hosting", "updatedAt": "2020-01-01T00:00:00.000000Z", "serviceName": "Foo"},
+        ]
+        assert cache.get_unanswered_required_counts(self.content_loader, "g-cloud-99", draft_services) == [8, 7]
+
+        with mock.patch("app.main.helpers.draft_services._count_unanswered") as count_unanswered:
+            count_unanswered.return_value = [0]
+            assert cache.get_unanswered_required_counts(self.content_loader, "g-cloud-99", [
+                draft_services[0],
+                {**draft_services[1], "updatedAt": "2020-01-02T00:00:00.000000Z"},
+            ]) == [8, 0]
+
+        assert count_unanswered.call_args_list == [
+            mock.call(self.content_loader, "g-cloud-99", [{**draft_services[1], "updatedAt": mock.ANY}]),
+        ]
+
+    def test_counts_are_not_reused_across_manifest_versions(self):
+        cache = DraftServiceCountsCache(max_size=10)
+        draft_services = [{"id": 1, "lot": "cloud-hosting", "updatedAt": "2020-01-01T00:00:00.000000Z"}]
+        cache.get_unanswered_required_counts(self.content_loader, "g-cloud-99", draft_services)
+
+        self.content_loader.get_manifest_version.return_value = "manifest-version-2"
+        with mock.patch("app.main.helpers.draft_services._count_unanswered") as count_unanswered:
+            count_unanswered.return_value = [3]
+            assert cache.get_unanswered_required_counts(self.content_loader, "g-cloud-99", draft_services) == [3]
+
+    def test_max_size_of_zero_disables_cache(self):
+        cache = DraftServiceCountsCache(max_size=0)
+        draft_services = [{"id": 1, "lot": "cloud-hosting", "updatedAt": "2020-01-01T00:00:00.000000Z"}]
+        cache.get_unanswered_required_counts(self.content_loader, "g-cloud-99", draft_services)
+
+        with mock.patch("app.main.helpers.draft_services._count_unanswered") as count_unanswered:
+            count_unanswered.return_value = [3]
+            assert cache.get_unanswered_required_counts(self.content_loader, "g-cloud-99", draft_services) == [3]
@@ -0,0 +1,143 @@
+import mock
+import pytest
+from dmapiclient import HTTPError
+from dmtestutils.api_model_stubs import FrameworkStub
+from redis import RedisError
+
+from app.main.helpers.frameworks import FrameworkCatalogue
+from ...helpers import BaseApplicationTest
+
+
+class TestFrameworkCatalogue(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.now = 1000.
+        self.catalogue = FrameworkCatalogue(ttl=60, clock=lambda: self.now)
+
+        self.api_client = mock.Mock()
+        self.api_client.find_frameworks.return_value = {"frameworks": [
+            FrameworkStub(slug="g-cloud-12", status="live").response(),
+            FrameworkStub(
+                slug="digital-outcomes-and-specialists-4", status="live", framework_live_at="2019-12-18 15:13:24",
+            ).response(),
+            FrameworkStub(
+                slug="digital-outcomes-and-specialists-5", status="live", framework_live_at="2021-01-01 12:00:00",
+            ).response(),
+            FrameworkStub(slug="digital-outcomes-and-specialists-6", status="open").response(),
+        ]}
+
+        self.thread_patch = mock.patch("app.main.helpers.frameworks.Thread", autospec=True)
+        self.thread = self.thread_patch.start()
+
+    def teardown_method(self, method):
+        self.thread_patch.stop()
+        super().teardown_method(method)
+
+    def _run_background_refresh(self):
+        (_, kwargs), = self.thread.call_args_list
+        kwargs["target"](*kwargs["args"])
+
+    def test_frameworks_are_only_fetched_once_within_ttl(self):
+        first = self.catalogue.get_frameworks(self.api_client)
+        self.now += 59
+        second = self.catalogue.get_frameworks(self.api_client)
+
+        assert first == second == self.api_client.find_frameworks.return_value["frameworks"]
+        assert self.api_client.find_frameworks.call_args_list == [mock.call()]
+        assert self.thread.called is False
+
+    def test_stale_frameworks_are_served_while_refreshing_in_background(self):
+        with self.app.app_context():
+            self.catalogue.get_frameworks(self.api_client)
+            self.now += 61
+            self.api_client.find_frameworks.return_value = {"frameworks": []}
+
+            assert len(self.catalogue.get_frameworks(self.api_client)) == 4
+            # only one refresh should be started while the first is underway
+            assert len(self.catalogue.get_frameworks(self.api_client)) == 4
+            assert self.thread.call_count == 1
+
+            self._run_background_refresh()
+
+            assert self.catalogue.get_frameworks(self.api_client) == []
+            assert self.api_client.find_frameworks.call_count == 2
+
+    def test_failed_background_refresh_keeps_stale_frameworks(self):
+        with self.app.app_context():
+            self.catalogue.get_frameworks(self.api_client)
+            self.now += 61
+            self.api_client.find_frameworks.side_effect = HTTPError(mock.Mock(status_code=503))
+
+            self.catalogue.get_frameworks(self.api_client)
+            self._run_background_refresh()
+
+            assert len(self.catalogue.get_frameworks(self.api_client)) == 4
+            # the failed refresh shouldn't prevent another being attempted
+            assert self.thread.call_count == 2
+
+    def test_purge_forces_fetch(self):
+        self.catalogue.get_frameworks(self.api_client)
+        self.catalogue.purge()
+        self.catalogue.get_frameworks(self.api_client)
+
+        assert self.api_client.find_frameworks.call_args_list == [mock.call(), mock.call()]
+
+    def test_purge_in_another_process_forces_fetch(self):
+        shared_store = mock.Mock()
+        shared_store.get.return_value = None
+        self.catalogue.shared_store = shared_store
+        other_catalogue = FrameworkCatalogue(ttl=60, clock=lambda: self.now, shared_store=shared_store)
+
+        self.catalogue.get_frameworks(self.api_client)
+        self.catalogue.get_frameworks(self.api_client)
+        other_catalogue.purge()
+        shared_store.get.return_value = b"1"
+        self.catalogue.get_frameworks(self.api_client)
+        self.catalogue.get_frameworks(self.api_client)
+
+        assert shared_store.incr.call_args_list == [mock.call("framework-catalogue:generation")]
+        assert self.api_client.find_frameworks.call_args_list == [mock.call(), mock.call()]
+
+    def test_shared_store_errors_dont_stop_frameworks_being_served(self):
+        shared_store = mock.Mock()
+        shared_store.get.side_effect = shared_store.incr.side_effect = RedisError("Connection refused")
+        self.catalogue.shared_store = shared_store
+
+        with self.app.app_context():
+            first = self.catalogue.get_frameworks(self.api_client)
+            assert self.catalogue.get_frameworks(self.api_client) == first
+            self.catalogue.purge()
+            assert self.catalogue.get_frameworks(self.api_client) == first
+
+        assert self.api_client.find_frameworks.call_args_list == [mock.call(), mock.call()]
+
+    def test_zero_ttl_disables_caching(self):
+        self.catalogue.ttl = 0
+        self.catalogue.get_frameworks(self.api_client)
+        self.catalogue.get_frameworks(self.api_client)
+
+        assert self.api_client.find_frameworks.call_args_list == [mock.call(), mock.call()]
+
+    @pytest.mark.parametrize("slug,found", (("g-cloud-12", True), ("g-cloud-13", False)))
+    def test_get_framework(self, slug, found):
+        framework = self.catalogue.get_framework(self.api_client, slug)
+
+        assert (framework is not None) is found
+        if found:
+            assert framework["slug"] == slug
+
+    def test_get_frameworks_by_family(self):
+        assert [
+            fw["slug"]
+            for fw in self.catalogue.get_frameworks_by_family(self.api_client, "digital-outcomes-and-specialists")
+        ] == [
+            "digital-outcomes-and-specialists-4",
+            "digital-outcomes-and-specialists-5",
+            "digital-outcomes-and-specialists-6",
+        ]
+
+    def test_get_latest_live_framework(self):
+        assert self.catalogue.get_latest_live_framework(
+            self.api_client, "digital-outcomes-and-specialists",
+        )["slug"] == "digital-outcomes-and-specialists-5"
+        assert self.catalogue.get_latest_live_framework(self.api_client, "digital-outcomes") is None
@@ -0,0 +1,157 @@
+import json
+from threading import Event, current_thread
+
+import mock
+import pytest
+from dmapiclient import HTTPError
+from redis import RedisError
+
+from app.main.helpers.jobs import Job, JobRunner
+from ...helpers import BaseApplicationTest, Response
+
+
+class TestJobRunner(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.runner = JobRunner(max_workers=0, max_tracked_jobs=2, api_attempts=3)
+
+    def teardown_method(self, method):
+        self.app_context.pop()
+        super().teardown_method(method)
+
+    def test_job_progress_and_result_are_tracked(self):
+        def work(job):
+            assert self.runner.get_job_state(job.id)["status"] == "running"
+            job.advance("a")
+            job.advance("b", "Something went wrong")
+            return {"done": True}
+
+        job = self.runner.submit(Job("test-job", roles=("admin",), total=2), work)
+
+        assert self.runner.get_job_state(job.id) == {
+            "id": job.id,
+            "name": "test-job",
+            "roles": ["admin"],
+            "data": None,
+            "status": "finished",
+            "total": 2,
+            "completed": 2,
+            "errors": {"b": "Something went wrong"},
+            "result": {"done": True},
+            "error": None,
+            "updatedAt": mock.ANY,
+        }
+
+    def test_failed_job_is_recorded(self):
+        def work(job):
+            raise ValueError("Oops")
+
+        job = self.runner.submit(Job("test-job", roles=("admin",)), work)
+
+        assert self.runner.get_job_state(job.id)["status"] == "failed"
+        assert self.runner.get_job_state(job.id)["error"] == "Oops"
+
+    def test_jobs_run_in_the_background_with_workers(self):
+        self.runner.max_workers = 1
+        started, finish = Event(), Event()
+
+        def work(job):
+            started.set()
+            finish.wait(5)
+
+        job = self.runner.submit(Job("test-job", roles=("admin",)), work)
+        started.wait(5)
+        assert self.runner.get_job_state(job.id)["status"] == "running"
+
+        finish.set()
+        self.runner._get_executor().shutdown(wait=True)
+        assert self.runner.get_job_state(job.id)["status"] == "finished"
+
+    def test_only_most_recent_jobs_are_tracked(self):
+        jobs = [self.runner.submit(Job("test-job", roles=("admin",)), lambda job: None) for _ in range(3)]
+
+        assert self.runner.get_job_state(jobs[0].id) is None
+        assert self.runner.get_job_state(jobs[1].id) is not None
+        assert self.runner.get_job_state(jobs[2].id) is not None
+
+    @pytest.mark.parametrize("status_codes, expected_call_count", (
+        ((503, 502), 3),
+        ((504,), 2),
+    ))
+    def test_transient_api_errors_are_retried(self, status_codes, expected_call_count):
+        call = mock.Mock(side_effect=[HTTPError(Response(status_code)) for status_code in status_codes] + ["result"])
+
+        with mock.patch("app.main.helpers.jobs.sleep") as sleep:
+            job = self.runner.submit(Job("test-job", roles=("admin",)), lambda job: job.retry_transient(call))
+
+        assert self.runner.get_job_state(job.id)["result"] == "result"
+        assert call.call_count == expected_call_count
+        assert len(sleep.call_args_list) == expected_call_count - 1
+
+    @pytest.mark.parametrize("status_codes", ((500,), (400,), (503, 503, 503)))
+    def test_other_api_errors_and_repeated_transient_errors_are_raised(self, status_codes):
+        call = mock.Mock(side_effect=[HTTPError(Response(status_code)) for status_code in status_codes])
+
+        with mock.patch("app.main.helpers.jobs.sleep"):
+            job = self.runner.submit(Job("test-job", roles=("admin",)), lambda job: job.retry_transient(call))
+
+        assert self.runner.get_job_state(job.id)["status"] == "failed"
+        assert call.call_count == len(status_codes)
+
+    def test_gathered_calls_are_made_on_the_runners_own_pool(self):
+        self.runner.max_task_workers = 2
+
+        def call(i):
+            return i, current_thread().name
+
+        job = self.runner.submit(
+            Job("test-job", roles=("admin",)),
+            lambda job: job.gather(*(lambda i=i: call(i) for i in range(3))),
+        )
+
+        results = self.runner.get_job_state(job.id)["result"]
+        assert [i for i, thread_name in results] == [0, 1, 2]
+        assert all(thread_name.startswith("job-task") for i, thread_name in results)
+
+    def test_gathered_calls_raise_the_first_exception(self):
+        self.runner.max_task_workers = 2
+
+        def fail(message):
+            raise ValueError(message)
+
+        job = self.runner.submit(
+            Job("test-job", roles=("admin",)),
+            lambda job: job.gather(lambda: None, lambda: fail("first"), lambda: fail("second")),
+        )
+
+        assert self.runner.get_job_state(job.id)["error"] == "first"
+
+    def test_job_state_is_shared_through_redis(self):
+        shared_store = mock.Mock()
+        self.runner.shared_store = shared_store
+        self.runner.shared_ttl = 60
+
+        job = self.runner.submit(Job("test-job", roles=("admin",), total=1), lambda job: job.advance())
+
+        key, value = shared_store.set.call_args[0]
+        assert key == "jobs:{}".format(job.id)
+        assert json.loads(value)["status"] == "finished"
+        assert shared_store.set.call_args[1] == {"ex": 60}
+
+        # another process's runner, which doesn't know the job itself
+        other_runner = JobRunner(shared_store=shared_store)
+        shared_store.get.return_value = value
+        assert other_runner.get_job_state(job.id) == json.loads(value)
+        assert shared_store.get.call_args_list == [mock.call("jobs:{}".format(job.id))]
+
+    def test_shared_store_errors_are_not_fatal(self):
+        shared_store = mock.Mock()
+        shared_store.set.side_effect = shared_store.get.side_effect = RedisError
+        self.runner.shared_store = shared_store
+
+        job = self.runner.submit(Job("test-job", roles=("admin",)), lambda job: None)
+
+        assert self.runner.get_job_state(job.id)["status"] == "finished"
+        assert self.runner.get_job_state("unknown") is None
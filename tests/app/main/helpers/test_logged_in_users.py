@@ -0,0 +1,69 @@
+import mock
+
+from app.main.helpers.logged_in_users import LoggedInUserCache
+
+
+class TestLoggedInUserCache:
+    def setup_method(self, method):
+        self.now = 0
+        self.cache = LoggedInUserCache(ttl=60, max_size=2, clock=lambda: self.now)
+        self.load_user = mock.Mock(side_effect=lambda: object())
+
+    def test_users_are_reused_until_they_expire(self):
+        user = self.cache.get_user("1234", "session-1", self.load_user)
+
+        self.now = 59
+        assert self.cache.get_user(1234, "session-1", self.load_user) is user
+
+        self.now = 60
+        assert self.cache.get_user("1234", "session-1", self.load_user) is not user
+        assert self.load_user.call_count == 2
+
+    def test_users_are_cached_per_session(self):
+        user = self.cache.get_user("1234", "session-1", self.load_user)
+        assert self.cache.get_user("1234", "session-2", self.load_user) is not user
+        assert self.load_user.call_count == 2
+
+    def test_missing_users_are_not_cached(self):
+        self.load_user.side_effect = lambda: None
+        assert self.cache.get_user("1234", "session-1", self.load_user) is None
+        assert self.cache.get_user("1234", "session-1", self.load_user) is None
+        assert self.load_user.call_count == 2
+
+    def test_least_recently_used_users_are_dropped(self):
+        user_1 = self.cache.get_user("1", "session-1", self.load_user)
+        user_2 = self.cache.get_user("2", "session-2", self.load_user)
+        self.cache.get_user("1", "session-1", self.load_user)
+        self.cache.get_user("3", "session-3", self.load_user)
+
+        assert self.cache.get_user("1", "session-1", self.load_user) is user_1
+        assert self.cache.get_user("2", "session-2", self.load_user) is not user_2
+        assert self.load_user.call_count == 4
+
+    def test_invalidate_drops_user_from_every_session(self):
+        self.cache.max_size = 3
+        user_1 = self.cache.get_user("1234", "session-1", self.load_user)
+        user_2 = self.cache.get_user("1234", "session-2", self.load_user)
+        other_user = self.cache.get_user("5678", "session-3", self.load_user)
+
+        self.cache.invalidate(1234)
+
+        assert self.cache.get_user("1234", "session-1", self.load_user) is not user_1
+        assert self.cache.get_user("1234", "session-2", self.load_user) is not user_2
+        assert self.cache.get_user("5678", "session-3", self.load_user) is other_user
+        assert self.load_user.call_count == 5
+
+    def test_user_loaded_during_invalidation_is_not_cached(self):
+        def load_user():
+            self.cache.invalidate("1234")
+            return object()
+
+        self.cache.get_user("1234", "session-1", load_user)
+        self.cache.get_user("1234", "session-1", self.load_user)
+        assert self.load_user.call_count == 1
+
+    def test_ttl_of_zero_disables_cache(self):
+        self.cache.ttl = 0
+        self.cache.get_user("1234", "session-1", self.load_user)
+        self.cache.get_user("1234", "session-1", self.load_user)
+        assert self.load_user.call_count == 2
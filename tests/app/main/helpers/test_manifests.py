@@ -0,0 +1,100 @@
+import pytest
+from dmcontent.content_loader import ContentManifest
+
+from app.main.helpers.manifests import ManifestFilterPlan
+
+
+_manifest_sections = (
+    {
+        "name": "About your service",
+        "slug": "about",
+        "questions": (
+            {"id": "serviceName", "type": "text", "question": "Service name"},
+            {
+                "id": "hostingLocations",
+                "type": "checkboxes",
+                "question": "Hosting locations",
+                "depends": ({"on": "lot", "being": ("cloud-hosting",)},),
+            },
+            {"id": "freeVersion", "type": "boolean", "question": "Is there a free version?"},
+            {
+                "id": "freeVersionLink",
+                "type": "text",
+                "question": "Free version link",
+                "depends": ({"on": "freeVersion", "being": (True,)},),
+            },
+        ),
+    },
+    {
+        "name": "Hosting",
+        "slug": "hosting",
+        "questions": (
+            {
+                "id": "datacentres",
+                "type": "text",
+                "question": "Datacentres",
+                "depends": (
+                    {"on": "lot", "being": ("cloud-hosting",)},
+                    {"on": "freeVersion", "being": (True, False)},
+                ),
+            },
+        ),
+    },
+    {
+        "name": "Support",
+        "slug": "support",
+        "questions": (
+            {
+                "id": "support",
+                "type": "multiquestion",
+                "question": "Support",
+                "questions": (
+                    {"id": "supportAvailable", "type": "boolean", "question": "Is support available?"},
+                    {
+                        "id": "supportHours",
+                        "type": "text",
+                        "question": "Support hours",
+                        "depends": ({"on": "lot", "being": ("cloud-support",)},),
+                    },
+                ),
+            },
+        ),
+    },
+)
+
+
+def _question_ids(manifest):
+    return [
+        (section.id, question.id, question.number, [q.id for q in getattr(question, "questions", ())])
+        for section in manifest.sections
+        for question in section.questions
+    ]
+
+
+class TestManifestFilterPlan:
+    @pytest.mark.parametrize("context", (
+        {},
+        {"lot": "cloud-hosting"},
+        {"lot": "cloud-hosting", "freeVersion": True},
+        {"lot": "cloud-hosting", "freeVersion": False},
+        {"lot": "cloud-support", "freeVersion": True},
+        {"lot": "cloud-software", "freeVersion": None},
+        {"freeVersion": True},
+    ))
+    def test_filters_the_same_as_dmcontent(self, context):
+        plan = ManifestFilterPlan(ContentManifest(_manifest_sections))
+        plan.prepare_lots(("cloud-hosting", "cloud-software"))
+
+        filtered_manifest = plan.filter(ContentManifest(_manifest_sections), context)
+
+        assert _question_ids(filtered_manifest) == _question_ids(ContentManifest(_manifest_sections).filter(context))
+        assert all(
+            question._context is context for section in filtered_manifest.sections for question in section.questions
+        )
+
+    def test_hidden_positions(self):
+        plan = ManifestFilterPlan(ContentManifest(_manifest_sections))
+
+        assert plan.hidden_positions({"lot": "cloud-hosting", "freeVersion": True}) == set()
+        assert plan.hidden_positions({"lot": "cloud-hosting", "freeVersion": False}) == {(0, 3)}
+        assert plan.hidden_positions({"lot": "cloud-software"}) == {(0, 1), (0, 3), (1, 0)}
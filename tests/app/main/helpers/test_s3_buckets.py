@@ -0,0 +1,100 @@
+from threading import Thread
+
+import mock
+
+from app.main.helpers.s3_buckets import S3BucketPool, SignedUrlCache
+from ...helpers import BaseApplicationTest
+
+
+class TestS3BucketPool(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.pool = S3BucketPool()
+        self.s3.side_effect = lambda *args, **kwargs: mock.Mock()
+
+    def test_buckets_are_reused(self):
+        with self.app.app_context():
+            bucket = self.pool.get_bucket("agreements")
+
+            assert self.pool.get_bucket("agreements") is bucket
+            assert self.pool.get_bucket("reports") is not bucket
+
+        assert self.s3.call_args_list == [
+            mock.call("agreements", endpoint_url=None),
+            mock.call("reports", endpoint_url=None),
+        ]
+
+    def test_each_thread_has_its_own_buckets(self):
+        buckets = []
+
+        def get_bucket():
+            with self.app.app_context():
+                buckets.append(self.pool.get_bucket("agreements"))
+
+        get_bucket()
+        thread = Thread(target=get_bucket)
+        thread.start()
+        thread.join()
+
+        assert buckets[0] is not buckets[1]
+
+    def test_purge_forgets_buckets(self):
+        with self.app.app_context():
+            bucket = self.pool.get_bucket("agreements")
+            self.pool.purge()
+
+            assert self.pool.get_bucket("agreements") is not bucket
+
+
+class TestSignedUrlCache(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.now = 0
+        self.cache = SignedUrlCache(ttl=60, clock=lambda: self.now)
+        self.s3.return_value.get_signed_url.side_effect = \
+            lambda path, expires_in=30: f"https://s3.example.com/{path}?expires-in={expires_in}&signed-at={self.now}"
+
+    def _get_signed_url(self, path="g-cloud-12/agreements/1234/1234-foo.pdf"):
+        with self.app.app_context():
+            return self.cache.get_signed_url("agreements", path, "https://assets.example.com")
+
+    def test_urls_are_reused_until_they_expire(self):
+        url = self._get_signed_url()
+        assert url == "https://assets.example.com/g-cloud-12/agreements/1234/1234-foo.pdf?expires-in=90&signed-at=0"
+
+        self.now = 59
+        assert self._get_signed_url() == url
+
+        self.now = 60
+        assert self._get_signed_url().endswith("signed-at=60")
+        assert self.s3.return_value.get_signed_url.call_count == 2
+
+    def test_urls_are_cached_per_path(self):
+        self._get_signed_url()
+        self._get_signed_url("g-cloud-12/agreements/1234/1234-bar.pdf")
+        assert self.s3.return_value.get_signed_url.call_count == 2
+
+    def test_forgotten_urls_are_signed_again(self):
+        self._get_signed_url()
+        self._get_signed_url("g-cloud-12/agreements/1234/1234-bar.pdf")
+
+        self.cache.forget("agreements", "g-cloud-12/agreements/1234/1234-foo.pdf")
+        self.cache.forget("communications", "g-cloud-12/agreements/1234/1234-bar.pdf")
+        self._get_signed_url()
+        self._get_signed_url("g-cloud-12/agreements/1234/1234-bar.pdf")
+
+        assert self.s3.return_value.get_signed_url.call_count == 3
+
+    def test_missing_objects_are_not_cached(self):
+        self.s3.return_value.get_signed_url.side_effect = lambda path, expires_in=30: None
+        assert self._get_signed_url() is None
+        assert self._get_signed_url() is None
+        assert self.s3.return_value.get_signed_url.call_count == 2
+
+    def test_ttl_of_zero_disables_cache(self):
+        self.cache.ttl = 0
+        assert self._get_signed_url().endswith("expires-in=30&signed-at=0")
+        self._get_signed_url()
+        assert self.s3.return_value.get_signed_url.call_args_list == [
+            mock.call("g-cloud-12/agreements/1234/1234-foo.pdf"),
+        ] * 2
@@ -0,0 +1,75 @@
+import mock
+
+from app.main.helpers.s3_listings import S3ListingCache
+
+
+class TestS3ListingCache:
+    def setup_method(self, method):
+        self.now = 0
+        self.cache = S3ListingCache(ttl=60, clock=lambda: self.now)
+        self.list_prefix = mock.Mock(side_effect=lambda: [
+            {"path": "g-things-23/docs/b.pdf", "last_modified": "2018-02-02T02:02:02.000002Z"},
+            {"path": "g-things-23/docs/c.pdf", "last_modified": "2018-03-03T03:03:03.000003Z"},
+        ])
+
+    def _paths(self):
+        return [
+            bucket_item["path"]
+            for bucket_item in self.cache.get_listing("bucket", "g-things-23/docs", self.list_prefix)
+        ]
+
+    def test_listings_are_cached_until_they_expire(self):
+        assert self._paths() == ["g-things-23/docs/b.pdf", "g-things-23/docs/c.pdf"]
+        self.now = 59
+        self._paths()
+        assert self.list_prefix.call_count == 1
+
+        self.now = 60
+        self._paths()
+        assert self.list_prefix.call_count == 2
+
+    def test_listings_are_keyed_on_bucket_and_prefix(self):
+        self.cache.get_listing("bucket", "g-things-23/docs", self.list_prefix)
+        self.cache.get_listing("other-bucket", "g-things-23/docs", self.list_prefix)
+        self.cache.get_listing("bucket", "g-things-23/other-docs", self.list_prefix)
+        assert self.list_prefix.call_count == 3
+
+    def test_saved_items_are_added_in_order(self):
+        self._paths()
+        self.cache.saved(
+            "bucket",
+            "g-things-23/docs",
+            {"path": "g-things-23/docs/a.pdf", "last_modified": "2018-02-03T02:02:02.000002Z"},
+        )
+        # replacing an existing object moves it to its new position
+        self.cache.saved(
+            "bucket",
+            "g-things-23/docs",
+            {"path": "g-things-23/docs/b.pdf", "last_modified": "2018-04-04T04:04:04.000004Z"},
+        )
+
+        assert self._paths() == ["g-things-23/docs/a.pdf", "g-things-23/docs/c.pdf", "g-things-23/docs/b.pdf"]
+        assert self.list_prefix.call_count == 1
+
+    def test_deleted_items_are_removed(self):
+        self._paths()
+        self.cache.deleted("bucket", "g-things-23/docs", "g-things-23/docs/b.pdf")
+
+        assert self._paths() == ["g-things-23/docs/c.pdf"]
+        assert self.list_prefix.call_count == 1
+
+    def test_listing_fetched_during_a_change_is_not_cached(self):
+        def list_prefix():
+            self.cache.deleted("bucket", "g-things-23/docs", "g-things-23/docs/b.pdf")
+            return [{"path": "g-things-23/docs/b.pdf", "last_modified": "2018-02-02T02:02:02.000002Z"}]
+
+        self.cache.get_listing("bucket", "g-things-23/docs", list_prefix)
+        self._paths()
+        assert self.list_prefix.call_count == 1
+
+    def test_ttl_of_zero_disables_cache(self):
+        self.cache.ttl = 0
+        self._paths()
+        self.cache.saved("bucket", "g-things-23/docs", {"path": "g-things-23/docs/a.pdf"})
+        assert self._paths() == ["g-things-23/docs/b.pdf", "g-things-23/docs/c.pdf"]
+        assert self.list_prefix.call_count == 2
@@ -0,0 +1,137 @@
+import json
+
+import mock
+from flask import Markup
+from redis import RedisError
+
+from app.main.helpers.service_diffs import ServiceDiffCache
+from ...helpers import BaseApplicationTest
+
+
+class TestServiceDiffCache(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.cache = ServiceDiffCache(max_size=2)
+        self.service = {"id": "1234", "frameworkSlug": "g-cloud-12", "serviceName": "Soap"}
+        self.compute_diffs = mock.Mock(side_effect=lambda: iter((
+            ("serviceName", Markup("<table>soap</table>")),
+            ("serviceSummary", Markup("<table>summary</table>")),
+        )))
+
+    def test_diffs_are_only_computed_once(self):
+        first = self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        second = self.cache.get_diffs(1, dict(self.service), "v1", self.compute_diffs)
+
+        assert list(first.items()) == list(second.items()) == [
+            ("serviceName", "<table>soap</table>"),
+            ("serviceSummary", "<table>summary</table>"),
+        ]
+        assert all(isinstance(table_html, Markup) for table_html in second.values())
+        assert self.compute_diffs.call_count == 1
+
+    def test_changes_to_any_part_of_key_are_a_miss(self):
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        self.cache.get_diffs(2, self.service, "v1", self.compute_diffs)
+        self.cache.get_diffs(1, dict(self.service, serviceName="Lemon soap"), "v1", self.compute_diffs)
+        self.cache.get_diffs(1, self.service, "v2", self.compute_diffs)
+
+        assert self.compute_diffs.call_count == 4
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        self.cache.get_diffs(2, self.service, "v1", self.compute_diffs)
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        self.cache.get_diffs(3, self.service, "v1", self.compute_diffs)
+        assert self.compute_diffs.call_count == 3
+
+        # 2 was least recently used
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        assert self.compute_diffs.call_count == 3
+        self.cache.get_diffs(2, self.service, "v1", self.compute_diffs)
+        assert self.compute_diffs.call_count == 4
+
+    def test_size_of_zero_disables_cache(self):
+        self.cache.max_size = 0
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+
+        assert self.compute_diffs.call_count == 2
+
+    def test_diffs_are_shared_through_shared_store(self):
+        shared_store = mock.Mock()
+        shared_store.get.return_value = None
+        self.cache.shared_store, self.cache.shared_ttl = shared_store, 3600
+
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+
+        key = "service-diffs:{}".format(ServiceDiffCache.key(1, self.service, "v1"))
+        assert shared_store.set.call_args_list == [mock.call(
+            key,
+            json.dumps([["serviceName", "<table>soap</table>"], ["serviceSummary", "<table>summary</table>"]]),
+            ex=3600,
+        )]
+
+        other_cache = ServiceDiffCache(max_size=2, shared_store=shared_store)
+        shared_store.get.return_value = shared_store.set.call_args[0][1].encode("utf-8")
+        diffs = other_cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+
+        assert shared_store.get.call_args == mock.call(key)
+        assert list(diffs.items()) == [
+            ("serviceName", "<table>soap</table>"),
+            ("serviceSummary", "<table>summary</table>"),
+        ]
+        assert self.compute_diffs.call_count == 1
+
+    def test_shared_store_errors_fall_back_to_computing_diffs(self):
+        self.cache.shared_store = mock.Mock()
+        self.cache.shared_store.get.side_effect = self.cache.shared_store.set.side_effect = RedisError("gone")
+
+        with self.app.app_context():
+            diffs = self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+
+        assert list(diffs) == ["serviceName", "serviceSummary"]
+
+    @mock.patch("app.main.helpers.service_diffs.Thread", autospec=True)
+    def test_prewarm_runs_calls_in_background(self, thread):
+        warm_calls = [mock.Mock(side_effect=ValueError("oops")), mock.Mock(), mock.Mock()]
+
+        with self.app.app_context():
+            self.cache.prewarm(iter(enumerate(warm_calls)))
+
+        (_, kwargs), = thread.call_args_list
+        assert thread.return_value.start.called is True
+        assert not any(warm_call.called for warm_call in warm_calls)
+
+        kwargs["target"](*kwargs["args"])
+        # one failing doesn't stop the rest, but no more than will fit in the cache are warmed
+        assert [warm_call.called for warm_call in warm_calls] == [True, True, False]
+
+    @mock.patch("app.main.helpers.service_diffs.Thread", autospec=True)
+    def test_prewarm_does_nothing_if_cache_disabled(self, thread):
+        self.cache.max_size = 0
+        with self.app.app_context():
+            self.cache.prewarm([(1, mock.Mock())])
+
+        assert thread.called is False
+
+    @mock.patch("app.main.helpers.service_diffs.Thread", autospec=True)
+    def test_prewarm_skips_archived_services_already_cached(self, thread):
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+        warm_calls = [mock.Mock(), mock.Mock()]
+
+        with self.app.app_context():
+            self.cache.prewarm([(1, warm_calls[0]), (2, warm_calls[1])])
+
+        (_, kwargs), = thread.call_args_list
+        kwargs["target"](*kwargs["args"])
+        assert [warm_call.called for warm_call in warm_calls] == [False, True]
+
+    @mock.patch("app.main.helpers.service_diffs.Thread", autospec=True)
+    def test_prewarm_doesnt_start_a_thread_if_everything_is_cached(self, thread):
+        self.cache.get_diffs(1, self.service, "v1", self.compute_diffs)
+
+        with self.app.app_context():
+            self.cache.prewarm([(1, mock.Mock())])
+            self.cache.prewarm([])
+
+        assert thread.called is False
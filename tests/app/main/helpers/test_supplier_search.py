@@ -0,0 +1,101 @@
+from threading import Event, Thread
+
+import mock
+import pytest
+
+from app.main.helpers.supplier_search import SupplierSearchCache
+
+
+class TestSupplierSearchCache:
+    def setup_method(self, method):
+        self.now = 0
+        self.cache = SupplierSearchCache(ttl=30, max_size=2, clock=lambda: self.now)
+        self.client = mock.Mock()
+        self.client.find_suppliers.side_effect = lambda **params: {"suppliers": [params], "links": {}}
+
+    def test_results_are_reused_until_they_expire(self):
+        response = self.cache.find_suppliers(self.client, name="foo", page=1)
+
+        self.now = 29
+        assert self.cache.find_suppliers(self.client, page=1, name="foo") is response
+
+        self.now = 30
+        assert self.cache.find_suppliers(self.client, name="foo", page=1) is not response
+        assert self.client.find_suppliers.call_count == 2
+
+    def test_results_are_cached_per_search(self):
+        response = self.cache.find_suppliers(self.client, name="foo", page=1)
+        assert self.cache.find_suppliers(self.client, name="foo", page=2) is not response
+        assert self.cache.find_suppliers(self.client, name="food", page=1) is not response
+        assert self.client.find_suppliers.call_args_list == [
+            mock.call(name="foo", page=1),
+            mock.call(name="foo", page=2),
+            mock.call(name="food", page=1),
+        ]
+
+    def test_least_recently_used_results_are_dropped(self):
+        response_1 = self.cache.find_suppliers(self.client, name="one")
+        response_2 = self.cache.find_suppliers(self.client, name="two")
+        self.cache.find_suppliers(self.client, name="one")
+        self.cache.find_suppliers(self.client, name="three")
+
+        assert self.cache.find_suppliers(self.client, name="one") is response_1
+        assert self.cache.find_suppliers(self.client, name="two") is not response_2
+        assert self.client.find_suppliers.call_count == 4
+
+    def test_purge_drops_results_including_those_being_fetched(self):
+        def find_suppliers(**params):
+            self.cache.purge()
+            return {"suppliers": [], "links": {}}
+
+        self.cache.find_suppliers(self.client, name="foo")
+        self.client.find_suppliers.side_effect = find_suppliers
+        self.cache.find_suppliers(self.client, name="bar")
+
+        self.cache.find_suppliers(self.client, name="foo")
+        self.cache.find_suppliers(self.client, name="bar")
+        assert self.client.find_suppliers.call_count == 4
+
+    def test_identical_concurrent_searches_are_made_once(self):
+        fetching, finish_fetching = Event(), Event()
+
+        def find_suppliers(**params):
+            fetching.set()
+            finish_fetching.wait(5)
+            return {"suppliers": [params], "links": {}}
+
+        self.client.find_suppliers.side_effect = find_suppliers
+        responses = []
+        threads = [Thread(target=lambda: responses.append(self.cache.find_suppliers(self.client, name="foo")))]
+        threads[0].start()
+        fetching.wait(5)
+
+        threads += [
+            Thread(target=lambda: responses.append(self.cache.find_suppliers(self.client, name="foo")))
+            for _ in range(3)
+        ]
+        for thread in threads[1:]:
+            thread.start()
+        finish_fetching.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(responses) == 4
+        assert all(response is responses[0] for response in responses)
+        assert self.client.find_suppliers.call_args_list == [mock.call(name="foo")]
+
+    def test_failed_searches_are_not_cached(self):
+        self.client.find_suppliers.side_effect = ValueError("API down")
+        with pytest.raises(ValueError):
+            self.cache.find_suppliers(self.client, name="foo")
+
+        self.client.find_suppliers.side_effect = None
+        self.client.find_suppliers.return_value = {"suppliers": [], "links": {}}
+        assert self.cache.find_suppliers(self.client, name="foo") == {"suppliers": [], "links": {}}
+        assert self.client.find_suppliers.call_count == 2
+
+    def test_ttl_of_zero_disables_cache(self):
+        self.cache.ttl = 0
+        self.cache.find_suppliers(self.client, name="foo")
+        self.cache.find_suppliers(self.client, name="foo")
+        assert self.client.find_suppliers.call_count == 2
@@ -0,0 +1,87 @@
+from io import BytesIO
+
+import mock
+import pytest
+from boto3.exceptions import S3UploadFailedError
+from dmutils.s3 import S3ResponseError
+from flask import request
+from freezegun import freeze_time
+
+from app.main.helpers.uploads import StreamingS3Uploader, UploadSizeLimitedRequest, max_upload_size
+from ...helpers import BaseApplicationTest
+
+
+class TestStreamingS3Uploader:
+    def setup_method(self, method):
+        self.bucket = mock.Mock()
+        self.uploader = StreamingS3Uploader(
+            self.bucket, multipart_threshold=10, multipart_chunk_size=5, multipart_max_concurrency=2,
+        )
+
+    def test_small_files_are_saved_in_one_request(self):
+        the_file = BytesIO(b"123456789")
+
+        assert self.uploader.save("a/b.pdf", the_file, acl="bucket-owner-full-control") is self.bucket.save.return_value
+
+        assert self.bucket.save.call_args_list == [mock.call("a/b.pdf", the_file, acl="bucket-owner-full-control")]
+        assert self.bucket._bucket.Object.call_args_list == []
+
+    @freeze_time("2021-02-03 04:05:06")
+    def test_big_files_are_uploaded_in_parts(self):
+        the_file = BytesIO(b"1234567890")
+
+        assert self.uploader.save(
+            "/a/b.pdf", the_file, acl="bucket-owner-full-control", download_filename="Bé.pdf",
+        ) is self.bucket.get_key.return_value
+
+        assert self.bucket.save.call_args_list == []
+        assert self.bucket._bucket.Object.call_args_list == [mock.call("a/b.pdf")]
+        assert self.bucket._bucket.Object.return_value.upload_fileobj.call_args_list == [
+            mock.call(
+                the_file,
+                ExtraArgs={
+                    "ACL": "bucket-owner-full-control",
+                    "Metadata": {"timestamp": "2021-02-03T04:05:06.000000Z"},
+                    "ContentType": "application/pdf",
+                    "ContentDisposition": 'attachment; filename="B.pdf"',
+                },
+                Config=mock.ANY,
+            )
+        ]
+        transfer_config = self.bucket._bucket.Object.return_value.upload_fileobj.call_args[1]["Config"]
+        assert transfer_config.multipart_threshold == 10
+        assert transfer_config.multipart_chunksize == 5
+        assert transfer_config.max_concurrency == 2
+        assert self.bucket.get_key.call_args_list == [mock.call("a/b.pdf")]
+
+    def test_failed_multipart_uploads_raise_s3_response_error(self):
+        self.bucket._bucket.Object.return_value.upload_fileobj.side_effect = S3UploadFailedError("Part failed")
+
+        with pytest.raises(S3ResponseError):
+            self.uploader.save("a/b.pdf", BytesIO(b"1234567890"))
+
+
+class TestUploadSizeLimitedRequest(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_TEST_MAX_UPLOAD_SIZE"] = 10
+        self.app.config["MAX_CONTENT_LENGTH"] = 20
+
+        @max_upload_size("DM_TEST_MAX_UPLOAD_SIZE")
+        def limited_view():
+            pass
+
+        self.app.add_url_rule("/limited", "limited_view", limited_view, methods=["POST"])
+        self.app.add_url_rule("/unlimited", "unlimited_view", lambda: None, methods=["POST"])
+
+    def _max_content_length(self, path):
+        with self.app.test_request_context(path, method="POST"):
+            assert isinstance(request._get_current_object(), UploadSizeLimitedRequest)
+            return request.max_content_length
+
+    def test_views_limits_are_used(self):
+        assert self._max_content_length("/limited") == 10
+
+    def test_max_content_length_is_used_for_other_views(self):
+        assert self._max_content_length("/unlimited") == 20
+        assert self._max_content_length("/not-a-view") == 20
@@ -0,0 +1,51 @@
+import csv
+
+import pytest
+
+from app.main.helpers.user_downloads import generate_user_csv
+from ...helpers import BaseApplicationTest
+
+
+USERS = [
+    {"emailAddress": "mariah@example.com", "name": "Mariah Carey"},
+    {"emailAddress": "shania@example.com", "name": "Shania Twain"},
+    {"emailAddress": "celine@example.com", "name": "Celine Dion"},
+    {"emailAddress": "whitney@example.com", "name": "Whitney Houston"},
+    {"emailAddress": "cher@example.com", "name": "Cher"},
+]
+
+
+class TestGenerateUserCSV(BaseApplicationTest):
+    def _rows(self, *args, **kwargs):
+        with self.app.test_request_context("/"):
+            return list(csv.reader(b"".join(generate_user_csv(*args, **kwargs)).decode("utf-8").splitlines()))
+
+    @pytest.mark.parametrize("max_rows_in_memory", [None, 1, 2, 5, 6])
+    def test_users_sorted_by_name(self, max_rows_in_memory):
+        assert self._rows(iter(USERS), max_rows_in_memory=max_rows_in_memory) == [
+            ["email address", "name"],
+            ["celine@example.com", "Celine Dion"],
+            ["cher@example.com", "Cher"],
+            ["mariah@example.com", "Mariah Carey"],
+            ["shania@example.com", "Shania Twain"],
+            ["whitney@example.com", "Whitney Houston"],
+        ]
+
+    def test_users_in_given_order_if_not_sorting(self):
+        assert self._rows(iter(USERS), sort_by_name=False) == [["email address", "name"]] + [
+            [user["emailAddress"], user["name"]] for user in USERS
+        ]
+
+    def test_header_is_generated_before_users_are_read(self):
+        def users():
+            raise AssertionError("users read too soon")
+            yield  # pragma: no cover
+
+        with self.app.test_request_context("/"):
+            assert next(generate_user_csv(users())).strip() == b"email address,name"
+
+    def test_missing_fields_are_blank(self):
+        assert self._rows([{"name": "Anonymous"}], sort_by_name=False) == [
+            ["email address", "name"],
+            ["", "Anonymous"],
+        ]
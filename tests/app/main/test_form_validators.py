@@ -4,6 +4,7 @@ from flask_wtf import Form
 from wtforms.fields.core import Field
 from wtforms.validators import StopValidation, ValidationError
 
+from app import create_app
 from app.main.forms import AdminEmailAddressValidator, NotInDomainSuffixBlacklistValidator
 
 from ..helpers import BaseApplicationTest
@@ -72,3 +73,28 @@ class TestNotInDomainSuffixBlacklistValidator(BaseApplicationTest):
         self.field_mock.data = new_buyer_domain
         with pytest.raises(ValidationError, match=new_buyer_domain.lower()):
             self.validator(self.form_mock, self.field_mock)
+
+    @pytest.mark.parametrize("new_buyer_domain, passes", (
+        ("org.uk", False),
+        ("ORG.UK", False),
+        ("br.com", False),
+        ("au", True),  # only matches ".org.au" (and so on) as a suffix
+        ("br", True),
+    ))
+    def test_exact(self, new_buyer_domain, passes):
+        self.validator.exact = True
+        self.field_mock.data = new_buyer_domain
+        if passes:
+            assert self.validator(self.form_mock, self.field_mock) is None
+        else:
+            with pytest.raises(ValidationError, match=new_buyer_domain.lower()):
+                self.validator(self.form_mock, self.field_mock)
+
+    def test_blacklist_is_loaded_once_by_create_app(self):
+        with mock.patch.object(NotInDomainSuffixBlacklistValidator, "_blacklist", None):
+            with mock.patch("app.main.forms.DomainSuffixBlacklist.from_directory") as from_directory:
+                create_app("test")
+                create_app("test")
+                assert NotInDomainSuffixBlacklistValidator.get_blacklist() is from_directory.return_value
+
+        assert from_directory.call_count == 1
@@ -221,6 +221,73 @@ class TestAdminManagerListView(LoggedInApplicationTest):
 
         assert expected_link.text == expected_link_text
 
+    def _users_by_role(self):
+        all_users = (
+            self.SUPPORT_USERS + self.CATEGORY_USERS + self.SOURCING_USERS +
+            self.FRAMEWORK_MANAGER_USERS + self.DATA_CONTROLLER_USERS
+        )
+        self.data_api_client.find_users_iter.side_effect = lambda role: iter(
+            [user for user in all_users if user["role"] == role]
+        )
+
+    def test_should_fetch_users_of_each_admin_role(self):
+        self._users_by_role()
+        self.client.get("/admin/admin-users")
+
+        assert sorted(self.data_api_client.find_users_iter.call_args_list) == [
+            mock.call(role="admin"),
+            mock.call(role="admin-ccs-category"),
+            mock.call(role="admin-ccs-data-controller"),
+            mock.call(role="admin-ccs-sourcing"),
+            mock.call(role="admin-framework-manager"),
+        ]
+
+    def test_should_not_paginate_a_single_page_of_users(self):
+        self._users_by_role()
+        response = self.client.get("/admin/admin-users")
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert len(document.xpath("//a[normalize-space(string())='Previous page']")) == 0
+        assert len(document.xpath("//a[normalize-space(string())='Next page']")) == 0
+
+    def test_should_paginate_users_across_roles(self):
+        self._users_by_role()
+        response = self.client.get("/admin/admin-users?page=2&page_size=4")
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert document.xpath("//td[@class='summary-item-field-with-action']//a/@href") == [
+            "/admin/admin-users/9093/edit",
+            "/admin/admin-users/9096/edit",
+            "/admin/admin-users/9090/edit",
+            "/admin/admin-users/9094/edit",
+        ]
+        prev_href = "/admin/admin-users?page=1&page_size=4"
+        assert document.xpath("//a[normalize-space(string())='Previous page']/@href") == [prev_href]
+        next_href = "/admin/admin-users?page=3&page_size=4"
+        assert document.xpath("//a[normalize-space(string())='Next page']/@href") == [next_href]
+
+    def test_should_not_link_past_last_page(self):
+        self._users_by_role()
+        response = self.client.get("/admin/admin-users?page=3&page_size=4")
+        document = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert len(document.cssselect(".summary-item-row")) == 2
+        assert len(document.xpath("//a[normalize-space(string())='Previous page']")) == 1
+        assert len(document.xpath("//a[normalize-space(string())='Next page']")) == 0
+
+    def test_should_404_for_page_past_the_end(self):
+        self._users_by_role()
+        response = self.client.get("/admin/admin-users?page=4&page_size=4")
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("query", ["page=0", "page=foo", "page_size=0", "page_size=-3", "page_size=bar"])
+    def test_should_400_for_invalid_pagination_args(self, query):
+        response = self.client.get("/admin/admin-users?{}".format(query))
+        assert response.status_code == 400
+
 
 class TestInviteAdminUserView(LoggedInApplicationTest):
     user_role = 'admin-manager'
@@ -488,19 +555,21 @@ class TestAdminManagerEditsAdminUsers(LoggedInApplicationTest):
     )
     def test_admin_manager_can_edit_admin_user_details(self, role):
         self.data_api_client.get_user.return_value = self.admin_user_to_edit
-        response1 = self.client.post(
-            "/admin/admin-users/2345/edit",
-            data={
-                "edit_admin_name": "Lady Myria Lejean",
-                "edit_admin_permissions": role,
-                "edit_admin_status": "False"
-            }
-        )
+        with mock.patch("app.main.views.admin_manager.logged_in_user_cache") as logged_in_user_cache:
+            response1 = self.client.post(
+                "/admin/admin-users/2345/edit",
+                data={
+                    "edit_admin_name": "Lady Myria Lejean",
+                    "edit_admin_permissions": role,
+                    "edit_admin_status": "False"
+                }
+            )
         assert response1.status_code == 302
         self.assert_flashes("reality.auditor@digital.cabinet-office.gov.uk has been updated.", "message")
         assert self.data_api_client.update_user.call_args_list == [mock.call(
             "2345", name="Lady Myria Lejean", role=role, active=False
         )]
+        assert logged_in_user_cache.invalidate.call_args_list == [mock.call("2345")]
 
         assert response1.location == "http://localhost/admin/admin-users"
         response2 = self.client.get(response1.location)
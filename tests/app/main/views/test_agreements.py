@@ -1,12 +1,17 @@
+from io import BytesIO
 from itertools import chain
 from urllib.parse import urlparse, parse_qs
+from zipfile import ZipFile
 
 import mock
 import pytest
+from dmapiclient import HTTPError
+from dmtestutils.fixtures import valid_pdf_bytes
 from lxml import html
 
+from app.main.helpers.agreements import AgreementsQueueCache
 from app.main.views.agreements import get_status_labels
-from ...helpers import LoggedInApplicationTest
+from ...helpers import LoggedInApplicationTest, Response
 
 
 class TestListAgreements(LoggedInApplicationTest):
@@ -306,6 +311,73 @@ class TestListAgreements(LoggedInApplicationTest):
         response = self.client.get('/admin/agreements/g-cloud-7?status=bad')
         assert response.status_code == 400
 
+    def _set_many_supplier_frameworks(self, count):
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.find_framework_suppliers.return_value = {
+            'supplierFrameworks': [
+                {
+                    'supplierName': 'Supplier {}'.format(i),
+                    'supplierId': 20000 + i,
+                    'agreementReturned': True,
+                    'agreementReturnedAt': '2015-10-30T01:01:01.000000Z',
+                    'frameworkSlug': 'g-cloud-8',
+                    'onFramework': True
+                } for i in range(count)
+            ],
+        }
+
+    def test_paginates_agreements(self):
+        self._set_many_supplier_frameworks(10)
+
+        response = self.client.get('/admin/agreements/g-cloud-8?status=signed&page=2&page_size=4')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert [
+            result.xpath("normalize-space(string())") for result in page.cssselect('.search-result-title a')
+        ] == ["Supplier 4", "Supplier 5", "Supplier 6", "Supplier 7"]
+        # the summary counts all of them, not just those on this page
+        summary_elem = page.xpath("//p[@class='govuk-body search-summary-border-bottom']")[0]
+        assert summary_elem.xpath("normalize-space(string())") == '10 agreements waiting for countersigning'
+
+        prev_href = urlparse(page.xpath("//a[normalize-space(string())='Previous page']/@href")[0])
+        assert prev_href.path == "/admin/agreements/g-cloud-8"
+        assert parse_qs(prev_href.query) == {"page": ["1"], "page_size": ["4"], "status": ["signed"]}
+        next_href = urlparse(page.xpath("//a[normalize-space(string())='Next page']/@href")[0])
+        assert parse_qs(next_href.query) == {"page": ["3"], "page_size": ["4"], "status": ["signed"]}
+
+    def test_does_not_paginate_a_single_page_of_agreements(self):
+        self._set_many_supplier_frameworks(2)
+
+        response = self.client.get('/admin/agreements/g-cloud-8')
+        page = html.fromstring(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert len(page.cssselect('.search-result')) == 2
+        assert not page.xpath("//a[normalize-space(string())='Previous page']")
+        assert not page.xpath("//a[normalize-space(string())='Next page']")
+
+    def test_404s_for_page_past_the_end(self):
+        self._set_many_supplier_frameworks(8)
+
+        response = self.client.get('/admin/agreements/g-cloud-8?page=3&page_size=4')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("query", ["page=0", "page=foo", "page_size=0", "page_size=-3", "page_size=bar"])
+    def test_invalid_page_or_page_size_raises_400(self, query):
+        self._set_many_supplier_frameworks(2)
+
+        response = self.client.get('/admin/agreements/g-cloud-8?{}'.format(query))
+        assert response.status_code == 400
+
+    def test_response_is_streamed(self):
+        self._set_many_supplier_frameworks(2)
+
+        response = self.client.get('/admin/agreements/g-cloud-8')
+
+        assert response.status_code == 200
+        assert response.is_streamed
+
 
 class TestNextAgreementRedirect(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
@@ -455,6 +527,16 @@ class TestNextAgreementRedirect(LoggedInApplicationTest):
         response = self.client.get('/admin/suppliers/151/agreements/g-cloud-8/next?status=bad')
         assert response.status_code == 400
 
+    def test_queue_is_only_fetched_once_when_cached(self):
+        with mock.patch("app.main.views.agreements.agreements_queue_cache", AgreementsQueueCache(ttl=60)):
+            for supplier_id, expected_next_supplier_id in ((4321, 31415), (31415, 27)):
+                res = self.client.get(f'/admin/suppliers/{supplier_id}/agreements/g-cloud-8/next?status=signed')
+                assert res.status_code == 302
+                assert urlparse(res.location).path == \
+                    f"/admin/suppliers/{expected_next_supplier_id}/agreements/g-cloud-8"
+
+        assert self.data_api_client.find_framework_suppliers.call_count == 1
+
     @pytest.mark.parametrize("role,expected_code", [
         ("admin", 403),
         ("admin-ccs-category", 302),
@@ -468,3 +550,99 @@ class TestNextAgreementRedirect(LoggedInApplicationTest):
         response = self.client.get('/admin/suppliers/1234/agreements/g-cloud-8/next')
         actual_code = response.status_code
         assert actual_code == expected_code, "Unexpected response {} for role {}".format(actual_code, role)
+
+
+class TestBulkUploadCountersignedAgreements(LoggedInApplicationTest):
+    user_role = 'admin-ccs-sourcing'
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.data_api_client_patch = mock.patch('app.main.views.agreements.data_api_client', autospec=True)
+        self.data_api_client = self.data_api_client_patch.start()
+        self.data_api_client.get_framework.return_value = self.load_example_listing('framework_response')
+        self.data_api_client.get_supplier_framework_info.side_effect = lambda supplier_id, framework_slug: {
+            "frameworkInterest": {
+                "onFramework": True,
+                "agreementStatus": "signed",
+                "agreementId": supplier_id * 10,
+                "declaration": {"nameOfOrganisation": "Supplier {}".format(supplier_id)},
+            }
+        }
+
+    def teardown_method(self, method):
+        self.data_api_client_patch.stop()
+        super().teardown_method(method)
+
+    def test_shows_upload_form(self):
+        response = self.client.get('/admin/agreements/g-cloud-7/countersigned-agreements')
+
+        assert response.status_code == 200
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("//input[@type='file'][@name='countersigned_agreements'][@multiple]")
+
+    def test_uploads_files_and_zip_files_and_reports_how_each_went(self):
+        self.data_api_client.update_framework_agreement.side_effect = lambda agreement_id, *args: (
+            _raise(HTTPError(Response(400), "Bad agreement")) if agreement_id == 20 else None
+        )
+        zip_bytes = BytesIO()
+        with ZipFile(zip_bytes, "w") as zip_file:
+            zip_file.writestr("agreements/2.pdf", valid_pdf_bytes)
+            zip_file.writestr("agreements/3.pdf", valid_pdf_bytes)
+        zip_bytes.seek(0)
+
+        response = self.client.post(
+            '/admin/agreements/g-cloud-7/countersigned-agreements',
+            data={"countersigned_agreements": [
+                (BytesIO(valid_pdf_bytes), "1.pdf"),
+                (zip_bytes, "agreements.zip"),
+                (BytesIO(valid_pdf_bytes), "agreement.pdf"),
+            ]},
+        )
+
+        assert response.status_code == 302
+        assert urlparse(response.location).path.startswith('/admin/agreements/g-cloud-7/countersigned-agreements/')
+        assert sorted(
+            call[0][0] for call in self.data_api_client.approve_agreement_for_countersignature.call_args_list
+        ) == [10, 20, 30]
+        assert len(self.s3.return_value.save.call_args_list) == 3
+
+        response = self.client.get(response.location)
+        assert response.status_code == 200
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("normalize-space(string(//*[@id='upload-progress']))") == "3 of 3 agreements done."
+        assert [
+            row.xpath("normalize-space(string())") for row in document.xpath("//table//tbody/tr")
+        ] == [
+            "2.pdf Bad agreement",
+            "agreement.pdf File name doesn’t start with a supplier ID",
+            "1 1.pdf",
+            "3 3.pdf",
+        ]
+
+    def test_400s_without_any_files(self):
+        response = self.client.post('/admin/agreements/g-cloud-7/countersigned-agreements', data={})
+
+        assert response.status_code == 400
+        assert "Select the countersigned agreements to upload" in response.get_data(as_text=True)
+        assert self.s3.return_value.save.call_args_list == []
+
+    def test_404s_for_unknown_upload(self):
+        assert self.client.get('/admin/agreements/g-cloud-7/countersigned-agreements/deadbeef').status_code == 404
+
+    @pytest.mark.parametrize("role,expected_code", [
+        ("admin", 403),
+        ("admin-ccs-category", 403),
+        ("admin-ccs-sourcing", 200),
+        ("admin-ccs-data-controller", 403),
+        ("admin-framework-manager", 403),
+        ("admin-manager", 403),
+    ])
+    def test_bulk_upload_is_only_accessible_to_specific_user_roles(self, role, expected_code):
+        self.user_role = role
+        response = self.client.get('/admin/agreements/g-cloud-7/countersigned-agreements')
+        actual_code = response.status_code
+        assert actual_code == expected_code, "Unexpected response {} for role {}".format(actual_code, role)
+
+
+def _raise(e):
+    raise e
@@ -46,3 +46,41 @@ class TestApplication(LoggedInApplicationTest):
         assert response.status_code == 302
         assert response.location == 'http://localhost/user/login?next=%2Fadmin'
         assert self.data_api_client.find_frameworks.call_args_list == []
+
+
+class TestSessionRefresh(LoggedInApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.app.config["DM_SESSION_REFRESH_FRACTION"] = 0.1
+        self.data_api_client_patch = mock.patch('app.main.views.services.data_api_client', autospec=True)
+        self.data_api_client = self.data_api_client_patch.start()
+        self.data_api_client.find_frameworks.return_value = {"frameworks": []}
+
+    def teardown_method(self, method):
+        self.data_api_client_patch.stop()
+        super().teardown_method(method)
+
+    def _get_session_cookies(self, url, seconds_since_login):
+        with self.client.session_transaction() as session:
+            logged_in_at = session["_refreshed_at"]
+        with mock.patch("app.time", return_value=logged_in_at + seconds_since_login):
+            response = self.client.get(url)
+        assert response.status_code == 200
+        return [cookie for cookie in response.headers.getlist('Set-Cookie') if cookie.startswith('dm_session=')]
+
+    def test_session_cookie_is_not_reissued_until_refresh_is_due(self):
+        # the first page viewed might put things in the session, e.g. a CSRF token
+        self._get_session_cookies('/admin', 0)
+        # PERMANENT_SESSION_LIFETIME is an hour, so the cookie is re-issued once 6 minutes have passed
+        assert self._get_session_cookies('/admin', 359) == []
+        assert self._get_session_cookies('/admin', 360) != []
+
+    def test_session_cookie_is_reissued_on_every_request_if_refresh_fraction_is_zero(self):
+        self.app.config["DM_SESSION_REFRESH_FRACTION"] = 0
+        assert self._get_session_cookies('/admin', 1) != []
+
+    @pytest.mark.parametrize("fraction", (0, 0.1))
+    def test_session_is_left_alone_by_status_page(self, fraction):
+        self.app.config["DM_SESSION_REFRESH_FRACTION"] = fraction
+        with mock.patch('app.status.views.data_api_client'):
+            assert self._get_session_cookies('/admin/_status?ignore-dependencies', 3600) == []
@@ -10,6 +10,7 @@ from dmtestutils.api_model_stubs import FrameworkStub
 from dmtestutils.comparisons import RestrictedAny
 from dmtestutils.fixtures import valid_pdf_bytes
 
+from app.main.helpers.s3_listings import S3ListingCache
 from ...helpers import LoggedInApplicationTest
 
 
@@ -64,10 +65,11 @@ class TestManageCommunicationsView(_BaseTestCommunicationsView):
         assert self.data_api_client.mock_calls == [
             mock.call.get_framework(self.framework_slug)
         ]
-        assert self.s3.mock_calls == [
-            mock.call("flop-slop-slap", endpoint_url=None),
-            mock.call().list('g-things-23/communications/updates/communications', load_timestamps=True),
-            mock.call().list('g-things-23/communications/updates/clarifications', load_timestamps=True),
+        # the two prefixes are listed concurrently, each with a bucket of its own
+        assert self.s3.call_args_list == [mock.call("flop-slop-slap", endpoint_url=None)] * 2
+        assert sorted(self.s3.return_value.list.call_args_list) == [
+            mock.call('g-things-23/communications/updates/clarifications', load_timestamps=True),
+            mock.call('g-things-23/communications/updates/communications', load_timestamps=True),
         ]
 
     @pytest.mark.parametrize("framework_status", ("open", "standstill",))
@@ -180,12 +182,52 @@ class TestManageCommunicationsView(_BaseTestCommunicationsView):
         assert self.data_api_client.mock_calls == [
             mock.call.get_framework(self.framework_slug)
         ]
-        assert self.s3.mock_calls == [
-            mock.call("flop-slop-slap", endpoint_url=None),
-            mock.call().list('g-things-23/communications/updates/communications', load_timestamps=True),
-            mock.call().list('g-things-23/communications/updates/clarifications', load_timestamps=True),
+        # the two prefixes are listed concurrently, each with a bucket of its own
+        assert self.s3.call_args_list == [mock.call("flop-slop-slap", endpoint_url=None)] * 2
+        assert sorted(self.s3.return_value.list.call_args_list) == [
+            mock.call('g-things-23/communications/updates/clarifications', load_timestamps=True),
+            mock.call('g-things-23/communications/updates/communications', load_timestamps=True),
         ]
 
+    def test_listings_are_cached_and_updated_by_uploads_and_deletions(self):
+        self.s3.return_value.list.side_effect = lambda prefix, *args, **kwargs: {
+            "g-things-23/communications/updates/communications": [],
+            "g-things-23/communications/updates/clarifications": [
+                {
+                    "path": "g-things-23/communications/updates/clarifications/clarification-qux.pdf",
+                    "last_modified": "2018-04-04T01:01:01.000001Z",
+                    "filename": "clarification-qux",
+                },
+            ],
+        }[prefix]
+        self.s3.return_value.save.side_effect = lambda path, *args, **kwargs: {
+            "path": path,
+            "last_modified": "2018-05-05T01:01:01.000001Z",
+            "filename": "clarification-dax",
+        }
+        self.s3.return_value.path_exists.return_value = True
+
+        with mock.patch("app.main.views.communications.s3_listing_cache", S3ListingCache(ttl=60)):
+            self.client.get(f"/admin/communications/{self.framework_slug}")
+            self.client.post(
+                f"/admin/communications/{self.framework_slug}",
+                data={'clarification': (BytesIO(valid_pdf_bytes), 'clarification-dax.pdf')},
+            )
+            self.client.post(
+                f"/admin/communications/{self.framework_slug}/delete/clarification/clarification-qux.pdf",
+                data={"confirm": "Delete file"},
+            )
+            response = self.client.get(f"/admin/communications/{self.framework_slug}")
+
+        assert response.status_code == 200
+        doc = html.fromstring(response.get_data(as_text=True))
+        assert tuple(
+            a.attrib["href"] for a in doc.xpath("//a[contains(@class, 'document-link-with-icon')]")
+        ) == ("/admin/communications/g-things-23/files/clarification/clarification-dax.pdf",)
+
+        # only listed for the first page view
+        assert self.s3.return_value.list.call_count == 2
+
 
 class TestUploadCommunicationsView(_BaseTestCommunicationsView):
     def test_post_documents_for_framework(self):
@@ -223,6 +265,16 @@ class TestUploadCommunicationsView(_BaseTestCommunicationsView):
             response.location,
         ) == f"http://localhost/admin/communications/{self.framework_slug}"
 
+    def test_post_documents_too_big_is_rejected_before_saving(self):
+        self.app.config['DM_DOCUMENT_UPLOAD_MAX_REQUEST_SIZE'] = 1024
+        response = self.client.post(
+            f"/admin/communications/{self.framework_slug}",
+            data={'communication': (BytesIO(valid_pdf_bytes + b" " * 2048), 'test-comm.pdf')},
+        )
+
+        assert response.status_code == 413
+        assert self.s3.return_value.save.call_args_list == []
+
     @pytest.mark.parametrize("disallowed_role", ["admin", "admin-ccs-category", "admin-ccs-sourcing", "admin-manager"])
     def test_disallowed_roles_can_not_post_documents_for_framework(self, disallowed_role):
         self.user_role = disallowed_role
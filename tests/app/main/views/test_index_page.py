@@ -498,3 +498,23 @@ class TestCookieBanner(LoggedInApplicationTest):
         document = html.fromstring(res.get_data(as_text=True))
         cookie_banner = document.xpath('//div[@id="dm-cookie-banner"]')
         assert cookie_banner[0].xpath('//h2//text()')[0].strip() == "Can we store analytics cookies on your device?"
+
+
+class TestPurgeFrameworkCatalogue(LoggedInApplicationTest):
+    user_role = "admin-framework-manager"
+
+    def test_purge_framework_catalogue(self):
+        with mock.patch("app.main.views.services.framework_catalogue", autospec=True) as framework_catalogue:
+            response = self.client.post("/admin/frameworks/catalogue/purge")
+
+        assert response.status_code == 302
+        assert response.location == "http://localhost/admin"
+        assert framework_catalogue.purge.call_args_list == [mock.call()]
+        self.assert_flashes("The list of frameworks has been refreshed.")
+
+    @pytest.mark.parametrize("role", ("admin", "admin-ccs-category", "admin-ccs-sourcing", "admin-manager"))
+    def test_purge_framework_catalogue_forbidden_for_other_roles(self, role):
+        self.user_role = role
+        response = self.client.post("/admin/frameworks/catalogue/purge")
+
+        assert response.status_code == 403
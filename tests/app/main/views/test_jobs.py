@@ -0,0 +1,42 @@
+import mock
+import pytest
+
+from app.main.helpers.jobs import Job, job_runner
+from ...helpers import LoggedInApplicationTest
+
+
+class TestViewJob(LoggedInApplicationTest):
+    user_role = "admin-ccs-category"
+
+    def _submit_job(self, roles):
+        with self.app.test_request_context():
+            return job_runner.submit(Job("test-job", roles=roles, total=1), lambda job: job.advance())
+
+    def test_shows_job_state(self):
+        job = self._submit_job(roles=("admin-ccs-category",))
+
+        response = self.client.get("/admin/jobs/{}".format(job.id))
+
+        assert response.status_code == 200
+        assert response.json == {
+            "id": job.id,
+            "name": "test-job",
+            "roles": ["admin-ccs-category"],
+            "data": None,
+            "status": "finished",
+            "total": 1,
+            "completed": 1,
+            "errors": {},
+            "result": None,
+            "error": None,
+            "updatedAt": mock.ANY,
+        }
+
+    @pytest.mark.parametrize("roles", (("admin",), ("admin-ccs-sourcing", "admin-framework-manager")))
+    def test_404s_for_jobs_user_cant_view(self, roles):
+        job = self._submit_job(roles=roles)
+
+        assert self.client.get("/admin/jobs/{}".format(job.id)).status_code == 404
+
+    def test_404s_for_unknown_job(self):
+        assert self.client.get("/admin/jobs/deadbeef").status_code == 404
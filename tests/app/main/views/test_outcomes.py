@@ -150,6 +150,54 @@ class TestDirectAwardView(LoggedInApplicationTest):
             '123', 'A Buyer', 'buyer@example.com'
         ]
 
+    def test_archived_services_are_only_fetched_once_each(self):
+        def project(project_id, archived_service_id, result="awarded"):
+            return {
+                "id": project_id,
+                "name": "Project {}".format(project_id),
+                "outcome": {
+                    "award": {
+                        "awardValue": "1234.00",
+                        "awardingOrganisationName": "123321",
+                        "endDate": "2020-12-12",
+                        "startDate": "2002-12-12",
+                    },
+                    "completedAt": "2018-06-19T13:37:59.713497Z",
+                    "result": result,
+                    "resultOfDirectAward": {
+                        "archivedService": {"id": archived_service_id, "service": {"id": "1234567890"}},
+                    },
+                },
+                "users": [{"id": 123, "name": "A Buyer", "emailAddress": "buyer@example.com"}],
+            }
+
+        self.data_api_client.find_direct_award_projects.return_value = {"projects": [
+            project(1, 100),
+            project(2, 200),
+            project(3, 100),
+            project(4, 300, result="cancelled"),
+            project(5, 200),
+        ]}
+        self.data_api_client.get_archived_service.side_effect = lambda archived_service_id: {"services": {
+            "serviceName": "Service {}".format(archived_service_id),
+            "supplierId": archived_service_id,
+            "supplierName": "Supplier {}".format(archived_service_id),
+        }}
+
+        response = self.client.get('/admin/direct-award/outcomes')
+        assert response.status_code == 200
+        rows = list(csv.reader(str(response.data, 'utf-8').splitlines()))
+
+        assert [(row[0], row[5]) for row in rows[1:]] == [
+            ("1", "Service 100"),
+            ("2", "Service 200"),
+            ("3", "Service 100"),
+            ("5", "Service 200"),
+        ]
+        assert sorted(
+            call[1]["archived_service_id"] for call in self.data_api_client.get_archived_service.call_args_list
+        ) == [100, 200]
+
 
 class TestDOSView(LoggedInApplicationTest):
 
@@ -172,7 +220,7 @@ class TestDOSView(LoggedInApplicationTest):
 
     @pytest.fixture(autouse=True)
     def s3(self):
-        with mock.patch("app.main.views.outcomes.s3") as s3:
+        with mock.patch("app.main.helpers.s3_buckets.s3") as s3:
             bucket = s3.S3()
             bucket.get_signed_url.side_effect = \
                 lambda path: f"https://s3.example.com/{path}?signature=deadbeef"
@@ -108,6 +108,39 @@ class TestServiceUpdates(LoggedInApplicationTest):
                 for tr in document.xpath('//table[@class="summary-item-body"]/thead/tr')
             ) == (('Supplier', 'Service ID', 'Edited', 'Changes'),)
 
+    @pytest.mark.parametrize("prewarm", (False, True))
+    @mock.patch("app.main.views.service_updates.get_service_diffs", autospec=True)
+    @mock.patch("app.main.views.service_updates.service_diff_cache", autospec=True)
+    def test_prewarms_service_diffs_if_enabled(self, service_diff_cache, get_service_diffs, prewarm):
+        self.app.config["DM_SERVICE_DIFF_CACHE_PREWARM"] = prewarm
+        self.data_api_client.find_audit_events.return_value = {
+            "auditEvents": [
+                {"data": {"oldArchivedServiceId": 240697, "serviceId": "1123456789012351", "supplierName": "Soap Ltd"},
+                 "createdAt": "2012-07-15T18:03:43.061077Z"},
+                {"data": {"oldArchivedServiceId": 240699, "serviceId": "1123456789012348", "supplierName": "Soap Ltd"},
+                 "createdAt": "2016-03-05T10:42:16.061077Z"},
+            ],
+            "links": {},
+        }
+        self.data_api_client.get_service.side_effect = lambda service_id: {"services": {"id": service_id}}
+
+        response = self.client.get('/admin/services/updates/unapproved')
+        assert response.status_code == 200
+
+        if not prewarm:
+            assert service_diff_cache.prewarm.called is False
+            return
+
+        (warm_calls,), _ = service_diff_cache.prewarm.call_args
+        warm_calls = list(warm_calls)
+        assert [archived_service_id for archived_service_id, _ in warm_calls] == [240697, 240699]
+        for _, warm_call in warm_calls:
+            warm_call()
+        assert get_service_diffs.call_args_list == [
+            mock.call(240697, {"id": "1123456789012351"}),
+            mock.call(240699, {"id": "1123456789012348"}),
+        ]
+
     def test_acknowledge_audit_event_happy_path(self):
         audit_event = {
             'auditEvents': {
@@ -13,6 +13,7 @@ from lxml import html
 
 from dmtestutils.fixtures import valid_pdf_bytes
 
+from app.main.helpers.service_diffs import ServiceDiffCache
 from ...helpers import LoggedInApplicationTest
 
 
@@ -1597,18 +1598,19 @@ class TestServiceUpdates(LoggedInApplicationTest):
 
     @staticmethod
     def _mock_find_audit_events_side_effect(find_audit_events_api_response, implicit_page_len, **kwargs):
-        if kwargs.get("page") or kwargs.get("page_len"):
+        if kwargs.get("page_len"):
             raise NotImplementedError
+        page = kwargs.get("page") or 1
 
         links = {
             "self": "http://example.com/dummy",
         }
-        if len(find_audit_events_api_response) > implicit_page_len:
+        if len(find_audit_events_api_response) > implicit_page_len * page:
             links["next"] = "http://example.com/dummy_next"
         if kwargs.get("latest_first") == "true":
             find_audit_events_api_response = find_audit_events_api_response[::-1]
         return {
-            "auditEvents": find_audit_events_api_response[:implicit_page_len],
+            "auditEvents": find_audit_events_api_response[implicit_page_len * (page - 1):implicit_page_len * page],
             "links": links,
         }
 
@@ -1901,6 +1903,7 @@ class TestServiceUpdates(LoggedInApplicationTest):
                 "audit_type": AuditTypes.update_service,
                 "acknowledged": "false",
                 "latest_first": mock.ANY,
+                "page": mock.ANY,
             } for args, kwargs in self.data_api_client.find_audit_events.call_args_list
         )
 
@@ -2025,3 +2028,93 @@ class TestServiceUpdates(LoggedInApplicationTest):
         doc = html.fromstring(response.get_data(as_text=True))
 
         assert doc.xpath("//p[normalize-space(string())=$expected_text]", expected_text=expected_latest_edit_info)
+
+    def test_diffs_are_cached_between_page_loads(self, html_diff_tables_from_sections_iter):
+        find_audit_events_api_response, old_versions_of_services = self.disabled_service_one_edit[:2]
+        self.data_api_client.get_service.side_effect = partial(self._mock_get_service_side_effect, "disabled")
+        self.data_api_client.find_audit_events.side_effect = partial(
+            self._mock_find_audit_events_side_effect,
+            find_audit_events_api_response,
+            5,
+        )
+        self.data_api_client.get_archived_service.side_effect = partial(
+            self._mock_get_archived_service_side_effect,
+            old_versions_of_services,
+        )
+        self.data_api_client.get_supplier.side_effect = self._mock_get_supplier_side_effect
+        html_diff_tables_from_sections_iter.side_effect = lambda *a, **ka: iter((
+            ("dummy_section", "dummy_question", Markup("<div class='dummy-diff-table'>dummy</div>")),
+        ))
+
+        self.user_role = "admin-ccs-category"
+        with mock.patch("app.main.views.services.service_diff_cache", ServiceDiffCache(max_size=10)):
+            for _ in range(2):
+                response = self.client.get('/admin/services/151/updates')
+
+                assert response.status_code == 200
+                doc = html.fromstring(response.get_data(as_text=True))
+                assert len(doc.xpath("//*[@class='dummy-diff-table']")) == 1
+
+        assert html_diff_tables_from_sections_iter.call_count == 1
+
+    @staticmethod
+    def _many_edits(number_of_edits):
+        return [
+            {
+                "id": 1000 + i,
+                "type": "update_service",
+                "acknowledged": False,
+                "data": {
+                    "oldArchivedServiceId": str(2000 + i),
+                    "newArchivedServiceId": str(2001 + i),
+                },
+                "createdAt": "2014-02-0{}T10:11:12.345Z".format(1 + i // 3),
+                "user": "editor@example.com",
+            } for i in range(number_of_edits)
+        ]
+
+    @pytest.mark.parametrize("max_audit_events,expected_number_of_edits", (
+        # walks through all four pages
+        (1000, 7),
+        # stops after the first page, fetching the oldest page which can't be joined up with it
+        (2, 4),
+        # stops after the third page, fetching the oldest page which overlaps it
+        (5, 7),
+    ))
+    def test_unacknowledged_updates_spanning_many_pages(
+        self,
+        html_diff_tables_from_sections_iter,
+        max_audit_events,
+        expected_number_of_edits,
+    ):
+        self.app.config["DM_SERVICE_UPDATES_MAX_AUDIT_EVENTS"] = max_audit_events
+        self.data_api_client.get_service.side_effect = partial(self._mock_get_service_side_effect, "published")
+        self.data_api_client.find_audit_events.side_effect = partial(
+            self._mock_find_audit_events_side_effect,
+            self._many_edits(7),
+            2,
+        )
+        self.data_api_client.get_archived_service.side_effect = partial(
+            self._mock_get_archived_service_side_effect,
+            {str(2000 + i): {"serviceName": "Soap {}".format(i)} for i in range(7)},
+        )
+        self.data_api_client.get_supplier.side_effect = self._mock_get_supplier_side_effect
+        html_diff_tables_from_sections_iter.side_effect = lambda *a, **ka: iter(())
+
+        self.user_role = "admin-ccs-category"
+        response = self.client.get('/admin/services/151/updates')
+
+        assert response.status_code == 200
+        doc = html.fromstring(response.get_data(as_text=True))
+
+        assert self.data_api_client.get_archived_service.call_args_list == [
+            mock.call("2000"),
+        ]
+        assert doc.xpath(
+            "//p[normalize-space(string())=$expected_text]",
+            expected_text="editor@example.com made {} edits between Saturday 1 February 2014 "
+            "and Monday 3 February 2014.".format(expected_number_of_edits),
+        )
+        ack_forms = doc.xpath("//form[.//button[contains(text(), 'Approve edits')]]")
+        assert len(ack_forms) == 1
+        assert ack_forms[0].action == "/admin/services/151/updates/1006/approve"
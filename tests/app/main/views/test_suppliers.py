@@ -1,4 +1,5 @@
 from io import BytesIO
+import json
 from urllib.parse import urlparse, parse_qs
 
 import mock
@@ -23,6 +24,8 @@ from dmtestutils.mocking import (
     assert_args_and_raise,
 )
 
+from app.main.helpers.jobs import JobRunner, job_runner
+
 from ...helpers import LoggedInApplicationTest, Response
 
 
@@ -582,6 +585,53 @@ class TestSuppliersListView(LoggedInApplicationTest):
         self.data_api_client.get_supplier.assert_called_once_with("12345")
 
 
+class TestSupplierTypeahead(LoggedInApplicationTest):
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.data_api_client_patch = mock.patch('app.main.views.suppliers.data_api_client', autospec=True)
+        self.data_api_client = self.data_api_client_patch.start()
+        self.data_api_client.find_suppliers.return_value = {
+            "suppliers": [SupplierStub(id=i, name=f"Supplier {i}").response() for i in range(12)],
+            "links": {},
+        }
+
+    def teardown_method(self, method):
+        self.data_api_client_patch.stop()
+        super().teardown_method(method)
+
+    @pytest.mark.parametrize("role,expected_code", [
+        ("admin", 200),
+        ("admin-ccs-category", 200),
+        ("admin-ccs-sourcing", 200),
+        ("admin-framework-manager", 200),
+        ("admin-ccs-data-controller", 200),
+        ("admin-manager", 403),
+    ])
+    def test_typeahead_is_available_to_users_with_right_roles(self, role, expected_code):
+        self.user_role = role
+        response = self.client.get("/admin/suppliers/typeahead?q=supp")
+        actual_code = response.status_code
+        assert actual_code == expected_code, "Unexpected response {} for role {}".format(actual_code, role)
+
+    def test_returns_names_and_ids_of_first_matches(self):
+        response = self.client.get("/admin/suppliers/typeahead?q=+Supp+")
+
+        assert response.status_code == 200
+        assert response.json == {
+            "suppliers": [{"id": i, "name": f"Supplier {i}"} for i in range(10)],
+        }
+        assert self.data_api_client.find_suppliers.call_args_list == [mock.call(name="Supp")]
+
+    @pytest.mark.parametrize("query_string", ("", "?q=", "?q=+S+"))
+    def test_short_queries_dont_search(self, query_string):
+        response = self.client.get(f"/admin/suppliers/typeahead{query_string}")
+
+        assert response.status_code == 200
+        assert response.json == {"suppliers": []}
+        assert self.data_api_client.find_suppliers.call_args_list == []
+
+
 class TestSupplierUsersView(LoggedInApplicationTest):
 
     def setup_method(self, method):
@@ -771,9 +821,11 @@ class TestSupplierUsersView(LoggedInApplicationTest):
     def test_should_call_api_to_unlock_user(self):
         self.data_api_client.update_user.return_value = self.load_example_listing("user_response")
 
-        response = self.client.post('/admin/suppliers/users/999/unlock')
+        with mock.patch("app.main.views.suppliers.logged_in_user_cache") as logged_in_user_cache:
+            response = self.client.post('/admin/suppliers/users/999/unlock')
 
         self.data_api_client.update_user.assert_called_once_with(999, locked=False, updater="test@example.com")
+        assert logged_in_user_cache.invalidate.call_args_list == [mock.call(999)]
 
         assert response.status_code == 302
         assert response.location == "http://localhost/admin/suppliers/users?supplier_id=1000"
@@ -797,9 +849,11 @@ class TestSupplierUsersView(LoggedInApplicationTest):
     def test_should_call_api_to_activate_user(self):
         self.data_api_client.update_user.return_value = self.load_example_listing("user_response")
 
-        response = self.client.post('/admin/suppliers/users/999/activate')
+        with mock.patch("app.main.views.suppliers.logged_in_user_cache") as logged_in_user_cache:
+            response = self.client.post('/admin/suppliers/users/999/activate')
 
         self.data_api_client.update_user.assert_called_once_with(999, active=True, updater="test@example.com")
+        assert logged_in_user_cache.invalidate.call_args_list == [mock.call(999)]
 
         assert response.status_code == 302
         assert response.location == "http://localhost/admin/suppliers/users?supplier_id=1000"
@@ -834,12 +888,14 @@ class TestSupplierUsersView(LoggedInApplicationTest):
 
     def test_should_call_api_to_deactivate_user(self):
         self.data_api_client.update_user.return_value = self.load_example_listing("user_response")
-        response = self.client.post(
-            '/admin/suppliers/users/999/deactivate',
-            data={'supplier_id': 1000}
-        )
+        with mock.patch("app.main.views.suppliers.logged_in_user_cache") as logged_in_user_cache:
+            response = self.client.post(
+                '/admin/suppliers/users/999/deactivate',
+                data={'supplier_id': 1000}
+            )
 
         self.data_api_client.update_user.assert_called_once_with(999, active=False, updater="test@example.com")
+        assert logged_in_user_cache.invalidate.call_args_list == [mock.call(999)]
 
         assert response.status_code == 302
         assert response.location == "http://localhost/admin/suppliers/users?supplier_id=1000"
@@ -1262,7 +1318,8 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
                 status=initial_status  # Enabled services should not be included
             )
         ]
-        assert self.data_api_client.update_service_status.call_args_list == [
+        # the updates are made concurrently, so may happen in any order
+        assert sorted(self.data_api_client.update_service_status.call_args_list) == [
             mock.call('5687123785023488', result_status, 'test@example.com', wait_for_index=False),
             mock.call('5687123785023489', result_status, 'test@example.com', wait_for_index=False),
             mock.call('5687123785023490', result_status, 'test@example.com', wait_for_index=False),
@@ -1285,6 +1342,112 @@ class TestToggleSupplierServicesView(LoggedInApplicationTest):
         with self.client.session_transaction() as session:
             assert session['_flashes'][0][1] == expected_flash_message
 
+    def _three_services(self):
+        service_1 = self.load_example_listing('services_response')['services'][0]
+        service_2 = dict(service_1, id='5687123785023489')
+        service_3 = dict(service_1, id='5687123785023490')
+        self.data_api_client.find_services_iter.side_effect = lambda *a, **k: iter((service_1, service_2, service_3,))
+
+    @staticmethod
+    def _fail_to_update(failing_service_id):
+        def update_service_status(service_id, *args, **kwargs):
+            if service_id == failing_service_id:
+                raise HTTPError(Response(500))
+        return update_service_status
+
+    def test_carries_on_and_flashes_error_message_if_some_updates_fail(self):
+        self._three_services()
+        self.data_api_client.update_service_status.side_effect = self._fail_to_update('5687123785023489')
+
+        response = self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+
+        assert response.status_code == 302
+        assert self.data_api_client.update_service_status.call_count == 3
+        self.assert_flashes(
+            "1 of 3 G-Cloud 8 services for ‘PROACTIS Group Ltd’ could not be updated: 5687123785023489. "
+            "The other services were updated.",
+            "error",
+        )
+
+    def test_updates_services_in_background_above_threshold(self):
+        self.app.config['DM_BULK_SERVICE_STATUS_BACKGROUND_THRESHOLD'] = 2
+        self._three_services()
+
+        with mock.patch.object(JobRunner, '_run', autospec=True) as run_job:
+            response = self.client.post('/admin/suppliers/1000/services?remove=g-cloud-8')
+        runner, app, job, work = run_job.call_args[0]
+
+        progress_url = 'http://localhost/admin/suppliers/1000/services/status-changes/{}'.format(job.id)
+        assert response.status_code == 302
+        assert response.location == progress_url
+        assert self.data_api_client.update_service_status.called is False
+
+        response = self.client.get(progress_url)
+        assert response.status_code == 200
+        document = html.fromstring(response.get_data(as_text=True))
+        assert document.xpath("//meta[@http-equiv='refresh']")
+        assert document.xpath("normalize-space(//p[@id='status-change-progress'])").startswith(
+            "0 of 3 services done."
+        )
+
+        response = self.client.get('/admin/jobs/{}'.format(job.id))
+        assert response.status_code == 200
+        assert response.json["status"] == "queued"
+        assert (response.json["completed"], response.json["total"]) == (0, 3)
+
+        self.data_api_client.update_service_status.side_effect = self._fail_to_update('5687123785023490')
+        JobRunner._run(runner, app, job, work)
+
+        response = self.client.get(progress_url)
+        assert response.status_code == 200
+        document = html.fromstring(response.get_data(as_text=True))
+        assert not document.xpath("//meta[@http-equiv='refresh']")
+        assert document.xpath("normalize-space(//p[@id='status-change-progress'])") == "3 of 3 services done."
+        assert "5687123785023490" in document.xpath("string(//table)")
+
+        response = self.client.get('/admin/jobs/{}'.format(job.id))
+        assert response.status_code == 200
+        assert response.json["status"] == "finished"
+        assert (response.json["completed"], response.json["total"]) == (3, 3)
+        assert list(response.json["errors"]) == ["5687123785023490"]
+
+    def test_unknown_status_change_is_404(self):
+        response = self.client.get('/admin/suppliers/1000/services/status-changes/deadbeef')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("supplier_id, expected_status_code", ((1000, 200), (1001, 404)))
+    def test_status_change_run_by_another_process_is_shown(self, supplier_id, expected_status_code):
+        shared_store = mock.Mock()
+        shared_store.get.return_value = json.dumps({
+            "id": "deadbeef",
+            "name": "bulk-service-status-change",
+            "roles": ["admin-ccs-category"],
+            "data": {
+                "supplierId": 1000,
+                "supplierName": "PROACTIS Group Ltd",
+                "frameworkSlug": "g-cloud-8",
+                "frameworkName": "G-Cloud 8",
+                "newStatus": "disabled",
+            },
+            "status": "running",
+            "total": 3,
+            "completed": 1,
+            "errors": {},
+            "result": None,
+            "error": None,
+            "updatedAt": 0,
+        })
+
+        with mock.patch.object(job_runner, "shared_store", shared_store):
+            response = self.client.get(f'/admin/suppliers/{supplier_id}/services/status-changes/deadbeef')
+
+        assert response.status_code == expected_status_code
+        if expected_status_code == 200:
+            document = html.fromstring(response.get_data(as_text=True))
+            assert document.xpath("normalize-space(//p[@id='status-change-progress'])").startswith(
+                "1 of 3 services done."
+            )
+
 
 class TestSupplierDraftServicesView(LoggedInApplicationTest):
     user_role = 'admin-framework-manager'
@@ -1729,15 +1892,17 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
     def test_admin_and_ccs_category_roles_can_update_supplier_name(self, allowed_role, company_name):
         self.user_role = allowed_role
         self.data_api_client.get_supplier.return_value = {"suppliers": {"id": 1234, "name": "Something Old"}}
-        response = self.client.post(
-            '/admin/suppliers/1234/edit/name',
-            data={'new_supplier_name': company_name}
-        )
+        with mock.patch("app.main.views.suppliers.supplier_search_cache") as supplier_search_cache:
+            response = self.client.post(
+                '/admin/suppliers/1234/edit/name',
+                data={'new_supplier_name': company_name}
+            )
         assert response.status_code == 302
         assert response.location == 'http://localhost/admin/suppliers/1234'
         self.data_api_client.update_supplier.assert_called_once_with(
             1234, {'name': "Something New"}, "test@example.com"
         )
+        assert supplier_search_cache.purge.call_args_list == [mock.call()]
         self.assert_flashes("The details for ‘Something New’ have been updated.")
 
     def test_ccs_sourcing_role_can_not_update_supplier_name(self):
@@ -1792,15 +1957,17 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
                 "contactInformation": []
             }
         }
-        response = self.client.post(
-            '/admin/suppliers/1000/edit/registered-name',
-            data={'registered_company_name': "Something New"}
-        )
+        with mock.patch("app.main.views.suppliers.supplier_search_cache") as supplier_search_cache:
+            response = self.client.post(
+                '/admin/suppliers/1000/edit/registered-name',
+                data={'registered_company_name': "Something New"}
+            )
         assert response.status_code == 302
         assert response.location == 'http://localhost/admin/suppliers/1000'
         self.data_api_client.update_supplier.assert_called_once_with(
             1000, {'registeredName': "Something New"}, "test@example.com"
         )
+        assert supplier_search_cache.purge.call_args_list == [mock.call()]
         self.assert_flashes("The details for ‘ABC’ have been updated.")
 
     def test_data_controller_role_can_update_companies_house_number(self):
@@ -1814,10 +1981,11 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
             }
         }
 
-        response = self.client.post(
-            '/admin/suppliers/1234/edit/registered-company-number',
-            data={'companies_house_number': '12345678'}
-        )
+        with mock.patch("app.main.views.suppliers.supplier_search_cache") as supplier_search_cache:
+            response = self.client.post(
+                '/admin/suppliers/1234/edit/registered-company-number',
+                data={'companies_house_number': '12345678'}
+            )
         assert response.status_code == 302
         assert response.location == 'http://localhost/admin/suppliers/1234'
         self.data_api_client.update_supplier.assert_called_once_with(
@@ -1828,6 +1996,7 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
             },
             "test@example.com"
         )
+        assert supplier_search_cache.purge.call_args_list == [mock.call()]
         self.assert_flashes("The details for ‘ABC’ have been updated.")
 
     def test_data_controller_role_can_update_other_registration_number(self):
@@ -1904,20 +2073,22 @@ class TestUpdatingSupplierDetails(LoggedInApplicationTest):
                 ]
             }
         }
-        response = self.client.post(
-            '/admin/suppliers/1234/edit/registered-address',
-            data={
-                'street': '10 Downing St',
-                'city': 'London',
-                'postcode': 'AB1 2DE',
-                'country': 'country:GB'
-            }
-        )
+        with mock.patch("app.main.views.suppliers.supplier_search_cache") as supplier_search_cache:
+            response = self.client.post(
+                '/admin/suppliers/1234/edit/registered-address',
+                data={
+                    'street': '10 Downing St',
+                    'city': 'London',
+                    'postcode': 'AB1 2DE',
+                    'country': 'country:GB'
+                }
+            )
         assert response.status_code == 302
         assert response.location == 'http://localhost/admin/suppliers/1234'
         self.data_api_client.update_supplier.assert_called_once_with(
             1234, {'registrationCountry': "country:GB"}, "test@example.com"
         )
+        assert supplier_search_cache.purge.call_args_list == [mock.call()]
         self.data_api_client.update_contact_information.assert_called_once_with(
             1234,
             999,
@@ -2244,7 +2415,7 @@ class TestDownloadSignedAgreementFile(LoggedInApplicationTest):
         assert download_agreement_file.called is False
 
 
-@mock.patch('app.main.views.suppliers.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestDownloadAgreementFile(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
 
@@ -2320,7 +2491,7 @@ class TestDownloadAgreementFile(LoggedInApplicationTest):
         assert response.status_code == 302
 
 
-@mock.patch('app.main.views.suppliers.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestListCountersignedAgreementFile(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
 
@@ -2403,7 +2574,7 @@ class TestListCountersignedAgreementFile(LoggedInApplicationTest):
 
 
 @freeze_time('2016-12-25 06:30:01')
-@mock.patch('app.main.views.suppliers.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestUploadCountersignedAgreementFile(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
 
@@ -2458,10 +2629,19 @@ class TestUploadCountersignedAgreementFile(LoggedInApplicationTest):
                 "declaration": {"nameOfOrganisation": "Supplier Mc Supply Face"},
             }
         }
-        response = self.client.post(
-            '/admin/suppliers/1234/countersigned-agreements/g-cloud-7',
-            data={'countersigned_agreement': (BytesIO(valid_pdf_bytes), 'countersigned_agreement.pdf')}
-        )
+        with mock.patch("app.main.views.suppliers.agreements_queue_cache") as agreements_queue_cache, \
+                mock.patch("app.main.helpers.countersigned_agreements.signed_url_cache") as signed_url_cache:
+            response = self.client.post(
+                '/admin/suppliers/1234/countersigned-agreements/g-cloud-7',
+                data={'countersigned_agreement': (BytesIO(valid_pdf_bytes), 'countersigned_agreement.pdf')}
+            )
+
+        assert agreements_queue_cache.set_agreement_status.call_args_list == [
+            mock.call("g-cloud-7", 1234, "countersigned"),
+        ]
+        assert signed_url_cache.forget.call_args_list == [
+            mock.call(self.app.config["DM_AGREEMENTS_BUCKET"], expected_countersign_path),
+        ]
 
         self.data_api_client.approve_agreement_for_countersignature.assert_called_once_with(
             1212,
@@ -2605,7 +2785,7 @@ class TestUploadCountersignedAgreementFile(LoggedInApplicationTest):
         )
 
 
-@mock.patch('app.main.views.suppliers.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestRemoveCountersignedAgreementFile(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
 
@@ -2619,11 +2799,24 @@ class TestRemoveCountersignedAgreementFile(LoggedInApplicationTest):
         super().teardown_method(method)
 
     def test_should_remove_countersigned_agreement(self, s3):
+        countersigned_path = "g-cloud-7/agreements/1234/1234-agreement-countersignature-2016-12-25-063001.pdf"
+        self.data_api_client.get_supplier_framework_info.return_value = {
+            "frameworkInterest": {"agreementId": 1212, "countersignedPath": countersigned_path},
+        }
         s3.S3.return_value.delete_key.return_value = {'Key': 'digitalmarketplace-documents-dev-dev'
                                                       ',g-cloud-7/agreements/93495/93495-'
                                                       'countersigned-framework-agreement.pdf'}
-        response = self.client.post('/admin/suppliers/1234/countersigned-agreements-remove/g-cloud-7')
+        with mock.patch("app.main.views.suppliers.agreements_queue_cache") as agreements_queue_cache, \
+                mock.patch("app.main.views.suppliers.signed_url_cache") as signed_url_cache:
+            response = self.client.post('/admin/suppliers/1234/countersigned-agreements-remove/g-cloud-7')
         assert response.status_code == 302
+        assert agreements_queue_cache.set_agreement_status.call_args_list == [
+            mock.call("g-cloud-7", 1234, "approved"),
+        ]
+        s3.S3.return_value.delete_key.assert_called_once_with(countersigned_path)
+        assert signed_url_cache.forget.call_args_list == [
+            mock.call(self.app.config["DM_AGREEMENTS_BUCKET"], countersigned_path),
+        ]
 
     def test_admin_should_not_be_able_to_remove_countersigned_agreement(self, s3):
         self.user_role = 'admin'
@@ -2653,7 +2846,7 @@ class TestRemoveCountersignedAgreementFile(LoggedInApplicationTest):
         assert response.status_code == 200
 
 
-@mock.patch('app.main.views.suppliers.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestViewingSignedAgreement(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
 
@@ -2696,7 +2889,6 @@ class TestViewingSignedAgreement(LoggedInApplicationTest):
 
         assert response.status_code == 404
         self.data_api_client.get_supplier.assert_called_with(1234)
-        assert self.data_api_client.get_framework.call_args_list == []
 
     def test_should_404_if_framework_does_not_exist(self, s3):
         self.data_api_client.get_framework.side_effect = APIError(Response(404))
@@ -2899,10 +3091,15 @@ class TestPutSignedAgreementOnHold(LoggedInApplicationTest):
         assert res.status_code == 403
 
     def test_happy_path(self):
-        res = self.client.post(
-            "/admin/suppliers/agreements/123/on-hold",
-            data={"nameOfOrganisation": "Test"},
-        )
+        with mock.patch("app.main.views.suppliers.agreements_queue_cache") as agreements_queue_cache:
+            res = self.client.post(
+                "/admin/suppliers/agreements/123/on-hold",
+                data={"nameOfOrganisation": "Test"},
+            )
+
+        assert agreements_queue_cache.set_agreement_status.call_args_list == [
+            mock.call("g-cloud-99-flake", 4321, "on-hold"),
+        ]
 
         self.data_api_client.put_signed_agreement_on_hold.assert_called_once_with('123', 'test@example.com')
         self.assert_flashes("The agreement for Test was put on hold.")
@@ -2954,10 +3151,15 @@ class TestApproveAgreement(LoggedInApplicationTest):
         assert res.status_code == 403
 
     def test_happy_path(self):
-        res = self.client.post(
-            "/admin/suppliers/agreements/123/approve",
-            data={"nameOfOrganisation": "Test"},
-        )
+        with mock.patch("app.main.views.suppliers.agreements_queue_cache") as agreements_queue_cache:
+            res = self.client.post(
+                "/admin/suppliers/agreements/123/approve",
+                data={"nameOfOrganisation": "Test"},
+            )
+
+        assert agreements_queue_cache.set_agreement_status.call_args_list == [
+            mock.call("g-cloud-99p-world", 4321, "approved"),
+        ]
 
         self.data_api_client.approve_agreement_for_countersignature.assert_called_once_with(
             '123', 'test@example.com', '1234'
@@ -3015,10 +3217,15 @@ class TestUnapproveAgreement(LoggedInApplicationTest):
         assert res.status_code == 403
 
     def test_happy_path(self):
-        res = self.client.post(
-            "/admin/suppliers/agreements/123/unapprove",
-            data={"nameOfOrganisation": "Test"},
-        )
+        with mock.patch("app.main.views.suppliers.agreements_queue_cache") as agreements_queue_cache:
+            res = self.client.post(
+                "/admin/suppliers/agreements/123/unapprove",
+                data={"nameOfOrganisation": "Test"},
+            )
+
+        assert agreements_queue_cache.set_agreement_status.call_args_list == [
+            mock.call("g-cloud-99p-world", 4321, "signed"),
+        ]
 
         self.data_api_client.unapprove_agreement_for_countersignature.assert_called_once_with(
             '123',
@@ -3054,7 +3261,7 @@ class TestUnapproveAgreement(LoggedInApplicationTest):
 
 
 @mock.patch('app.main.views.suppliers.get_signed_url')
-@mock.patch('app.main.views.suppliers.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestCorrectButtonsAreShownDependingOnContext(LoggedInApplicationTest):
     user_role = 'admin-ccs-sourcing'
 
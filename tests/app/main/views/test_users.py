@@ -204,7 +204,7 @@ class TestUsersView(LoggedInApplicationTest):
         assert document.xpath('//button[contains(text(), "Activate")]')
 
 
-@mock.patch('app.main.views.users.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestUserListPage(LoggedInApplicationTest):
     user_role = 'admin-framework-manager'
 
@@ -279,13 +279,14 @@ class TestUserListPage(LoggedInApplicationTest):
     def test_download_supplier_user_account_list_report_redirects_to_s3_url(self, get_signed_url, s3):
         get_signed_url.return_value = 'http://path/to/csv?querystring'
         self.app.config['DM_ASSETS_URL'] = 'http://example.com'
+        self.app.config['DM_REPORTS_BUCKET'] = 'digitalmarketplace-reports'
 
         response = self.client.get("/admin/frameworks/g-cloud-9/users/accounts/download")
         assert response.status_code == 302
 
         assert get_signed_url.call_args_list == [
             mock.call(
-                s3.S3.return_value,
+                'digitalmarketplace-reports',
                 'g-cloud-9/reports/all-email-accounts-for-suppliers-g-cloud-9.csv',
                 'http://example.com'
             ),
@@ -295,20 +296,21 @@ class TestUserListPage(LoggedInApplicationTest):
     def test_download_supplier_official_details_list_report_redirects_to_s3_url(self, get_signed_url, s3):
         get_signed_url.return_value = 'http://path/to/csv?querystring'
         self.app.config['DM_ASSETS_URL'] = 'http://example.com'
+        self.app.config['DM_REPORTS_BUCKET'] = 'digitalmarketplace-reports'
 
         response = self.client.get("/admin/frameworks/g-cloud-9/users/official/download")
         assert response.status_code == 302
 
         assert get_signed_url.call_args_list == [
             mock.call(
-                s3.S3.return_value,
+                'digitalmarketplace-reports',
                 'g-cloud-9/reports/official-details-for-suppliers-g-cloud-9.csv',
                 'http://example.com'
             ),
         ]
 
 
-@mock.patch('app.main.views.users.s3')
+@mock.patch('app.main.helpers.s3_buckets.s3')
 class TestUserResearchParticipantsExport(LoggedInApplicationTest):
     user_role = 'admin-framework-manager'
 
@@ -370,6 +372,16 @@ class TestUserResearchParticipantsExport(LoggedInApplicationTest):
         assert 'mariah@example.com,Mariah Carey' in response.get_data(as_text=True)
         self.data_api_client.find_users_iter.assert_called_once_with(role='buyer')
 
+    @pytest.mark.parametrize(('query', 'expected_lines'), (
+        ('', ['mariah@example.com,Mariah Carey', 'shania@example.com,Shania Twain']),
+        ('?order=api', ['shania@example.com,Shania Twain', 'mariah@example.com,Mariah Carey']),
+    ))
+    def test_download_list_of_all_buyers_can_skip_sorting(self, s3, query, expected_lines):
+        response = self.client.get('/admin/users/download/buyers{}'.format(query))
+
+        assert response.status_code == 200
+        assert response.get_data(as_text=True).splitlines() == ['email address,name'] + expected_lines
+
     @pytest.mark.parametrize(
         ('role', 'status_code'),
         (
@@ -498,13 +510,14 @@ class TestUserResearchParticipantsExport(LoggedInApplicationTest):
     def test_supplier_download_redirects_to_s3(self, get_signed_url, s3):
         get_signed_url.return_value = 'http://asseturl/path/to/csv?querystring'
         self.app.config['DM_ASSETS_URL'] = 'http://example.com'
+        self.app.config['DM_REPORTS_BUCKET'] = 'digitalmarketplace-reports'
 
         response = self.client.get('/admin/frameworks/g-cloud-9/user-research/download')
         assert response.status_code == 302
 
         assert get_signed_url.call_args_list == [
             mock.call(
-                s3.S3.return_value,
+                'digitalmarketplace-reports',
                 'g-cloud-9/reports/user-research-suppliers-on-g-cloud-9.csv',
                 'http://example.com'
             ),
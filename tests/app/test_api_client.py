@@ -0,0 +1,124 @@
+from functools import partial
+
+import dmapiclient
+import mock
+import pytest
+
+from app.api_client import RequestCachingDataAPIClient
+from app.main.helpers.concurrency import gather
+from .helpers import BaseApplicationTest
+
+
+class TestRequestCachingDataAPIClient(BaseApplicationTest):
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.api_client = RequestCachingDataAPIClient("http://api.example.com", "auth-token")
+        self._request_patch = mock.patch.object(dmapiclient.DataAPIClient, "_request", autospec=True)
+        self._request = self._request_patch.start()
+        self._request.side_effect = lambda self_, method, url, data=None, params=None, **kwargs: {
+            "method": method,
+            "url": url,
+            "params": params,
+        }
+
+    def teardown_method(self, method):
+        self._request_patch.stop()
+        super().teardown_method(method)
+
+    def test_repeated_reads_are_made_once_per_request(self):
+        with self.app.test_request_context():
+            supplier = self.api_client.get_supplier(1234)
+            assert self.api_client.get_supplier(1234) == supplier
+            self.api_client.get_supplier(5678)
+
+        assert [call[0][1:3] for call in self._request.call_args_list] == [
+            ("GET", "/suppliers/1234"),
+            ("GET", "/suppliers/5678"),
+        ]
+
+        with self.app.test_request_context():
+            self.api_client.get_supplier(1234)
+
+        assert self._request.call_count == 3
+
+    def test_reads_with_different_params_are_made_separately(self):
+        with self.app.test_request_context():
+            self.api_client.find_users(supplier_id=1234)
+            self.api_client.find_users(supplier_id=1234, page=2)
+            self.api_client.find_users(supplier_id=1234)
+
+        assert self._request.call_count == 2
+
+    def test_each_call_gets_its_own_copy_of_the_response(self):
+        with self.app.test_request_context():
+            self.api_client.get_supplier(1234)["url"] = "changed"
+            assert self.api_client.get_supplier(1234)["url"] == "/suppliers/1234"
+
+    def test_writes_forget_remembered_reads(self):
+        with self.app.test_request_context():
+            self.api_client.get_supplier(1234)
+            self.api_client.update_supplier(1234, {"name": "New name"}, "user@example.com")
+            self.api_client.get_supplier(1234)
+
+        assert [call[0][1] for call in self._request.call_args_list] == ["GET", "POST", "GET"]
+
+    def test_failed_writes_forget_remembered_reads(self):
+        with self.app.test_request_context():
+            self.api_client.get_supplier(1234)
+            self._request.side_effect = dmapiclient.HTTPError()
+            with pytest.raises(dmapiclient.HTTPError):
+                self.api_client.update_supplier(1234, {"name": "New name"}, "user@example.com")
+            self._request.side_effect = None
+            self.api_client.get_supplier(1234)
+
+        assert self._request.call_count == 3
+
+    def test_failed_reads_are_not_remembered(self):
+        self._request.side_effect = dmapiclient.HTTPError()
+        with self.app.test_request_context():
+            for _ in range(2):
+                with pytest.raises(dmapiclient.HTTPError):
+                    self.api_client.get_supplier(1234)
+
+        assert self._request.call_count == 2
+
+    def test_reads_are_shared_with_gathered_calls(self):
+        with self.app.test_request_context():
+            self.api_client.get_supplier(1234)
+            gather(partial(self.api_client.get_supplier, 1234), partial(self.api_client.get_supplier, 1234))
+
+        assert self._request.call_count == 1
+
+    def test_reads_outside_a_request_are_not_remembered(self):
+        with self.app.app_context():
+            self.api_client.get_supplier(1234)
+            self.api_client.get_supplier(1234)
+
+        assert self._request.call_count == 2
+
+    def test_cache_can_be_disabled(self):
+        self.app.config["DM_DATA_API_REQUEST_CACHE"] = False
+        with self.app.test_request_context():
+            self.api_client.get_supplier(1234)
+            self.api_client.get_supplier(1234)
+
+        assert self._request.call_count == 2
+
+    def test_logs_request_cache_stats(self):
+        # init_app would also take the client's URL from the (test) config, which has none
+        self.app.after_request(self.api_client._log_request_cache_stats)
+
+        @self.app.route("/reads")
+        def reads():
+            self.api_client.get_supplier(1234)
+            self.api_client.get_supplier(1234)
+            return "OK"
+
+        with mock.patch.object(self.app.logger, "log") as log:
+            self.client.get("/reads")
+
+        assert mock.call(
+            mock.ANY,
+            "Data API reads: {api_cache_hits} served from the request cache, {api_cache_misses} made",
+            extra={"api_cache_hits": 1, "api_cache_misses": 1, "api_cache_writes": 0},
+        ) in log.call_args_list
@@ -0,0 +1,95 @@
+from itertools import chain
+from threading import Thread
+
+from dmcontent.errors import ContentNotFoundError
+
+from app import content_loader, get_content_loader
+from .helpers import BaseApplicationTest
+
+
+class TestSharedContentLoader(BaseApplicationTest):
+    def test_content_loader_is_shared_between_threads(self):
+        loaders = []
+        threads = [Thread(target=lambda: loaders.append(get_content_loader())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(loaders) == 4
+        assert all(loader is get_content_loader() for loader in loaders)
+
+    def test_content_loader_cannot_be_loaded_into(self):
+        assert not hasattr(get_content_loader(), "load_manifest")
+        assert not hasattr(get_content_loader(), "lazy_load_manifests")
+
+    def test_inplace_filtering_doesnt_affect_subsequent_manifests(self):
+        unfiltered_question_ids = [
+            question.id
+            for section in content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").sections
+            for question in section.questions
+        ]
+
+        filtered_manifest = content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").filter(
+            {"lot": "cloud-support"},
+            inplace_allowed=True,
+        )
+        assert [
+            question.id for section in filtered_manifest.sections for question in section.questions
+        ] != unfiltered_question_ids
+
+        assert [
+            question.id
+            for section in content_loader.get_manifest("g-cloud-9", "edit_service_as_admin").sections
+            for question in section.questions
+        ] == unfiltered_question_ids
+
+    def test_manifest_version_is_stable_and_distinguishes_manifests(self):
+        version = content_loader.get_manifest_version("g-cloud-9", "edit_service_as_admin")
+
+        assert version == content_loader.get_manifest_version("g-cloud-9", "edit_service_as_admin")
+        assert version != content_loader.get_manifest_version("g-cloud-9", "declaration")
+        assert version != content_loader.get_manifest_version("g-cloud-10", "edit_service_as_admin")
+
+    def test_filtered_manifests_match_dmcontent_filtering(self):
+        def _question_numbers(manifest):
+            return [
+                (section.id, question.id, question.number, [sub_question.id for sub_question in question.questions])
+                if hasattr(question, "questions") else (section.id, question.id, question.number)
+                for section in manifest.sections
+                for question in section.questions
+            ]
+
+        checked_manifests = 0
+        for framework in self._get_frameworks_list_fixture_data()["frameworks"]:
+            for manifest_name in ("edit_service_as_admin", "declaration"):
+                try:
+                    manifest = content_loader.get_manifest(framework["slug"], manifest_name)
+                except ContentNotFoundError:
+                    continue
+                checked_manifests += 1
+
+                # for each lot, no data, then the data with each depended-on key taking the first and last of the
+                # values it's depended on being
+                depends = [
+                    depends
+                    for question in chain.from_iterable(section.questions for section in manifest.sections)
+                    for depends in chain(
+                        question.get("depends", ()),
+                        *(sub_question.get("depends", ()) for sub_question in getattr(question, "questions", ())),
+                    )
+                ]
+                contexts = [
+                    {"lot": lot["slug"], **{d["on"]: d["being"][i] for d in depends if d["on"] != "lot"}}
+                    for lot in list(framework.get("lots", ())) + [{"slug": "not-a-lot"}]
+                    for i in (0, -1)
+                ] + [{}, {d["on"]: d["being"][0] for d in depends}]
+
+                for context in contexts:
+                    assert _question_numbers(
+                        content_loader.get_filtered_manifest(framework["slug"], manifest_name, context)
+                    ) == _question_numbers(
+                        content_loader.get_manifest(framework["slug"], manifest_name).filter(context)
+                    ), (framework["slug"], manifest_name, context)
+
+        assert checked_manifests
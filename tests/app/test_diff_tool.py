@@ -5,7 +5,7 @@ import pytest
 from lxml import html
 
 from app import content_loader
-from app.main.helpers.diff_tools import html_diff_tables_from_sections_iter
+from app.main.helpers.diff_tools import _render_diff_table, html_diff_tables_from_sections_iter
 from .helpers import BaseApplicationTest
 
 
@@ -343,3 +343,43 @@ class TestHtmlDiffTablesFromSections(BaseApplicationTest):
         ).filter(service_data_b).sections
 
         assert not tuple(html_diff_tables_from_sections_iter(content_sections, service_data_a, service_data_b))
+
+
+class TestRenderDiffTable:
+    # these outputs are exactly what we got from the previous implementation, which had difflib.HtmlDiff build a table
+    # and then parsed it and rewrote it with lxml - the markup shouldn't change under the stylesheets' feet
+    def test_output_is_unchanged(self):
+        assert _render_diff_table(
+            ["Fanny Hegarty\t& co", "Richard <Goulding>  ", "", "Christina Grier"],
+            ["Fanny Higgins\t& co", "", "Simon Dedalus of Cork", "Richard <Goulding>"],
+        ) == (
+            '<table>\n        <tbody>\n'
+            '            <tr><td class="line-number line-number-removal">1</td>'
+            '<td class="line-content removal">Fanny H<del>e</del>g<del>arty</del>   &amp; co</td>'
+            '<td class="line-number line-number-addition">1</td>'
+            '<td class="line-content addition">Fanny H<ins>i</ins>g<ins>gins</ins>   &amp; co</td></tr>\n'
+            '            <tr><td class="line-number line-number-removal">2</td>'
+            '<td class="line-content removal"><del>Richard &lt;Goulding&gt;  </del></td>'
+            '<td class="line-number line-non-existent"></td><td class="line-content line-non-existent"></td></tr>\n'
+            '            <tr><td class="line-number">3</td><td class="line-content"></td>'
+            '<td class="line-number">2</td><td class="line-content"></td></tr>\n'
+            '            <tr><td class="line-number line-number-removal">4</td>'
+            '<td class="line-content removal"><del>Christina Grier</del></td>'
+            '<td class="line-number line-number-addition">3</td>'
+            '<td class="line-content addition"><ins>Simon Dedalus of Cork</ins></td></tr>\n'
+            '            <tr><td class="line-number line-non-existent"></td>'
+            '<td class="line-content line-non-existent"></td>'
+            '<td class="line-number line-number-addition">4</td>'
+            '<td class="line-content addition"><ins>Richard &lt;Goulding&gt;</ins></td></tr>\n'
+            '        </tbody>\n    </table>'
+        )
+
+    def test_output_with_no_lines_is_unchanged(self):
+        assert _render_diff_table([], []) == (
+            '<table>\n        <tbody>\n'
+            '            <tr><td class="line-number line-non-existent"></td>'
+            '<td class="line-content line-non-existent"> Empty File </td>'
+            '<td class="line-number line-non-existent"></td>'
+            '<td class="line-content line-non-existent"> Empty File </td></tr>\n'
+            '        </tbody>\n    </table>'
+        )
@@ -0,0 +1,162 @@
+import logging
+import os
+
+from dmcontent.content_loader import ContentLoader
+from dmcontent.errors import ContentNotFoundError
+import mock
+import pytest
+
+from app.manifest_preloader import preload_manifests
+
+
+_content_files = {
+    "frameworks/g-cloud-99/manifests/edit_service_as_admin.yml": (
+        "- name: About your service\n"
+        "  description: The {{ 'service' }}\n"
+        "  questions:\n"
+        "    - serviceName\n"
+        "    - serviceSummary\n"
+    ),
+    "frameworks/g-cloud-99/questions/services/serviceName.yml": "question: Service name\ntype: text\n",
+    "frameworks/g-cloud-99/questions/services/serviceSummary.yml": (
+        "question: Summary\ntype: textbox_large\nhint: |\n  A summary of\n  the *service*\n"
+    ),
+    "frameworks/g-cloud-99/manifests/declaration.yml": "- name: Declaration\n  questions:\n    - status\n",
+    "frameworks/g-cloud-99/questions/declaration/status.yml": "question: Status\ntype: text\n",
+    "frameworks/g-cloud-98/manifests/edit_service_as_admin.yml": "- name: About\n  questions:\n    - serviceName\n",
+    "frameworks/g-cloud-98/questions/services/serviceName.yml": "question: Name\ntype: text\n",
+}
+
+
+class TestPreloadManifests:
+    @pytest.fixture(autouse=True)
+    def content_path(self, tmp_path):
+        for path, content in _content_files.items():
+            (tmp_path / "content" / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / "content" / path).write_text(content)
+        self.content_path = str(tmp_path / "content")
+        self.cache_dir = str(tmp_path / "cache")
+        self.logger = logging.getLogger("test")
+
+    def _preload(self, processes=0, cache_dir=None):
+        content_loader = ContentLoader(self.content_path)
+        loaded, missing = preload_manifests(
+            content_loader,
+            ["g-cloud-99", "g-cloud-98"],
+            self.logger,
+            cache_dir=cache_dir,
+            processes=processes,
+        )
+        return content_loader, loaded, missing
+
+    def _assert_matches_load_manifest(self, content_loader):
+        expected_content_loader = ContentLoader(self.content_path)
+        expected_content_loader.load_manifest("g-cloud-99", "services", "edit_service_as_admin")
+        expected_content_loader.load_manifest("g-cloud-99", "declaration", "declaration")
+        expected_content_loader.load_manifest("g-cloud-98", "services", "edit_service_as_admin")
+
+        for framework_slug, manifest in (
+            ("g-cloud-99", "edit_service_as_admin"),
+            ("g-cloud-99", "declaration"),
+            ("g-cloud-98", "edit_service_as_admin"),
+        ):
+            assert content_loader._content[framework_slug][manifest] == \
+                expected_content_loader._content[framework_slug][manifest]
+
+        summary_question = content_loader.get_manifest("g-cloud-99", "edit_service_as_admin").get_question(
+            "serviceSummary"
+        )
+        assert summary_question.hint == "<p class=\"govuk-body\">A summary of\nthe <em>service</em></p>"
+
+    @pytest.mark.parametrize("processes", (0, 2))
+    def test_loads_manifests_as_load_manifest_would(self, processes):
+        content_loader, loaded, missing = self._preload(processes=processes)
+
+        self._assert_matches_load_manifest(content_loader)
+        assert sorted(loaded) == [
+            ("g-cloud-98", "edit_service_as_admin"),
+            ("g-cloud-99", "declaration"),
+            ("g-cloud-99", "edit_service_as_admin"),
+        ]
+        assert missing == [("g-cloud-98", "declaration")]
+
+    def test_cached_manifests_are_reused(self):
+        self._preload(cache_dir=self.cache_dir)
+        assert len(os.listdir(self.cache_dir)) == 3
+
+        with mock.patch.object(ContentLoader, "generate_manifest", autospec=True) as generate_manifest:
+            generate_manifest.side_effect = ContentNotFoundError
+            content_loader, loaded, missing = self._preload(cache_dir=self.cache_dir)
+
+        # only the manifest there's no content for is looked for again
+        assert generate_manifest.call_args_list == [
+            mock.call(mock.ANY, "g-cloud-98", "declaration", "declaration"),
+        ]
+        self._assert_matches_load_manifest(content_loader)
+
+    def test_no_process_pool_is_started_for_cached_manifests(self):
+        self._preload(processes=2, cache_dir=self.cache_dir)
+
+        with mock.patch("app.manifest_preloader.ProcessPoolExecutor", autospec=True) as process_pool_executor:
+            content_loader, loaded, missing = self._preload(processes=2, cache_dir=self.cache_dir)
+
+        assert process_pool_executor.called is False
+        self._assert_matches_load_manifest(content_loader)
+        assert missing == [("g-cloud-98", "declaration")]
+
+    def test_cached_manifest_is_replaced_when_its_content_changes(self):
+        self._preload(cache_dir=self.cache_dir)
+
+        question_path = os.path.join(self.content_path, "frameworks/g-cloud-99/questions/services/serviceName.yml")
+        with open(question_path, "a") as f:
+            f.write("hint: A new hint\n")
+
+        content_loader, loaded, missing = self._preload(cache_dir=self.cache_dir)
+
+        assert content_loader.get_manifest("g-cloud-99", "edit_service_as_admin").get_question(
+            "serviceName"
+        ).hint == "A new hint"
+        self._assert_matches_load_manifest(content_loader)
+        assert len(os.listdir(self.cache_dir)) == 3
+
+    def test_unreadable_cached_manifests_are_regenerated(self):
+        self._preload(cache_dir=self.cache_dir)
+        for filename in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, filename), "wb") as f:
+                f.write(b"not a pickle")
+
+        content_loader, loaded, missing = self._preload(cache_dir=self.cache_dir)
+
+        self._assert_matches_load_manifest(content_loader)
+        content_loader, loaded, missing = self._preload(cache_dir=self.cache_dir)
+        self._assert_matches_load_manifest(content_loader)
+
+    def test_unreadable_cached_manifests_that_cant_be_removed_are_regenerated(self):
+        self._preload(cache_dir=self.cache_dir)
+        for filename in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, filename), "wb") as f:
+                f.write(b"not a pickle")
+
+        with mock.patch("app.manifest_preloader.os.remove", side_effect=PermissionError):
+            content_loader, loaded, missing = self._preload(cache_dir=self.cache_dir)
+
+        self._assert_matches_load_manifest(content_loader)
+
+    def test_cache_writable_by_other_users_is_not_used(self):
+        os.makedirs(self.cache_dir)
+        os.chmod(self.cache_dir, 0o777)
+
+        content_loader, loaded, missing = self._preload(cache_dir=self.cache_dir)
+
+        self._assert_matches_load_manifest(content_loader)
+        assert os.listdir(self.cache_dir) == []
+
+    def test_already_loaded_manifests_are_left_alone(self):
+        content_loader = ContentLoader(self.content_path)
+        content_loader.load_manifest("g-cloud-99", "services", "edit_service_as_admin")
+        manifest_data = content_loader._content["g-cloud-99"]["edit_service_as_admin"]
+
+        loaded, missing = preload_manifests(content_loader, ["g-cloud-99"], self.logger)
+
+        assert content_loader._content["g-cloud-99"]["edit_service_as_admin"] is manifest_data
+        assert sorted(loaded) == [("g-cloud-99", "declaration"), ("g-cloud-99", "edit_service_as_admin")]